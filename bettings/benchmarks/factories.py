@@ -0,0 +1,49 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from factory import DjangoModelFactory, LazyAttribute, Sequence
+
+from bettings.bets.models import Bet
+from bettings.tournaments.models import Tournament, Team, Match
+
+
+class BenchmarkUserFactory(DjangoModelFactory):
+    username = Sequence(lambda n: "bench-user-{}".format(n))
+    email = LazyAttribute(lambda user: "{}@example.com".format(user.username))
+    # an unusable password, hashing one per user would dominate the seeding time
+    password = "!"
+
+    class Meta:
+        model = get_user_model()
+
+
+class BenchmarkTournamentFactory(DjangoModelFactory):
+    name = Sequence(lambda n: "Bench Cup {}".format(n))
+    start_date = LazyAttribute(lambda _: datetime.date.today() - datetime.timedelta(days=30))
+    end_date = LazyAttribute(lambda _: datetime.date.today() + datetime.timedelta(days=365))
+
+    class Meta:
+        model = Tournament
+
+
+class BenchmarkTeamFactory(DjangoModelFactory):
+    name = Sequence(lambda n: "Bench Team {}".format(n))
+
+    class Meta:
+        model = Team
+
+
+class BenchmarkMatchFactory(DjangoModelFactory):
+    start_time = Sequence(lambda n: timezone.now() + datetime.timedelta(days=1, minutes=n))
+    odds = 0
+
+    class Meta:
+        model = Match
+
+
+class BenchmarkBetFactory(DjangoModelFactory):
+    amount = 10000
+
+    class Meta:
+        model = Bet
@@ -0,0 +1,74 @@
+import collections
+import itertools
+import logging
+from django.contrib.auth import get_user_model
+
+from bettings.bets.models import Bet
+from bettings.tournaments.models import Match
+from .factories import (BenchmarkUserFactory, BenchmarkTournamentFactory, BenchmarkTeamFactory, BenchmarkMatchFactory,
+                        BenchmarkBetFactory)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# values per "IN (...)" lookup, under the SQLite variable limit
+LOOKUP_BATCH_SIZE = 500
+TEAM_COUNT = 20
+
+Dataset = collections.namedtuple("Dataset", ["tournament", "teams", "user_ids", "match_ids", "free_match_ids"])
+
+
+def _build_in_batches(factory, count: int, batch_size: int, **kwargs):
+    """Insert ``count`` objects built by ``factory`` with bulk_create, never holding more than a batch in memory."""
+    model = factory._meta.model
+    for start in range(0, count, batch_size):
+        model.objects.bulk_create(factory.build_batch(min(batch_size, count - start), **kwargs))
+
+
+def seed_users(count: int, batch_size: int = BATCH_SIZE) -> list:
+    User = get_user_model()
+    last_pk = User.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    _build_in_batches(BenchmarkUserFactory, count, batch_size)
+    # bulk_create only sets primary keys on PostgreSQL
+    return list(User.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True))
+
+
+def seed_matches(tournament, teams: list, count: int, batch_size: int = BATCH_SIZE) -> list:
+    last_pk = Match.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    pairs = itertools.cycle(itertools.permutations(teams, 2))
+    for start in range(0, count, batch_size):
+        Match.objects.bulk_create([BenchmarkMatchFactory.build(tournament=tournament, home=home, guest=guest)
+                                   for home, guest in itertools.islice(pairs, min(batch_size, count - start))])
+    return list(Match.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True))
+
+
+def seed_bets(user_ids: list, match_ids: list, count: int, batch_size: int = BATCH_SIZE) -> int:
+    """Spread ``count`` bets over distinct (user, match) pairs, walking the users first."""
+    if count > len(user_ids) * len(match_ids):
+        raise ValueError("[{}] bets need more than [{}] users times [{}] matches"
+                         .format(count, len(user_ids), len(match_ids)))
+    homes = {}
+    for start in range(0, len(match_ids), LOOKUP_BATCH_SIZE):
+        batch = match_ids[start:start + LOOKUP_BATCH_SIZE]
+        homes.update(Match.objects.filter(pk__in=batch).values_list("pk", "home_id"))
+    for start in range(0, count, batch_size):
+        bets = []
+        for i in range(start, min(start + batch_size, count)):
+            match_id = match_ids[i // len(user_ids)]
+            bets.append(BenchmarkBetFactory.build(user_id=user_ids[i % len(user_ids)], match_id=match_id,
+                                                  choice_id=homes[match_id]))
+        Bet.objects.bulk_create(bets)
+    return count
+
+
+def seed(users: int, matches: int, bets: int, free_matches: int = 0, batch_size: int = BATCH_SIZE) -> Dataset:
+    """Create one tournament with ``users``, ``matches`` and ``bets``, plus ``free_matches`` matches nobody bet on."""
+    tournament = BenchmarkTournamentFactory()
+    teams = BenchmarkTeamFactory.create_batch(TEAM_COUNT)
+    tournament.teams.add(*teams)
+    user_ids = seed_users(users, batch_size)
+    match_ids = seed_matches(tournament, teams, matches, batch_size)
+    free_match_ids = seed_matches(tournament, teams, free_matches, batch_size)
+    seed_bets(user_ids, match_ids, bets, batch_size)
+    logger.info("Seeded [{}] users, [{}] matches and [{}] bets".format(users, matches + free_matches, bets))
+    return Dataset(tournament, teams, user_ids, match_ids, free_match_ids)
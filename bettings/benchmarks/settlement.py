@@ -0,0 +1,118 @@
+import contextlib
+import logging
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from bettings.bets.models import Bet, SettlementJob
+from bettings.bets.settlement import run_pending_jobs
+from bettings.leaderboard.models import Standing
+from bettings.tournaments.models import Match, MatchResult
+from bettings.users.models import BalanceEntry
+from bettings.utils.query_budget import QueryCounter
+from .seed import seed
+
+logger = logging.getLogger(__name__)
+
+MODE_INLINE = "inline"
+MODE_JOBS = "jobs"
+MODE_PER_BET = "per-bet"
+MODES = (MODE_INLINE, MODE_JOBS, MODE_PER_BET)
+
+
+def settle_per_bet(match):
+    """Settle bet by bet through Bet.update_result, the row-at-a-time baseline."""
+    for bet in Bet.objects.filter(match=match).select_related("match__result"):
+        bet.update_result()
+
+
+def run_settlement(match, mode: str, chunk_size: int = None):
+    """Store the result of ``match`` and settle it the way ``mode`` says."""
+    if mode == MODE_PER_BET:
+        MatchResult.objects.bulk_create([MatchResult(match=match, home_goals=1, guest_goals=0).classify()])
+        settle_per_bet(Match.objects.select_related("result").get(pk=match.pk))
+    elif mode == MODE_JOBS:
+        with override_settings(SETTLEMENT_ASYNC=True):
+            MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+        run_pending_jobs(chunk_size)
+    else:
+        with override_settings(SETTLEMENT_ASYNC=False):
+            MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+
+@contextlib.contextmanager
+def profile(profiler: str = None, output: str = None):
+    """Profile the block with cProfile or pyinstrument and write the report to ``output``."""
+    if profiler is None:
+        yield
+        return
+    if profiler == "pyinstrument":
+        # optional, only needed for this report
+        from pyinstrument import Profiler
+        pyinstrument_profiler = Profiler()
+        pyinstrument_profiler.start()
+        try:
+            yield
+        finally:
+            pyinstrument_profiler.stop()
+            with open(output, "w") as stream:
+                stream.write(pyinstrument_profiler.output_text())
+        return
+    import cProfile
+    c_profiler = cProfile.Profile()
+    c_profiler.enable()
+    try:
+        yield
+    finally:
+        c_profiler.disable()
+        c_profiler.dump_stats(output)
+
+
+def benchmark_settlement(bets: int, mode: str = MODE_INLINE, chunk_size: int = None, trace_memory: bool = True,
+                         profiler: str = None, profile_output: str = None) -> dict:
+    """Seed one match with ``bets`` bets, one user each, and measure how long settling it takes."""
+    start = time.perf_counter()
+    dataset = seed(users=bets, matches=1, bets=bets)
+    seed_seconds = time.perf_counter() - start
+    match = Match.objects.get(pk=dataset.match_ids[0])
+    entries_before = BalanceEntry.objects.count()
+
+    counter = QueryCounter()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with profile(profiler, profile_output), connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            run_settlement(match, mode, chunk_size)
+            seconds = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    settled = Bet.objects.filter(match=match, result__isnull=False).count()
+    if settled != bets:
+        raise AssertionError("Settled [{}] of [{}] bets".format(settled, bets))
+    result = {
+        "bets": bets,
+        "mode": mode,
+        "chunk_size": chunk_size,
+        "database": connection.vendor,
+        "seed_seconds": seed_seconds,
+        "seconds": seconds,
+        "bets_per_second": bets / seconds if seconds else None,
+        "queries": counter.count,
+        "query_seconds": counter.duration,
+        "rows_written": {
+            "bets": settled,
+            "balance_entries": BalanceEntry.objects.count() - entries_before,
+            "standings": Standing.objects.filter(user_id__in=Bet.objects.filter(match=match).values("user_id"))
+            .count(),
+            "settlement_jobs": SettlementJob.objects.filter(match=match).count(),
+        },
+        "peak_memory_bytes": peak_memory,
+    }
+    logger.info("Settled [{}] bets in [{:.3f}s] with [{}] queries".format(bets, seconds, counter.count))
+    return result
@@ -0,0 +1,139 @@
+import contextlib
+import logging
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from bettings.bets.settlement import settle_match
+from bettings.tournaments.models import Match, MatchResult
+from bettings.utils.query_budget import QueryCounter
+from .seed import seed
+
+logger = logging.getLogger(__name__)
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Run in a throwaway test database, so seeding never touches the configured one."""
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def measure(name: str, operation, repeat: int, setup=None, rows_per_call: int = 1) -> dict:
+    """Call ``operation(i)`` ``repeat`` times and summarise its latency, queries and throughput.
+
+    ``setup(i)`` runs before each call outside of the measurement.
+    """
+    latencies = []
+    queries = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            operation(i)
+            latencies.append(time.perf_counter() - start)
+        queries.append(counter.count)
+    total = sum(latencies)
+    result = {
+        "name": name,
+        "repeat": repeat,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": percentile(latencies, 0.5) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "max": max(latencies) * 1000,
+        },
+        "queries": {"mean": statistics.mean(queries), "max": max(queries)},
+        "throughput_per_s": repeat * rows_per_call / total if total else None,
+    }
+    logger.info("Benchmark [{}]: p50 [{:.2f}ms], p95 [{:.2f}ms], [{}] queries at most"
+                .format(name, result["latency_ms"]["p50"], result["latency_ms"]["p95"], result["queries"]["max"]))
+    return result
+
+
+def check_response(response, status_code: int = 200):
+    if response.status_code != status_code:
+        raise AssertionError("Expected status [{}], got [{}]".format(status_code, response.status_code))
+    return response
+
+
+def run_suite(users: int, matches: int, bets: int, repeat: int) -> dict:
+    """Seed a dataset in the current database and benchmark the betting hot paths on it."""
+    repeat = max(repeat, 1)
+    free_matches = -(-repeat // users)
+    start = time.perf_counter()
+    dataset = seed(users, matches, bets, free_matches=free_matches)
+    seed_seconds = time.perf_counter() - start
+    client = Client()
+    User = get_user_model()
+    results = []
+
+    match_list_url = reverse("tournaments:match_list", kwargs={"tournament_pk": dataset.tournament.pk})
+    results.append(measure("match_list_cold", lambda i: check_response(client.get(match_list_url)), repeat,
+                           setup=lambda i: cache.clear()))
+    results.append(measure("match_list_warm", lambda i: check_response(client.get(match_list_url)), repeat))
+
+    def login(i):
+        client.force_login(User.objects.get(pk=dataset.user_ids[i % users]))
+
+    free_match_homes = dict(Match.objects.filter(pk__in=dataset.free_match_ids).values_list("pk", "home_id"))
+
+    def place_bet(i):
+        match_pk = dataset.free_match_ids[i // users]
+        check_response(client.post(reverse("bets:create", kwargs={"match_pk": match_pk}),
+                                   {"choice": free_match_homes[match_pk], "amount": 10000}), 302)
+
+    results.append(measure("bet_placement", place_bet, repeat, setup=login))
+
+    client.force_login(User.objects.get(pk=dataset.user_ids[0]))
+    bet_list_url = reverse("bets:my_bets")
+    results.append(measure("bet_list", lambda i: check_response(client.get(bet_list_url)), repeat))
+
+    # bets fill the matches one after the other, each full match holds one bet per user
+    settled_matches = dataset.match_ids[:min(repeat, bets // users)]
+    MatchResult.objects.bulk_create([MatchResult(match=match, home_goals=1, guest_goals=0).classify()
+                                     for match in Match.objects.filter(pk__in=settled_matches)])
+    loaded = list(Match.objects.filter(pk__in=settled_matches).select_related("result").order_by("pk"))
+    if loaded:
+        results.append(measure("settlement", lambda i: settle_match(loaded[i]), len(loaded), rows_per_call=users))
+
+    return {
+        "commit": get_commit(),
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "parameters": {"users": users, "matches": matches, "bets": bets, "repeat": repeat},
+        "seed_seconds": seed_seconds,
+        "results": results,
+    }
@@ -0,0 +1,32 @@
+import pstats
+
+import pytest
+
+from bettings.benchmarks.settlement import MODES, MODE_INLINE, benchmark_settlement
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_benchmark_settles_every_bet(mode):
+    result = benchmark_settlement(5, mode, chunk_size=2, trace_memory=False)
+
+    assert result["rows_written"]["bets"] == 5
+    assert result["rows_written"]["balance_entries"] == 5
+    assert result["queries"] > 0
+    assert result["peak_memory_bytes"] is None
+
+
+def test_inline_settlement_queries_do_not_grow_with_bets():
+    few = benchmark_settlement(3, MODE_INLINE)
+    many = benchmark_settlement(30, MODE_INLINE)
+
+    assert many["queries"] == few["queries"]
+    assert many["peak_memory_bytes"] > 0
+
+
+def test_cprofile_dump(tmpdir):
+    output = tmpdir.join("settlement.prof").strpath
+    benchmark_settlement(3, MODE_INLINE, trace_memory=False, profiler="cprofile", profile_output=output)
+
+    assert pstats.Stats(output).total_calls > 0
@@ -0,0 +1,29 @@
+import pytest
+
+from bettings.bets.models import Bet
+from bettings.benchmarks.seed import seed
+from bettings.benchmarks.suite import run_suite
+
+pytestmark = pytest.mark.django_db
+
+
+def test_seed_spreads_bets_over_distinct_pairs():
+    dataset = seed(users=4, matches=3, bets=10, free_matches=2)
+
+    assert len(dataset.user_ids) == 4
+    assert len(dataset.match_ids) == 3
+    assert Bet.objects.count() == 10
+    assert not Bet.objects.filter(match_id__in=dataset.free_match_ids).exists()
+
+
+def test_suite_reports_every_benchmark():
+    report = run_suite(users=3, matches=3, bets=7, repeat=2)
+
+    names = [result["name"] for result in report["results"]]
+    assert names == ["match_list_cold", "match_list_warm", "bet_placement", "bet_list", "settlement"]
+    results = {result["name"]: result for result in report["results"]}
+    # the warm match list is served from the page cache
+    assert results["match_list_warm"]["queries"]["max"] == 0
+    assert results["match_list_cold"]["queries"]["max"] > 0
+    assert results["settlement"]["repeat"] == 2
+    assert results["bet_placement"]["latency_ms"]["p95"] >= results["bet_placement"]["latency_ms"]["p50"]
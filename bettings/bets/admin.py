@@ -1 +1,12 @@
+from django.contrib import admin
+
+from .models import SettlementJob
+
+
 # Register your models here.
+@admin.register(SettlementJob)
+class SettlementJobAdmin(admin.ModelAdmin):
+    list_display = ["pk", "match", "status", "attempts", "settled_count", "modified_at"]
+    list_filter = ["status"]
+    list_select_related = ["match__home", "match__guest", "match__tournament"]
+    readonly_fields = ["match", "attempts", "last_bet_id", "settled_count", "locked_at", "error"]
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .api_views import BetCreateAPIView, BetDetailAPIView, BetSlipAPIView
+
+app_name = "bets_api"
+
+urlpatterns = [
+    path("", BetCreateAPIView.as_view(), name="create"),
+    path("slip/", BetSlipAPIView.as_view(), name="slip"),
+    path("<int:bet_pk>/", BetDetailAPIView.as_view(), name="detail"),
+]
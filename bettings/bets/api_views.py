@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+from .constants import ErrorResponse
+from .exceptions import BaseCustomException, InvalidRequestException, NotFoundException, ConflictException
+from .models import Bet, IdempotencyKey
+from .serializers import BetSerializer, BetCreateSerializer, BetUpdateSerializer, BetSlipSerializer
+from .window import BetWindow, get_bet_window, get_bet_windows
+
+logger = logging.getLogger(__name__)
+
+
+def get_open_window(match_pk) -> BetWindow:
+    window = get_bet_window(match_pk)
+    if window is None:
+        raise NotFoundException(ErrorResponse.BET_MATCH_NOT_FOUND)
+    check_window(window)
+    return window
+
+
+def check_window(window: BetWindow, choice_pk: int = None):
+    if not window.is_open():
+        raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
+    if choice_pk is not None and not window.has_team(choice_pk):
+        raise InvalidRequestException(ErrorResponse.BET_INVALID_CHOICE)
+
+
+class IdempotentAPIMixin:
+    """Replay the stored response when a request is retried with the same ``Idempotency-Key`` header."""
+
+    def get_fingerprint(self, request) -> str:
+        payload = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+        return hashlib.sha256("{} {} {}".format(request.method, request.path, payload).encode("utf-8")).hexdigest()
+
+    def claim_key(self, user, key: str, fingerprint: str) -> IdempotencyKey:
+        """Insert the key before the request runs, a concurrent retry waits for it and then finds it stored.
+
+        Returns a pending key when this request has to run, the stored key of an earlier request otherwise.
+        """
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint, status_code=0,
+                                                     response_body="")
+        except IntegrityError:
+            stored = IdempotencyKey.objects.select_for_update().get(user=user, key=key)
+        if stored.is_expired():
+            stored.fingerprint = fingerprint
+            stored.status_code = 0
+            stored.response_body = ""
+            stored.created_at = timezone.now()
+            stored.save()
+        return stored
+
+    def run_idempotent(self, request, handler, *args, **kwargs):
+        key = request.META.get("HTTP_IDEMPOTENCY_KEY")
+        if not key:
+            return handler(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            raise InvalidRequestException(ErrorResponse.IDEMPOTENCY_KEY_TOO_LONG)
+        fingerprint = self.get_fingerprint(request)
+        with transaction.atomic():
+            stored = self.claim_key(request.user, key, fingerprint)
+            if stored.fingerprint != fingerprint:
+                raise ConflictException(ErrorResponse.IDEMPOTENCY_KEY_REUSED)
+            if not stored.is_pending():
+                logger.info("Replaying response of idempotency key [{}] of user [{}]".format(key, request.user.pk))
+                response = Response(json.loads(stored.response_body), status=stored.status_code)
+                response["Idempotent-Replayed"] = "true"
+                return response
+            response = handler(request, *args, **kwargs)
+            stored.status_code = response.status_code
+            stored.response_body = json.dumps(response.data, cls=JSONEncoder)
+            stored.save(update_fields=["status_code", "response_body"])
+        return response
+
+
+class BetCreateAPIView(IdempotentAPIMixin, APIView):
+    query_budget = 6
+
+    def post(self, request, *args, **kwargs):
+        return self.run_idempotent(request, self.create_bet)
+
+    def create_bet(self, request):
+        serializer = BetCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        window = get_open_window(data["match"])
+        check_window(window, data["choice"])
+        try:
+            with transaction.atomic():
+                bet = Bet.objects.create(user=request.user, match_id=window.match_pk, choice_id=data["choice"],
+                                         amount=data["amount"])
+        except IntegrityError:
+            raise ConflictException(ErrorResponse.BET_ALREADY_EXISTS)
+        logger.info("User [{}] created bet [{}] at match [{}] with choice [{}] and amount [{}] through the API"
+                    .format(request.user.pk, bet.pk, window.match_pk, bet.choice_id, bet.amount))
+        return Response(BetSerializer(bet).data, status=status.HTTP_201_CREATED)
+
+
+class BetDetailAPIView(IdempotentAPIMixin, APIView):
+    query_budget = 6
+
+    def get_bet(self, request, bet_pk) -> Bet:
+        bet = Bet.objects.filter(pk=bet_pk, user=request.user).first()
+        if bet is None:
+            raise NotFoundException(ErrorResponse.BET_NOT_FOUND)
+        self.window = get_open_window(bet.match_id)
+        return bet
+
+    def put(self, request, *args, **kwargs):
+        return self.run_idempotent(request, self.update_bet, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self.run_idempotent(request, self.update_bet, partial=True)
+
+    def delete(self, request, *args, **kwargs):
+        return self.run_idempotent(request, self.delete_bet)
+
+    def update_bet(self, request, partial: bool):
+        serializer = BetUpdateSerializer(data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        bet = self.get_bet(request, self.kwargs.get("bet_pk"))
+        data = serializer.validated_data
+        if "choice" in data:
+            check_window(self.window, data["choice"])
+            bet.choice_id = data["choice"]
+        if "amount" in data:
+            bet.amount = data["amount"]
+        bet.save(update_fields=["choice", "amount", "modified_at"])
+        logger.info("User [{}] updated bet [{}] with choice [{}] and amount [{}] through the API"
+                    .format(request.user.pk, bet.pk, bet.choice_id, bet.amount))
+        return Response(BetSerializer(bet).data)
+
+    def delete_bet(self, request):
+        bet = self.get_bet(request, self.kwargs.get("bet_pk"))
+        bet.delete()
+        logger.info("User [{}] deleted bet [{}] through the API".format(request.user.pk, self.kwargs.get("bet_pk")))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BetSlipAPIView(IdempotentAPIMixin, APIView):
+    """Place a whole slip of bets at once, each entry is admitted or rejected on its own."""
+    query_budget = 8
+
+    def post(self, request, *args, **kwargs):
+        return self.run_idempotent(request, self.place_slip)
+
+    def place_slip(self, request):
+        serializer = BetSlipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.validated_data["bets"]
+        match_ids = {entry["match"] for entry in entries}
+        windows = get_bet_windows(match_ids)
+        taken = set(Bet.objects.filter(user=request.user, match_id__in=match_ids).values_list("match_id", flat=True))
+
+        results = []
+        new_bets = []
+        for entry in entries:
+            window = windows.get(entry["match"])
+            try:
+                if window is None:
+                    raise NotFoundException(ErrorResponse.BET_MATCH_NOT_FOUND)
+                check_window(window, entry["choice"])
+                if window.match_pk in taken:
+                    raise ConflictException(ErrorResponse.BET_ALREADY_EXISTS)
+            except BaseCustomException as e:
+                results.append(dict(e.to_dict(), match=entry["match"], status=e.status_code))
+                continue
+            taken.add(window.match_pk)
+            new_bets.append(Bet(user=request.user, match_id=window.match_pk, choice_id=entry["choice"],
+                                amount=entry["amount"]))
+            results.append({"match": window.match_pk, "status": status.HTTP_201_CREATED})
+
+        if new_bets:
+            try:
+                with transaction.atomic():
+                    Bet.objects.bulk_create(new_bets)
+            except IntegrityError:
+                # a concurrent request placed one of the bets in between
+                raise ConflictException(ErrorResponse.BET_ALREADY_EXISTS)
+            # bulk_create only sets primary keys on PostgreSQL, read the new rows back in one query
+            created = Bet.objects.filter(user=request.user, match_id__in=[bet.match_id for bet in new_bets])
+            created = {bet.match_id: BetSerializer(bet).data for bet in created}
+            for result in results:
+                if result["status"] == status.HTTP_201_CREATED:
+                    result["bet"] = created[result["match"]]
+        logger.info("User [{}] placed [{}] of [{}] bets of a slip through the API"
+                    .format(request.user.pk, len(new_bets), len(entries)))
+        return Response({"created": len(new_bets), "results": results},
+                        status=status.HTTP_201_CREATED if new_bets else status.HTTP_200_OK)
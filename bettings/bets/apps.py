@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BetsConfig(AppConfig):
     name = 'bettings.bets'
+
+    def ready(self):
+        from . import signals  # noqa F401
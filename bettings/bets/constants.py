@@ -3,6 +3,12 @@ from enum import Enum
 
 class ErrorResponse(Enum):
     BET_EXPIRED_TIME = (1, "Bet on this match is expired")
+    BET_MATCH_NOT_FOUND = (2, "Match does not exist")
+    BET_NOT_FOUND = (3, "Bet does not exist")
+    BET_INVALID_CHOICE = (4, "Chosen team does not play this match")
+    BET_ALREADY_EXISTS = (5, "User already has a bet on this match")
+    IDEMPOTENCY_KEY_REUSED = (6, "Idempotency key was already used for a different request")
+    IDEMPOTENCY_KEY_TOO_LONG = (7, "Idempotency key must be at most 64 characters")
 
     def __init__(self, code: int, message: str):
         self.code = code
@@ -21,3 +21,11 @@ class BaseCustomException(Exception):
 
 class InvalidRequestException(BaseCustomException):
     status_code = 400
+
+
+class NotFoundException(BaseCustomException):
+    status_code = 404
+
+
+class ConflictException(BaseCustomException):
+    status_code = 409
@@ -0,0 +1,70 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Bet
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_NDJSON: "application/x-ndjson",
+}
+
+# (column, lookup) of every exported field, followed through joins so a row never triggers a query
+EXPORT_FIELDS = (
+    ("bet_id", "pk"),
+    ("user", "user__username"),
+    ("tournament", "match__tournament__name"),
+    ("match_id", "match_id"),
+    ("start_time", "match__start_time"),
+    ("home", "match__home__name"),
+    ("guest", "match__guest__name"),
+    ("odds", "match__odds"),
+    ("choice", "choice__name"),
+    ("amount", "amount"),
+    ("home_goals", "match__result__home_goals"),
+    ("guest_goals", "match__result__guest_goals"),
+    ("result", "result"),
+    ("created_at", "created_at"),
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def get_export_rows(user=None, tournament_pk=None):
+    """Return the export rows of a user's bets and/or the bets of a tournament as tuples."""
+    bets = Bet.objects.all()
+    if user is not None:
+        bets = bets.filter(user=user)
+    if tournament_pk is not None:
+        bets = bets.filter(match__tournament_id=tournament_pk)
+    lookups = [lookup for _, lookup in EXPORT_FIELDS]
+    return bets.order_by("match__start_time", "pk").values_list(*lookups)
+
+
+class Echo:
+    """Pseudo buffer handing each line written by csv.writer back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in EXPORT_FIELDS])
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    columns = [column for column, _ in EXPORT_FIELDS]
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_export(rows, export_format: str):
+    """Yield the export line by line, the rows are read with a server-side cursor where the database has one."""
+    if export_format == FORMAT_NDJSON:
+        return iter_ndjson(rows)
+    return iter_csv(rows)
@@ -25,10 +25,10 @@ class BetUpdateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         bet_pk = kwargs.pop("bet_pk")
-        bet = Bet.objects.get(pk=bet_pk)
-        match_id = bet.match.pk
+        bet = kwargs.get("instance") or Bet.objects.get(pk=bet_pk)
+        match_id = bet.match_id
         super().__init__(*args, **kwargs)
         self.initial["amount"] = round(bet.amount)
         self.fields["choice"] = forms.ModelChoiceField(label="Choose team", queryset=Team.objects.filter(
             Q(home_matches__pk=match_id) | Q(guest_matches__pk=match_id)).distinct())
-        self.initial["choice"] = bet.choice.pk
+        self.initial["choice"] = bet.choice_id
@@ -0,0 +1,222 @@
+import collections
+import heapq
+import json
+import logging
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from bettings.tournaments.models import Match
+from bettings.tournaments.templatetags.utility_filters import display_odds_filter
+from .window import BET_CUTOFF
+
+logger = logging.getLogger(__name__)
+
+EVENT_ODDS_CHANGED = "odds_changed"
+EVENT_RESULT_POSTED = "result_posted"
+EVENT_BETTING_CLOSED = "betting_closed"
+EVENT_RESET = "reset"
+
+
+class MatchEvent(collections.namedtuple("MatchEvent", ["id", "kind", "match_pk", "tournament_pk", "data"])):
+    """A change of a match pushed to the live streams, ``data`` is built once by the publisher."""
+
+    def to_sse(self, event_id: str) -> str:
+        data = json.dumps(dict(self.data, match=self.match_pk, tournament=self.tournament_pk), cls=DjangoJSONEncoder)
+        return "id: {}\nevent: {}\ndata: {}\n\n".format(event_id, self.kind, data)
+
+
+class MatchEventHub:
+    """In-process fan-out of match events to every live stream of this process.
+
+    It stands in for a Redis pub/sub channel: publishers append to a bounded buffer and wake all waiting
+    streams at once, so a posted result costs one read of the match no matter how many users watch it.
+    Streams resume from the id of the last event they sent; when that event already left the buffer they
+    get a reset and reload the page. Event ids only count within a process, so the ids sent to browsers
+    carry a token of the process and an id from another process or from before a restart is not resumed.
+    Betting closes on the clock, not on a write, so the hub keeps the closing times of upcoming matches
+    and publishes their closing itself when a stream wakes up.
+    """
+
+    def __init__(self, buffer_size: int = 1000):
+        self.token = uuid.uuid4().hex[:8]
+        self._events = collections.deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._last_id = 0
+        self._closings = []
+        self._closes_at = {}
+        self._schedule_loaded = False
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def format_event_id(self, event_id: int) -> str:
+        return "{}-{}".format(self.token, event_id)
+
+    def parse_event_id(self, value: str):
+        """Return the id of an event sent by this process, or None for an id of another process or garbage."""
+        token, _, event_id = value.partition("-")
+        if token != self.token or not event_id.isdigit() or int(event_id) > self._last_id:
+            return None
+        return int(event_id)
+
+    def publish(self, kind: str, match_pk: int, tournament_pk: int, data: dict = None) -> MatchEvent:
+        with self._condition:
+            event = self._append(kind, match_pk, tournament_pk, data)
+            self._condition.notify_all()
+        logger.info("Published [{}] of match [{}] as event [{}]".format(kind, match_pk, event.id))
+        return event
+
+    def _append(self, kind, match_pk, tournament_pk, data):
+        self._last_id += 1
+        event = MatchEvent(self._last_id, kind, match_pk, tournament_pk, data or {})
+        self._events.append(event)
+        return event
+
+    def schedule_closing(self, match_pk: int, tournament_pk: int, closes_at):
+        """Remember when betting on a match closes, a later call for the same match replaces the time."""
+        with self._condition:
+            self._schedule(match_pk, tournament_pk, closes_at)
+
+    def cancel_closing(self, match_pk: int):
+        with self._condition:
+            self._closes_at.pop(match_pk, None)
+
+    def _schedule(self, match_pk, tournament_pk, closes_at):
+        if closes_at <= timezone.now():
+            self._closes_at.pop(match_pk, None)
+            return
+        self._closes_at[match_pk] = closes_at
+        heapq.heappush(self._closings, (closes_at, match_pk, tournament_pk))
+
+    def load_schedule(self):
+        """Schedule the closing of every upcoming match once per process, with one query."""
+        if self._schedule_loaded:
+            return
+        rows = Match.objects.filter(start_time__gt=timezone.now() + BET_CUTOFF, result__isnull=True).values_list(
+            "pk", "tournament_id", "start_time")
+        with self._condition:
+            for match_pk, tournament_pk, start_time in rows:
+                self._schedule(match_pk, tournament_pk, start_time - BET_CUTOFF)
+            self._schedule_loaded = True
+
+    def _publish_due_closings(self):
+        now = timezone.now()
+        published = False
+        while self._closings and self._closings[0][0] <= now:
+            closes_at, match_pk, tournament_pk = heapq.heappop(self._closings)
+            # entries replaced by a later schedule_closing() or cancelled are skipped
+            if self._closes_at.get(match_pk) != closes_at:
+                continue
+            del self._closes_at[match_pk]
+            self._append(EVENT_BETTING_CLOSED, match_pk, tournament_pk, {"closes_at": closes_at})
+            published = True
+        if published:
+            self._condition.notify_all()
+
+    def _seconds_to_next_closing(self):
+        if not self._closings:
+            return None
+        return max((self._closings[0][0] - timezone.now()).total_seconds(), 0)
+
+    def _get_events(self, last_id):
+        if last_id > self._last_id or (self._events and last_id < self._events[0].id - 1):
+            return None
+        return [event for event in self._events if event.id > last_id]
+
+    def wait(self, last_id: int, timeout: float):
+        """Block until events after ``last_id`` exist or ``timeout`` seconds pass, return them.
+
+        Returns None when the events after ``last_id`` are not buffered anymore, the caller has to start
+        over from ``last_id``.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._publish_due_closings()
+                events = self._get_events(last_id)
+                remaining = deadline - time.monotonic()
+                if events is None or events or remaining <= 0:
+                    return events
+                next_closing = self._seconds_to_next_closing()
+                if next_closing is not None:
+                    remaining = min(remaining, next_closing)
+                self._condition.wait(remaining)
+
+    def clear(self):
+        with self._condition:
+            self._events.clear()
+            self._closings = []
+            self._closes_at = {}
+            self._schedule_loaded = False
+
+
+match_events = MatchEventHub(settings.LIVE_EVENTS_BUFFER_SIZE)
+
+
+def load_match_event(match_pk: int, kind: str):
+    """Read the match once and publish ``kind`` with the state every stream needs to update its row."""
+    row = Match.objects.filter(pk=match_pk).values(
+        "tournament_id", "odds", "start_time", "result__home_goals", "result__guest_goals", "result__outcome").first()
+    if row is None:
+        return None
+    data = {
+        "odds": row["odds"],
+        "odds_html": display_odds_filter(row["odds"]),
+        "start_time": row["start_time"],
+    }
+    if row["result__outcome"] is not None:
+        data.update(home_goals=row["result__home_goals"], guest_goals=row["result__guest_goals"],
+                    outcome=row["result__outcome"])
+        match_events.cancel_closing(match_pk)
+    else:
+        match_events.schedule_closing(match_pk, row["tournament_id"], row["start_time"] - BET_CUTOFF)
+    return match_events.publish(kind, match_pk, row["tournament_id"], data)
+
+
+def publish_match_event(match_pk: int, kind: str):
+    """Publish once the change is committed, streams must never announce a rolled back write."""
+    if not settings.LIVE_EVENTS_ENABLED:
+        return
+    transaction.on_commit(lambda: load_match_event(match_pk, kind))
+
+
+def schedule_match_closing(match):
+    """Schedule the closing of a new or moved match on commit, from the instance without a query."""
+    if not settings.LIVE_EVENTS_ENABLED:
+        return
+    closes_at = match.start_time - BET_CUTOFF
+    transaction.on_commit(lambda: match_events.schedule_closing(match.pk, match.tournament_id, closes_at))
+
+
+def iter_match_events(last_id: int, tournament_pk: int = None):
+    """Yield server-sent events after ``last_id`` for ``LIVE_EVENTS_STREAM_SECONDS``, then let the client reconnect.
+
+    Comment lines keep idle connections open through proxies. Streams never touch the database while
+    they run, the events carry everything the page shows.
+    """
+    # the id makes a reconnect resume from here even before the first event
+    yield "retry: {}\nid: {}\n\n".format(settings.LIVE_EVENTS_RETRY_MILLISECONDS,
+                                         match_events.format_event_id(last_id))
+    deadline = time.monotonic() + settings.LIVE_EVENTS_STREAM_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = match_events.wait(last_id, min(settings.LIVE_EVENTS_KEEPALIVE_SECONDS, remaining))
+        if events is None:
+            last_id = match_events.last_id
+            yield "id: {}\nevent: {}\ndata: {{}}\n\n".format(match_events.format_event_id(last_id), EVENT_RESET)
+            continue
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            last_id = event.id
+            if tournament_pk is None or event.tournament_pk == tournament_pk:
+                yield event.to_sse(match_events.format_event_id(event.id))
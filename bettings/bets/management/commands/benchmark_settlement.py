@@ -0,0 +1,54 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bettings.benchmarks.settlement import MODES, MODE_INLINE, benchmark_settlement
+from bettings.benchmarks.suite import benchmark_database
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database with one match and the given number of bets, settle it and report "
+            "wall time, queries, rows written and peak memory as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bets", type=int, nargs="+", default=[1000],
+                            help="Bet counts to benchmark, e.g. 1000 10000 100000 1000000.")
+        parser.add_argument("--mode", choices=MODES, default=MODE_INLINE,
+                            help="inline settles on save, jobs goes through the settlement queue, "
+                                 "per-bet calls Bet.update_result for every bet.")
+        parser.add_argument("--chunk-size", type=int, default=settings.SETTLEMENT_CHUNK_SIZE,
+                            help="Bets per transaction in jobs mode.")
+        parser.add_argument("--no-trace-memory", action="store_true",
+                            help="Skip tracemalloc, it slows Python allocations down while settling.")
+        parser.add_argument("--profile", choices=("cprofile", "pyinstrument"),
+                            help="Profile the settlement, pyinstrument has to be installed separately.")
+        parser.add_argument("--profile-output", default="settlement.prof",
+                            help="Profile file, one per bet count is written with the count appended.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["profile"] == "pyinstrument":
+            try:
+                import pyinstrument  # noqa F401
+            except ImportError:
+                raise CommandError("pyinstrument is not installed, run pip install pyinstrument")
+        results = []
+        for bets in options["bets"]:
+            if bets < 1:
+                raise CommandError("Bet counts must be positive")
+            profile_output = None
+            if options["profile"]:
+                profile_output = "{}.{}".format(options["profile_output"], bets)
+            with benchmark_database():
+                results.append(benchmark_settlement(bets, options["mode"], options["chunk_size"],
+                                                    trace_memory=not options["no_trace_memory"],
+                                                    profiler=options["profile"], profile_output=profile_output))
+            if profile_output:
+                self.stderr.write("Wrote profile of [{}] bets to [{}]".format(bets, profile_output))
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(output)
+        else:
+            self.stdout.write(output)
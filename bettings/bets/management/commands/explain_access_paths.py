@@ -0,0 +1,58 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils import timezone
+
+from bettings.bets.models import Bet
+from bettings.tournaments.models import Match, Tournament, Team
+
+
+def get_access_paths(user_pk, tournament_pk, team_pk):
+    today = timezone.now()
+    return [
+        ("Bet of a user on a match (BetCreateView)",
+         Bet.objects.filter(user=user_pk, match=1)),
+        ("Bets of a user by kickoff (BetListView)",
+         Bet.objects.filter(user=user_pk).order_by("match__start_time")),
+        ("Settled bets of a user by kickoff (BetResultView)",
+         Bet.objects.filter(user=user_pk, result__isnull=False).order_by("match__start_time")),
+        ("Matches of a tournament in a date range (MatchListView)",
+         Match.objects.filter(tournament=tournament_pk, start_time__gte=today,
+                              start_time__lte=today + datetime.timedelta(days=30)).order_by("start_time")),
+        ("Matches of a team (MatchListView team filter)",
+         Match.objects.filter(Q(home=team_pk) | Q(guest=team_pk)).order_by("start_time")),
+        ("Tournaments in a date range (TournamentListView)",
+         Tournament.objects.filter(start_date__gte=today.date(), end_date__lte=today.date()).order_by("-start_date")),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the bet and match access paths, run before and after migrating to compare."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor == "postgresql":
+            explain = "EXPLAIN ANALYZE " if options["analyze"] else "EXPLAIN "
+        elif connection.vendor == "sqlite":
+            explain = "EXPLAIN QUERY PLAN "
+        else:
+            explain = "EXPLAIN "
+        user_pk = get_user_model().objects.using(connection.alias).values_list("pk", flat=True).first() or 1
+        tournament_pk = Tournament.objects.using(connection.alias).values_list("pk", flat=True).first() or 1
+        team_pk = Team.objects.using(connection.alias).values_list("pk", flat=True).first() or 1
+        for title, queryset in get_access_paths(user_pk, tournament_pk, team_pk):
+            sql, params = queryset.using(connection.alias).query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(explain + sql, params)
+                plan = cursor.fetchall()
+            self.stdout.write(title)
+            for row in plan:
+                self.stdout.write("    " + " | ".join(str(column) for column in row))
+            self.stdout.write("")
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from bettings.bets.export import FORMATS, FORMAT_CSV, get_export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = "Write the bets of a user or of a tournament as CSV or NDJSON without loading them all in memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username whose bets are exported.")
+        parser.add_argument("--tournament", type=int, help="Primary key of the tournament whose bets are exported.")
+        parser.add_argument("--format", choices=FORMATS, default=FORMAT_CSV)
+        parser.add_argument("--output", help="File to write to, defaults to stdout.")
+
+    def handle(self, *args, **options):
+        if options["user"] is None and options["tournament"] is None:
+            raise CommandError("Pass --user, --tournament or both")
+        user = None
+        if options["user"] is not None:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError("User [{}] does not exist".format(options["user"]))
+        rows = get_export_rows(user=user, tournament_pk=options["tournament"])
+        lines = iter_export(rows, options["format"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bettings.bets.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete the idempotency keys older than IDEMPOTENCY_KEY_TTL_HOURS, meant to be run periodically."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.expired().delete()
+        self.stdout.write("Deleted {} idempotency keys older than {} hours".format(
+            deleted, settings.IDEMPOTENCY_KEY_TTL_HOURS))
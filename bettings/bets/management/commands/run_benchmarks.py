@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bettings.benchmarks.suite import benchmark_database, run_suite
+
+
+class Command(BaseCommand):
+    help = ("Seed a throwaway test database and measure latency, queries and throughput of match listing, "
+            "bet placement, bet listing and settlement, printing the results as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--matches", type=int, default=50)
+        parser.add_argument("--bets", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=20, help="Measured calls per benchmark.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["bets"] > options["users"] * options["matches"]:
+            raise CommandError("Need at least one user and no more bets than users times matches")
+        with benchmark_database():
+            results = run_suite(options["users"], options["matches"], options["bets"], options["repeat"])
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(output)
+        else:
+            self.stdout.write(output)
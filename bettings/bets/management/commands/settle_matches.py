@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+
+from bettings.bets.models import Bet
+from bettings.bets.settlement import get_claimable_jobs, partition_matches, run_pending_jobs
+from bettings.utils.db_pool.pool import close_pools
+
+
+def settle_partition(match_ids: list, chunk_size: int) -> int:
+    try:
+        return run_pending_jobs(chunk_size, match_ids=match_ids)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Settle every queued match, spreading the matches over a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                            help="Number of worker processes, each owning a disjoint set of matches.")
+        parser.add_argument("--chunk-size", type=int, default=settings.SETTLEMENT_CHUNK_SIZE,
+                            help="Number of bets settled per transaction.")
+
+    def handle(self, *args, **options):
+        match_ids = set(get_claimable_jobs().values_list("match_id", flat=True))
+        if not match_ids:
+            self.stdout.write("No match is waiting for settlement")
+            return
+        bet_counts = dict.fromkeys(match_ids, 0)
+        bet_counts.update(Bet.objects.filter(match_id__in=match_ids).values_list("match")
+                          .annotate(count=Count("pk")).values_list("match", "count"))
+        processes = options["processes"]
+        if connection.vendor == "sqlite":
+            # SQLite serialises writers, parallel workers would only fail with "database is locked"
+            processes = 1
+        partitions = partition_matches(bet_counts, processes)
+        chunk_size = options["chunk_size"]
+        if len(partitions) == 1:
+            processed = run_pending_jobs(chunk_size, match_ids=partitions[0])
+        else:
+            # children must open their own connections instead of sharing the parent's sockets, a pooled
+            # backend only gives them back to its pool on close_all()
+            connections.close_all()
+            close_pools()
+            with multiprocessing.get_context("fork").Pool(len(partitions)) as pool:
+                processed = sum(pool.starmap(settle_partition, [(ids, chunk_size) for ids in partitions]))
+        self.stdout.write("Processed {} settlement jobs of {} matches with {} workers".format(
+            processed, len(match_ids), len(partitions)))
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bettings.bets.settlement import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Claim queued settlement jobs and settle their bets in checkpointed chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+        parser.add_argument("--chunk-size", type=int, default=settings.SETTLEMENT_CHUNK_SIZE,
+                            help="Number of bets settled per transaction.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+            job = run_job(job, options["chunk_size"])
+            self.stdout.write("Settlement job {} of match {} is {} after settling {} bets".format(
+                job.pk, job.match_id, job.status, job.settled_count))
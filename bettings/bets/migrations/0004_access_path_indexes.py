@@ -0,0 +1,48 @@
+# Generated by Django 2.0.7 on 2026-10-17 20:48
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_bets(apps, schema_editor):
+    """Keep the first bet of a user on a match, the bet views never prevented placing another one.
+
+    Unsettled duplicates are deleted. Settled ones were already paid out, deleting them would silently
+    change balances, so the migration stops and lists them to be merged by hand.
+    """
+    Bet = apps.get_model("bets", "Bet")
+    duplicates = list(Bet.objects.order_by().values("user", "match").annotate(count=Count("pk"), first=Min("pk"))
+                      .filter(count__gt=1))
+    settled = [(row["user"], row["match"]) for row in duplicates
+               if Bet.objects.filter(user=row["user"], match=row["match"], result__isnull=False).exists()]
+    if settled:
+        raise RuntimeError("Users have several settled bets on the same match, merge them before migrating. "
+                           "(user, match): {}".format(", ".join(str(pair) for pair in settled)))
+    for row in duplicates:
+        Bet.objects.filter(user=row["user"], match=row["match"]).exclude(pk=row["first"]).delete()
+    if duplicates and schema_editor.connection.vendor == "postgresql":
+        # run the deferred foreign key checks now, PostgreSQL refuses to alter a table with pending ones
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_access_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bets', '0003_settlementjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_bets, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='bet',
+            unique_together={('user', 'match')},
+        ),
+        # settled bets of a user, for the bet results page; a list of statements needs no sqlparse
+        migrations.RunSQL(
+            ["CREATE INDEX bet_user_settled_idx ON bets_bet (user_id, match_id) WHERE result IS NOT NULL"],
+            ["DROP INDEX bet_user_settled_idx"],
+        ),
+    ]
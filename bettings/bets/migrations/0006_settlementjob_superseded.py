@@ -0,0 +1,18 @@
+# Generated by Django 2.0.7 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0005_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='settlementjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('superseded', 'Superseded')], db_index=True, default='pending', max_length=16),
+        ),
+    ]
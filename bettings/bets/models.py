@@ -1,6 +1,13 @@
+import datetime
 import logging
 from decimal import Decimal
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from bettings.leaderboard.standings import apply_results
+from bettings.tournaments.outcomes import get_payout_factors
+from bettings.users.models import BalanceEntry
 
 logger = logging.getLogger(__name__)
 
@@ -29,40 +36,107 @@ class Bet(TimestampedModel):
     amount = models.DecimalField(max_digits=12, decimal_places=2, choices=get_amount_choices())
     result = models.DecimalField(max_digits=12, decimal_places=2, null=True)
 
+    class Meta:
+        # one bet per user and match, the unique index also serves the (user, match) and user lookups
+        unique_together = ("user", "match")
+
     def update_result(self):
         if not self.match.has_result():
             return
-        ratio = self.match.get_profitability_ratio()
-        profit = self.__calculate_result(ratio)
+        profit = self.__calculate_result(self.match.get_outcome())
         logger.info("Result of bet [{}] is [{}]".format(self.pk, profit))
+        # a bet settled before only moves the balance by the change of its result
+        delta = profit - (self.result or 0)
+        previous = self.result
         self.result = profit
-        self.user.balance += profit
-        self.save()
-        self.user.save()
-
-    def __calculate_result(self, ratio: Decimal) -> Decimal:
-        if ratio >= 0.5:
-            if self.choice == self.match.home:
-                return self.amount
-            else:
-                return 0 - self.amount
-        elif ratio == 0.25:
-            if self.choice == self.match.home:
-                return Decimal(0.5) * self.amount
-            else:
-                return 0 - Decimal(0.5) * self.amount
-        elif ratio == 0:
-            return Decimal(0)
-        elif ratio == -0.25:
-            if self.choice == self.match.home:
-                return 0 - Decimal(0.5) * self.amount
-            else:
-                return 0.5 * self.amount
-        else:
-            if self.choice == self.match.home:
-                return 0 - self.amount
-            else:
-                return self.amount
+        self.save(update_fields=["result", "modified_at"])
+        if delta:
+            BalanceEntry.objects.create(user_id=self.user_id, bet=self, amount=delta)
+        apply_results(self.match.tournament_id, [(self.user_id, previous, profit)])
+
+    def __calculate_result(self, outcome: str) -> Decimal:
+        home_factor, guest_factor = get_payout_factors(outcome)
+        if self.choice_id == self.match.home_id:
+            return home_factor * self.amount
+        return guest_factor * self.amount
 
     def __str__(self):
         return "{} bet on match {}".format(self.user.username, self.match)
+
+
+def get_idempotency_expired_at() -> datetime.datetime:
+    return timezone.now() - datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(created_at__lt=get_idempotency_expired_at())
+
+
+class IdempotencyKey(models.Model):
+    """Response of a bet API request, replayed when a client retries the request with the same key."""
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return "Idempotency key {} of user {}".format(self.key, self.user_id)
+
+    def is_expired(self) -> bool:
+        return self.created_at < get_idempotency_expired_at()
+
+    def is_pending(self) -> bool:
+        # the row is inserted before the request runs and filled in by the same transaction
+        return not self.status_code
+
+
+class SettlementJobQuerySet(models.QuerySet):
+    def enqueue(self, match):
+        """Queue a job settling the match from its first bet, older unfinished jobs of the match are superseded."""
+        with transaction.atomic():
+            superseded = self.filter(match=match, status__in=[SettlementJob.STATUS_PENDING,
+                                                              SettlementJob.STATUS_RUNNING])
+            superseded.update(status=SettlementJob.STATUS_SUPERSEDED)
+            job = self.create(match=match)
+        logger.info("Queued settlement job [{}] for match [{}]".format(job.pk, match.pk))
+        return job
+
+    def claimable(self, lease_expired_at):
+        return self.filter(models.Q(status=SettlementJob.STATUS_PENDING) |
+                           models.Q(status=SettlementJob.STATUS_RUNNING, locked_at__lt=lease_expired_at))
+
+
+class SettlementJob(TimestampedModel):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_SUPERSEDED = "superseded"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_SUPERSEDED, "Superseded"),
+    )
+
+    match = models.ForeignKey("tournaments.Match", on_delete=models.CASCADE, related_name="settlement_jobs")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_bet_id = models.PositiveIntegerField(default=0)
+    settled_count = models.PositiveIntegerField(default=0)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    objects = SettlementJobQuerySet.as_manager()
+
+    def __str__(self):
+        return "Settlement job {} of match {} ({})".format(self.pk, self.match_id, self.status)
@@ -0,0 +1,35 @@
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+
+from .models import Bet, get_amount_choices
+
+
+class BetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Bet
+        fields = ("id", "match", "choice", "amount", "result", "created_at", "modified_at")
+        read_only_fields = fields
+
+
+class BetCreateSerializer(serializers.Serializer):
+    # plain ids, the match is validated with a single values() query instead of related field lookups
+    match = serializers.IntegerField()
+    choice = serializers.IntegerField()
+    amount = serializers.ChoiceField(choices=get_amount_choices())
+
+
+class BetUpdateSerializer(serializers.Serializer):
+    choice = serializers.IntegerField()
+    amount = serializers.ChoiceField(choices=get_amount_choices())
+
+
+BET_SLIP_MAX_SIZE = 50
+
+
+class BetSlipSerializer(serializers.Serializer):
+    bets = BetCreateSerializer(many=True, allow_empty=False)
+
+    def validate_bets(self, bets):
+        if len(bets) > BET_SLIP_MAX_SIZE:
+            raise serializers.ValidationError(_("A slip holds at most {} bets.").format(BET_SLIP_MAX_SIZE))
+        return bets
@@ -0,0 +1,172 @@
+import datetime
+import heapq
+import logging
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, F, Q, Value, DecimalField
+from django.utils import timezone
+
+from bettings.leaderboard.standings import apply_results
+from bettings.tournaments.outcomes import get_payout_factors
+from bettings.users.ledger import record_entries
+from bettings.users.models import BalanceEntry
+from .models import Bet, SettlementJob
+
+logger = logging.getLogger(__name__)
+
+
+def get_profit_expression(home_id: int, home_factor: Decimal, guest_factor: Decimal) -> Case:
+    output_field = DecimalField(max_digits=12, decimal_places=2)
+    return Case(When(choice_id=home_id, then=F("amount") * Value(home_factor, output_field=output_field)),
+                default=F("amount") * Value(guest_factor, output_field=output_field),
+                output_field=output_field)
+
+
+def get_unsettled_filter(home_id: int, home_factor: Decimal, guest_factor: Decimal) -> Q:
+    """Match the bets that have no result yet or whose stored result differs from the new profit."""
+    return (Q(result__isnull=True) |
+            Q(choice_id=home_id) & ~Q(result=F("amount") * Value(home_factor)) |
+            ~Q(choice_id=home_id) & ~Q(result=F("amount") * Value(guest_factor)))
+
+
+def settle_match(match, bets=None) -> int:
+    """Bring the bets of a match in line with its result and odds, return the number of bets written.
+
+    Each changed bet appends the difference between its new and previously stored result to the
+    balance ledger and the leaderboard standings, so settling again after a result or odds correction
+    only touches the bets whose outcome changed, settling twice is a no-op and user rows are never updated.
+    The changed bets are read under a row lock, so concurrent settlements of a match never credit a bet twice.
+    ``bets`` narrows settlement to a subset of the match's bets, e.g. one chunk of a settlement job.
+    """
+    outcome = match.get_outcome()
+    home_factor, guest_factor = get_payout_factors(outcome)
+    profit = get_profit_expression(match.home_id, home_factor, guest_factor)
+    if bets is None:
+        bets = Bet.objects.filter(match=match)
+    bets = bets.filter(get_unsettled_filter(match.home_id, home_factor, guest_factor))
+    with transaction.atomic():
+        # lock the changed bets, an overlapping settlement waits here and then finds them settled
+        changes = list(bets.select_for_update().annotate(new_result=profit)
+                       .values_list("pk", "user_id", "result", "new_result"))
+        entries = [BalanceEntry(user_id=user_id, bet_id=bet_id, amount=new_result - (result or 0))
+                   for bet_id, user_id, result, new_result in changes if new_result != (result or 0)]
+        record_entries(entries)
+        apply_results(match.tournament_id, [(user_id, result, new_result)
+                                            for _, user_id, result, new_result in changes])
+        settled = bets.update(result=profit)
+    logger.info("Settled [{}] bets of match [{}] with outcome [{}]".format(settled, match.pk, outcome))
+    return settled
+
+
+def request_settlement(match):
+    """Settle a match in the background when asynchronous settlement is enabled, inline otherwise."""
+    if settings.SETTLEMENT_ASYNC:
+        return SettlementJob.objects.enqueue(match)
+    settle_match(match)
+    return None
+
+
+def get_claimable_jobs():
+    lease_expired_at = timezone.now() - datetime.timedelta(seconds=settings.SETTLEMENT_LEASE_SECONDS)
+    return SettlementJob.objects.claimable(lease_expired_at)
+
+
+def claim_job(match_ids=None):
+    """Lock the oldest claimable job for this worker, or return None when the queue is empty.
+
+    ``match_ids`` restricts the claim to the matches owned by this worker.
+    """
+    with transaction.atomic():
+        jobs = get_claimable_jobs().select_for_update(skip_locked=True)
+        if match_ids is not None:
+            jobs = jobs.filter(match_id__in=match_ids)
+        job = jobs.order_by("pk").first()
+        if job is None:
+            return None
+        job.status = SettlementJob.STATUS_RUNNING
+        job.locked_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_at", "attempts", "modified_at"])
+    logger.info("Claimed settlement job [{}] of match [{}], attempt [{}]".format(job.pk, job.match_id, job.attempts))
+    return job
+
+
+def _settle_next_chunk(job, chunk_size: int) -> bool:
+    """Settle the bets after the job checkpoint and advance it atomically, return False when nothing is left.
+
+    The job and the match result are read again for every chunk: a correction of the result supersedes
+    the job, and the chunk already running settles with the corrected outcome.
+    """
+    bets = Bet.objects.filter(match_id=job.match_id, pk__gt=job.last_bet_id)
+    bet_ids = bets.order_by("pk").values_list("pk", flat=True)
+    upper_bounds = list(bet_ids[chunk_size - 1:chunk_size])
+    if upper_bounds:
+        last_bet_id = upper_bounds[0]
+    else:
+        last_bet_id = bet_ids.reverse().first()
+        if last_bet_id is None:
+            return False
+    chunk = bets.filter(pk__lte=last_bet_id)
+    with transaction.atomic():
+        current = SettlementJob.objects.select_for_update(of=("self",)).select_related("match__result").get(pk=job.pk)
+        job.status = current.status
+        if job.status != SettlementJob.STATUS_RUNNING:
+            return False
+        settled = settle_match(current.match, bets=chunk)
+        job.last_bet_id = last_bet_id
+        job.settled_count += settled
+        job.locked_at = timezone.now()
+        job.save(update_fields=["last_bet_id", "settled_count", "locked_at", "modified_at"])
+    return bool(upper_bounds)
+
+
+def _finish_job(job, status: str, error: str = ""):
+    """Record the end of a run unless the job was superseded meanwhile."""
+    finished = SettlementJob.objects.filter(pk=job.pk, status=SettlementJob.STATUS_RUNNING).update(
+        status=status, error=error, modified_at=timezone.now())
+    job.status = status if finished else SettlementJob.STATUS_SUPERSEDED
+    job.error = error
+
+
+def run_job(job, chunk_size: int = None) -> SettlementJob:
+    """Settle a claimed job chunk by chunk; a failed job goes back to the queue until it runs out of attempts."""
+    chunk_size = chunk_size or settings.SETTLEMENT_CHUNK_SIZE
+    try:
+        while _settle_next_chunk(job, chunk_size):
+            pass
+        if job.status == SettlementJob.STATUS_SUPERSEDED:
+            logger.info("Settlement job [{}] of match [{}] was superseded".format(job.pk, job.match_id))
+            return job
+    except Exception as e:
+        logger.exception("Settlement job [{}] of match [{}] failed".format(job.pk, job.match_id))
+        if job.attempts >= settings.SETTLEMENT_MAX_ATTEMPTS:
+            _finish_job(job, SettlementJob.STATUS_FAILED, str(e))
+        else:
+            _finish_job(job, SettlementJob.STATUS_PENDING, str(e))
+        return job
+    _finish_job(job, SettlementJob.STATUS_DONE)
+    logger.info("Settlement job [{}] of match [{}] settled [{}] bets".format(job.pk, job.match_id, job.settled_count))
+    return job
+
+
+def run_pending_jobs(chunk_size: int = None, match_ids=None) -> int:
+    """Drain the settlement queue in this process and return the number of jobs processed."""
+    processed = 0
+    job = claim_job(match_ids)
+    while job is not None:
+        run_job(job, chunk_size)
+        processed += 1
+        job = claim_job(match_ids)
+    return processed
+
+
+def partition_matches(bet_counts: dict, workers: int) -> list:
+    """Split matches into at most ``workers`` disjoint groups with roughly the same number of bets each."""
+    groups = [(0, i, []) for i in range(min(workers, len(bet_counts)))]
+    heapq.heapify(groups)
+    for match_id, count in sorted(bet_counts.items(), key=lambda item: (-item[1], item[0])):
+        load, i, match_ids = heapq.heappop(groups)
+        match_ids.append(match_id)
+        heapq.heappush(groups, (load + count, i, match_ids))
+    return [sorted(match_ids) for _, _, match_ids in sorted(groups, key=lambda group: group[1])]
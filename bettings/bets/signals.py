@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bettings.tournaments.models import Match, MatchResult
+from .live import EVENT_ODDS_CHANGED, EVENT_RESULT_POSTED, match_events, publish_match_event, schedule_match_closing
+from .window import invalidate_bet_window
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def invalidate_match_window(sender, instance, **kwargs):
+    invalidate_bet_window(instance.pk)
+
+
+@receiver(post_save, sender=MatchResult)
+@receiver(post_delete, sender=MatchResult)
+def invalidate_match_result_window(sender, instance, **kwargs):
+    invalidate_bet_window(instance.match_id)
+
+
+@receiver(post_save, sender=Match)
+def publish_match_change(sender, instance, created, **kwargs):
+    # post_save runs before Match.save() records the new odds as loaded
+    if not created and instance.get_loaded_odds() != instance.odds:
+        publish_match_event(instance.pk, EVENT_ODDS_CHANGED)
+    else:
+        schedule_match_closing(instance)
+
+
+@receiver(post_delete, sender=Match)
+def cancel_match_closing(sender, instance, **kwargs):
+    match_events.cancel_closing(instance.pk)
+
+
+@receiver(post_save, sender=MatchResult)
+def publish_match_result(sender, instance, **kwargs):
+    publish_match_event(instance.match_id, EVENT_RESULT_POSTED)
@@ -0,0 +1,15 @@
+from factory import DjangoModelFactory, SelfAttribute, SubFactory
+
+from bettings.bets.models import Bet
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.users.tests.factories import UserFactory
+
+
+class BetFactory(DjangoModelFactory):
+    user = SubFactory(UserFactory)
+    match = SubFactory(MatchFactory)
+    choice = SelfAttribute("match.home")
+    amount = 10000
+
+    class Meta:
+        model = Bet
@@ -0,0 +1,219 @@
+import datetime
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bettings.bets.api_views import BetCreateAPIView
+from bettings.bets.models import Bet, IdempotencyKey
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client(user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def test_create_bet(api_client, user, query_budget):
+    match = MatchFactory()
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": match.pk, "choice": match.guest_id, "amount": 20000}, format="json")
+
+    assert response.status_code == 201
+    bet = Bet.objects.get(user=user, match=match)
+    assert response.data["id"] == bet.pk
+    assert bet.choice_id == match.guest_id
+
+
+def test_create_bet_rejects_team_outside_match(api_client):
+    match = MatchFactory()
+    other_match = MatchFactory()
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": match.pk, "choice": other_match.home_id, "amount": 20000}, format="json")
+
+    assert response.status_code == 400
+    assert response.data == {"errorCode": 4, "errorMessage": "Chosen team does not play this match"}
+
+
+def test_create_bet_after_cutoff(api_client):
+    match = MatchFactory(start_time=timezone.now() + datetime.timedelta(minutes=10))
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": match.pk, "choice": match.home_id, "amount": 20000}, format="json")
+
+    assert response.status_code == 400
+    assert response.data["errorCode"] == 1
+
+
+def test_create_duplicate_bet_conflicts(api_client, user):
+    bet = BetFactory(user=user)
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": bet.match_id, "choice": bet.match.home_id, "amount": 20000}, format="json")
+
+    assert response.status_code == 409
+    assert response.data["errorCode"] == 5
+
+
+def test_idempotency_key_replays_response(api_client, user):
+    match = MatchFactory()
+    data = {"match": match.pk, "choice": match.home_id, "amount": 20000}
+    first = api_client.post(reverse("bets_api:create"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+    retry = api_client.post(reverse("bets_api:create"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == first.data
+    assert retry["Idempotent-Replayed"] == "true"
+    assert Bet.objects.filter(user=user).count() == 1
+    assert IdempotencyKey.objects.filter(user=user).count() == 1
+
+
+def test_idempotency_key_reused_for_other_request(api_client):
+    match = MatchFactory()
+    api_client.post(reverse("bets_api:create"), {"match": match.pk, "choice": match.home_id, "amount": 20000},
+                    format="json", HTTP_IDEMPOTENCY_KEY="abc")
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": match.pk, "choice": match.guest_id, "amount": 20000},
+                               format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert response.status_code == 409
+    assert response.data["errorCode"] == 6
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(connection.vendor == "sqlite", reason="needs concurrent writers")
+def test_concurrent_retries_place_one_bet(user):
+    match = MatchFactory()
+    data = {"match": match.pk, "choice": match.home_id, "amount": 20000}
+    create_bet = BetCreateAPIView.create_bet
+    responses = []
+
+    def slow_create_bet(view, request):
+        response = create_bet(view, request)
+        # hold the idempotency key while the retry arrives
+        time.sleep(0.2)
+        return response
+
+    def post():
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            responses.append(client.post(reverse("bets_api:create"), data, format="json",
+                                         HTTP_IDEMPOTENCY_KEY="abc"))
+        finally:
+            connection.close()
+
+    with mock.patch.object(BetCreateAPIView, "create_bet", slow_create_bet):
+        requests = [threading.Thread(target=post) for _ in range(2)]
+        for request in requests:
+            request.start()
+            time.sleep(0.05)
+        for request in requests:
+            request.join()
+
+    assert sorted(response.status_code for response in responses) == [201, 201]
+    assert sorted(response.get("Idempotent-Replayed", "") for response in responses) == ["", "true"]
+    assert Bet.objects.filter(user=user).count() == 1
+
+
+def test_expired_idempotency_key_runs_the_request_again(api_client, user):
+    match = MatchFactory()
+    data = {"match": match.pk, "choice": match.home_id, "amount": 20000}
+    api_client.post(reverse("bets_api:create"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+    Bet.objects.filter(user=user).delete()
+    IdempotencyKey.objects.update(created_at=timezone.now() - datetime.timedelta(hours=25))
+
+    response = api_client.post(reverse("bets_api:create"), data, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response
+    assert Bet.objects.filter(user=user).count() == 1
+
+
+def test_purge_idempotency_keys(api_client):
+    match, other = MatchFactory.create_batch(2)
+    for key, bet_match in (("old", match), ("new", other)):
+        api_client.post(reverse("bets_api:create"), {"match": bet_match.pk, "choice": bet_match.home_id,
+                                                     "amount": 20000}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+    IdempotencyKey.objects.filter(key="old").update(created_at=timezone.now() - datetime.timedelta(hours=25))
+    out = StringIO()
+
+    call_command("purge_idempotency_keys", stdout=out)
+
+    assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["new"]
+    assert "Deleted 1 idempotency keys older than 24 hours" in out.getvalue()
+
+
+def test_too_long_idempotency_key_is_rejected(api_client, user):
+    match = MatchFactory()
+    response = api_client.post(reverse("bets_api:create"),
+                               {"match": match.pk, "choice": match.home_id, "amount": 20000},
+                               format="json", HTTP_IDEMPOTENCY_KEY="k" * 65)
+
+    assert response.status_code == 400
+    assert response.data["errorCode"] == 7
+    assert not Bet.objects.filter(user=user).exists()
+
+
+def test_update_and_delete_bet(api_client, user, query_budget):
+    bet = BetFactory(user=user)
+    url = reverse("bets_api:detail", kwargs={"bet_pk": bet.pk})
+
+    response = api_client.patch(url, {"choice": bet.match.guest_id}, format="json")
+    assert response.status_code == 200
+    bet.refresh_from_db()
+    assert bet.choice_id == bet.match.guest_id
+
+    response = api_client.delete(url)
+    assert response.status_code == 204
+    assert not Bet.objects.filter(pk=bet.pk).exists()
+
+
+def test_other_users_bet_is_not_found(api_client):
+    bet = BetFactory()
+    response = api_client.delete(reverse("bets_api:detail", kwargs={"bet_pk": bet.pk}))
+
+    assert response.status_code == 404
+    assert response.data["errorCode"] == 3
+
+
+def test_api_requires_authentication():
+    response = APIClient().post(reverse("bets_api:create"), {}, format="json")
+
+    assert response.status_code in (401, 403)
+
+
+def test_slip_places_valid_entries_in_one_batch(api_client, user, query_budget):
+    open_matches = MatchFactory.create_batch(3)
+    closed_match = MatchFactory(start_time=timezone.now() + datetime.timedelta(minutes=10))
+    taken_bet = BetFactory(user=user)
+    entries = [{"match": match.pk, "choice": match.home_id, "amount": 20000} for match in open_matches]
+    entries += [
+        {"match": closed_match.pk, "choice": closed_match.home_id, "amount": 20000},
+        {"match": taken_bet.match_id, "choice": taken_bet.match.guest_id, "amount": 20000},
+        {"match": open_matches[0].pk, "choice": open_matches[0].guest_id, "amount": 20000},
+    ]
+
+    response = api_client.post(reverse("bets_api:slip"), {"bets": entries}, format="json")
+
+    assert response.status_code == 201
+    assert response.data["created"] == 3
+    assert [result["status"] for result in response.data["results"]] == [201, 201, 201, 400, 409, 409]
+    assert response.data["results"][0]["bet"]["match"] == open_matches[0].pk
+    assert Bet.objects.filter(user=user).count() == 4
+
+
+def test_slip_rejects_empty_slip(api_client):
+    response = api_client.post(reverse("bets_api:slip"), {"bets": []}, format="json")
+
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def export(client, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse("bets:export"), params)
+        content = b"".join(response.streaming_content).decode("utf-8")
+    assert response.status_code == 200
+    return content, len(context.captured_queries)
+
+
+def test_csv_export_query_count_does_not_grow_with_rows(client, user):
+    client.force_login(user)
+    BetFactory.create_batch(2, user=user)
+    few_content, few_rows = export(client)
+
+    for bet in BetFactory.create_batch(10, user=user):
+        MatchResult.objects.create(match=bet.match, home_goals=1, guest_goals=0)
+    many_content, many_rows = export(client)
+
+    assert many_rows == few_rows
+    rows = list(csv.DictReader(io.StringIO(many_content)))
+    assert len(rows) == 12
+    assert rows[0]["user"] == user.username
+
+
+def test_ndjson_export_filters_by_tournament(client, user):
+    client.force_login(user)
+    bet = BetFactory(user=user)
+    BetFactory(user=user)
+    BetFactory(match=bet.match)
+
+    content, _ = export(client, format="ndjson", tournament=bet.match.tournament_id)
+
+    rows = [json.loads(line) for line in content.splitlines()]
+    assert [row["bet_id"] for row in rows] == [bet.pk]
+    assert rows[0]["home"] == bet.match.home.name
+
+
+def test_export_rejects_unknown_format(client, user):
+    client.force_login(user)
+
+    assert client.get(reverse("bets:export"), {"format": "xml"}).status_code == 400
+
+
+def test_export_bets_command_writes_tournament_bets():
+    match = MatchFactory()
+    BetFactory.create_batch(3, match=match)
+    BetFactory()
+    stdout = io.StringIO()
+
+    call_command("export_bets", tournament=match.tournament_id, format="ndjson", stdout=stdout)
+
+    assert len(stdout.getvalue().splitlines()) == 3
@@ -0,0 +1,173 @@
+import collections
+import datetime
+import json
+import threading
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from bettings.bets.live import (EVENT_ODDS_CHANGED, EVENT_RESULT_POSTED, EVENT_BETTING_CLOSED, EVENT_RESET,
+                                MatchEventHub, match_events, load_match_event)
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def live_events(settings):
+    settings.LIVE_EVENTS_ENABLED = True
+
+
+def parse_events(content: str) -> list:
+    events = []
+    for block in content.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_wait_returns_events_after_last_id():
+    hub = MatchEventHub()
+    first = hub.publish(EVENT_ODDS_CHANGED, 1, 1)
+    second = hub.publish(EVENT_RESULT_POSTED, 2, 1)
+
+    assert hub.wait(0, 0) == [first, second]
+    assert hub.wait(first.id, 0) == [second]
+    assert hub.wait(second.id, 0) == []
+
+
+def test_waiting_streams_are_woken_by_one_publish():
+    hub = MatchEventHub()
+    received = []
+    streams = [threading.Thread(target=lambda: received.append(hub.wait(0, 5))) for _ in range(3)]
+    for stream in streams:
+        stream.start()
+
+    event = hub.publish(EVENT_RESULT_POSTED, 1, 1)
+    for stream in streams:
+        stream.join()
+
+    assert received == [[event]] * 3
+
+
+def test_wait_resets_streams_behind_the_buffer():
+    hub = MatchEventHub(buffer_size=2)
+    for match_pk in range(3):
+        hub.publish(EVENT_ODDS_CHANGED, match_pk, 1)
+
+    assert hub.wait(0, 0) is None
+    assert len(hub.wait(1, 0)) == 2
+
+
+def test_event_ids_of_other_processes_are_not_resumed():
+    hub, other = MatchEventHub(), MatchEventHub()
+    event = hub.publish(EVENT_ODDS_CHANGED, 1, 1)
+
+    assert hub.parse_event_id(hub.format_event_id(event.id)) == event.id
+    assert hub.parse_event_id(other.format_event_id(event.id)) is None
+    assert hub.parse_event_id(hub.format_event_id(event.id + 1)) is None
+    assert hub.parse_event_id("1") is None
+
+
+def test_betting_closes_on_schedule():
+    hub = MatchEventHub()
+    hub.schedule_closing(1, 1, timezone.now() + datetime.timedelta(milliseconds=50))
+    hub.schedule_closing(2, 1, timezone.now() + datetime.timedelta(milliseconds=50))
+    hub.cancel_closing(2)
+
+    events = hub.wait(0, 5)
+
+    assert [(event.kind, event.match_pk) for event in events] == [(EVENT_BETTING_CLOSED, 1)]
+    assert hub.wait(events[-1].id, 0.1) == []
+
+
+def test_match_event_is_read_once(django_assert_num_queries):
+    match = MatchFactory()
+    MatchResult.objects.create(match=match, home_goals=2, guest_goals=1)
+
+    with django_assert_num_queries(1):
+        event = load_match_event(match.pk, EVENT_RESULT_POSTED)
+
+    assert event.tournament_pk == match.tournament_id
+    assert event.data["home_goals"] == 2 and event.data["guest_goals"] == 1
+    assert event.data["outcome"] == match.result.outcome
+
+
+@pytest.mark.django_db(transaction=True)
+def test_saves_publish_on_commit():
+    match = MatchFactory()
+    last_id = match_events.last_id
+
+    match.odds = match.odds + 1
+    match.save()
+    MatchResult.objects.create(match=match, home_goals=0, guest_goals=0)
+
+    events = match_events.wait(last_id, 0)
+    assert [(event.kind, event.match_pk) for event in events] == [(EVENT_ODDS_CHANGED, match.pk),
+                                                                  (EVENT_RESULT_POSTED, match.pk)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_saves_publish_nothing_when_disabled(settings):
+    settings.LIVE_EVENTS_ENABLED = False
+    match = MatchFactory()
+    last_id = match_events.last_id
+
+    match.odds = match.odds + 1
+    match.save()
+
+    assert match_events.wait(last_id, 0) == []
+
+
+def test_stream_sends_events_of_the_tournament(client, settings):
+    settings.LIVE_EVENTS_STREAM_SECONDS = 0.2
+    settings.LIVE_EVENTS_KEEPALIVE_SECONDS = 0.05
+    match, other = MatchFactory.create_batch(2)
+    last_id = match_events.last_id
+    load_match_event(match.pk, EVENT_ODDS_CHANGED)
+    load_match_event(other.pk, EVENT_ODDS_CHANGED)
+
+    response = client.get(reverse("bets:live"), {"tournament": match.tournament_id},
+                          HTTP_LAST_EVENT_ID=match_events.format_event_id(last_id))
+    content = b"".join(response.streaming_content).decode("utf-8")
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert [(kind, data["match"]) for kind, data in parse_events(content)] == [(EVENT_ODDS_CHANGED, match.pk)]
+    assert ": keepalive" in content
+
+
+def test_stream_of_another_process_continues_from_the_current_event(client, settings):
+    settings.LIVE_EVENTS_STREAM_SECONDS = 0.1
+    load_match_event(MatchFactory().pk, EVENT_ODDS_CHANGED)
+
+    response = client.get(reverse("bets:live"), HTTP_LAST_EVENT_ID=MatchEventHub().format_event_id(0))
+    content = b"".join(response.streaming_content).decode("utf-8")
+
+    assert parse_events(content) == []
+    assert "id: {}\n".format(match_events.format_event_id(match_events.last_id)) in content
+
+
+def test_stream_resets_when_events_left_the_buffer(client, settings, monkeypatch):
+    settings.LIVE_EVENTS_STREAM_SECONDS = 0.1
+    monkeypatch.setattr(match_events, "_events", collections.deque(maxlen=1))
+    match = MatchFactory()
+    last_id = match_events.last_id
+    load_match_event(match.pk, EVENT_ODDS_CHANGED)
+    load_match_event(match.pk, EVENT_ODDS_CHANGED)
+
+    response = client.get(reverse("bets:live"), HTTP_LAST_EVENT_ID=match_events.format_event_id(last_id))
+    content = b"".join(response.streaming_content).decode("utf-8")
+
+    assert parse_events(content)[0] == (EVENT_RESET, {})
+
+
+def test_stream_and_pages_are_disabled_by_default(client, settings):
+    settings.LIVE_EVENTS_ENABLED = False
+    match = MatchFactory()
+
+    assert client.get(reverse("bets:live")).status_code == 404
+    response = client.get(reverse("tournaments:match_list", kwargs={"tournament_pk": match.tournament_id}))
+    assert b"data-live-url" not in response.content
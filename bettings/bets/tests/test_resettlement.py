@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+
+from bettings.bets.settlement import run_pending_jobs, settle_match
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.models import Match, MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def settled_match():
+    match = MatchFactory(odds=Decimal("0"))
+    home_bet = BetFactory(match=match, choice=match.home, amount=10000)
+    guest_bet = BetFactory(match=match, choice=match.guest, amount=20000)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=1)
+    run_pending_jobs()
+    return Match.objects.select_related("result").get(pk=match.pk), home_bet, guest_bet
+
+
+def assert_settled(bet, result):
+    bet.refresh_from_db()
+    bet.user.refresh_from_db()
+    assert bet.result == result
+    assert bet.user.get_balance() == result
+
+
+def test_settling_again_writes_nothing(settled_match):
+    match, home_bet, guest_bet = settled_match
+
+    assert settle_match(match) == 0
+    assert_settled(home_bet, Decimal(0))
+    assert_settled(guest_bet, Decimal(0))
+
+
+def test_odds_change_replaces_previous_profit(settled_match):
+    match, home_bet, guest_bet = settled_match
+
+    match.odds = Decimal("-0.25")
+    match.save()
+    run_pending_jobs()
+
+    assert_settled(home_bet, Decimal(5000))
+    assert_settled(guest_bet, Decimal(-10000))
+
+
+def test_odds_change_without_outcome_change_writes_nothing(settled_match):
+    match, home_bet, guest_bet = settled_match
+    match.result.home_goals = 3
+    match.result.save()
+    run_pending_jobs()
+    match.odds = Decimal("0.5")
+
+    match.save()
+    match.refresh_from_db()
+    assert settle_match(match) == 0
+    assert_settled(home_bet, Decimal(10000))
+    assert_settled(guest_bet, Decimal(-20000))
+
+
+def test_match_save_does_not_refetch_loaded_match(settled_match, django_assert_num_queries):
+    match, _, _ = settled_match
+    match.start_time = match.start_time
+
+    with django_assert_num_queries(1):
+        match.save()
@@ -0,0 +1,150 @@
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+
+from bettings.bets.models import Bet
+from bettings.bets.settlement import settle_match, run_pending_jobs
+from bettings.bets.tests.factories import BetFactory
+from bettings.leaderboard.models import Standing
+from bettings.tournaments import outcomes
+from bettings.tournaments.models import Match, MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.users.models import BalanceEntry
+from bettings.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("odds, home_goals, guest_goals", [
+    (Decimal("0"), 2, 0),
+    (Decimal("0.75"), 1, 0),
+    (Decimal("0.5"), 1, 0),
+    (Decimal("0.25"), 1, 0),
+    (Decimal("0"), 1, 1),
+    (Decimal("-0.25"), 1, 1),
+    (Decimal("0.25"), 0, 0),
+    (Decimal("-1.5"), 0, 1),
+])
+def test_settlement_matches_bet_calculate_result(odds, home_goals, guest_goals):
+    match = MatchFactory(odds=odds)
+    home_bet = BetFactory(match=match, choice=match.home, amount=20000)
+    guest_bet = BetFactory(match=match, choice=match.guest, amount=30000)
+
+    MatchResult.objects.create(match=match, home_goals=home_goals, guest_goals=guest_goals)
+    run_pending_jobs()
+
+    outcome = match.result.outcome
+    for bet in (home_bet, guest_bet):
+        expected = bet._Bet__calculate_result(outcome)
+        bet.refresh_from_db()
+        bet.user.refresh_from_db()
+        assert bet.result == expected
+        assert bet.user.get_balance() == expected
+
+
+def test_settlement_aggregates_balance_per_user():
+    lost_match, won_match = MatchFactory.create_batch(2)
+    user = UserFactory()
+    BetFactory(match=lost_match, user=user, choice=lost_match.home, amount=10000)
+    BetFactory(match=won_match, user=user, choice=won_match.guest, amount=40000)
+
+    MatchResult.objects.create(match=lost_match, home_goals=0, guest_goals=1)
+    MatchResult.objects.create(match=won_match, home_goals=0, guest_goals=1)
+    run_pending_jobs()
+
+    user.refresh_from_db()
+    assert user.get_balance() == Decimal(30000)
+    assert user.balance_entries.count() == 2
+    # the user row itself is only written by compaction
+    assert user.balance == Decimal(0)
+
+
+def test_settlement_query_count_is_independent_of_bet_count(django_assert_num_queries):
+    small_match = MatchFactory()
+    big_match = MatchFactory()
+    BetFactory.create_batch(2, match=small_match)
+    BetFactory.create_batch(20, match=big_match)
+    MatchResult.objects.bulk_create([
+        MatchResult(match=small_match, home_goals=1, guest_goals=0).classify(),
+        MatchResult(match=big_match, home_goals=1, guest_goals=0).classify(),
+    ])
+    small_match = Match.objects.select_related("result").get(pk=small_match.pk)
+    big_match = Match.objects.select_related("result").get(pk=big_match.pk)
+
+    # savepoint, locked changed bets, ledger insert, existing standings, savepoint, standings insert, release,
+    # standings update, bet update, savepoint release
+    with django_assert_num_queries(10):
+        assert settle_match(small_match) == 2
+    with django_assert_num_queries(10):
+        assert settle_match(big_match) == 20
+    assert not Bet.objects.filter(result__isnull=True).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(not connection.features.has_select_for_update, reason="needs row locks")
+def test_overlapping_settlements_credit_each_bet_once():
+    user = UserFactory()
+    match = MatchFactory()
+    BetFactory.create_batch(3, user=user, match=match, choice=match.home, amount=10000)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+    match = Match.objects.select_related("result").get(pk=match.pk)
+    first_settled = threading.Event()
+    settled = {}
+
+    def settle(name, hold_seconds=0):
+        try:
+            with transaction.atomic():
+                settled[name] = settle_match(match)
+                first_settled.set()
+                # keep the bet rows locked while the second settlement starts
+                time.sleep(hold_seconds)
+        finally:
+            connection.close()
+
+    first = threading.Thread(target=settle, args=("first", 0.2))
+    first.start()
+    assert first_settled.wait(5)
+    second = threading.Thread(target=settle, args=("second",))
+    second.start()
+    first.join()
+    second.join()
+
+    assert settled == {"first": 3, "second": 0}
+    assert BalanceEntry.objects.filter(user=user).count() == 3
+    assert Standing.objects.get(tournament=match.tournament, user=user).profit == Decimal(30000)
+
+
+@pytest.mark.parametrize("odds, home_goals, guest_goals, outcome", [
+    (Decimal("0"), 2, 0, outcomes.HOME_WIN),
+    (Decimal("0.5"), 1, 0, outcomes.HOME_WIN),
+    (Decimal("0.75"), 1, 0, outcomes.HOME_HALF_WIN),
+    (Decimal("0"), 1, 1, outcomes.PUSH),
+    (Decimal("0.25"), 0, 0, outcomes.HOME_HALF_LOSS),
+    (Decimal("-1.5"), 0, 1, outcomes.HOME_WIN),
+    (Decimal("-0.25"), 0, 1, outcomes.AWAY_WIN),
+])
+def test_result_stores_outcome(odds, home_goals, guest_goals, outcome):
+    match = MatchFactory(odds=odds)
+    result = MatchResult.objects.create(match=match, home_goals=home_goals, guest_goals=guest_goals)
+
+    result.refresh_from_db()
+    assert result.ratio == home_goals - guest_goals - odds
+    assert result.outcome == outcome
+
+
+def test_odds_change_reclassifies_result():
+    match = MatchFactory(odds=Decimal("0"))
+    bet = BetFactory(match=match, choice=match.home, amount=20000)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=1)
+
+    match.odds = Decimal("-0.25")
+    match.save()
+    run_pending_jobs()
+
+    bet.refresh_from_db()
+    assert MatchResult.objects.get(match=match).outcome == outcomes.HOME_HALF_WIN
+    assert MatchResult.objects.filter(outcome=outcomes.HOME_HALF_WIN).count() == 1
+    assert bet.result == Decimal(10000)
@@ -0,0 +1,145 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from bettings.bets import settlement
+from bettings.bets.models import Bet, SettlementJob
+from bettings.bets.settlement import claim_job, partition_matches, run_job, run_pending_jobs
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_saving_result_queues_job_without_settling():
+    match = MatchFactory()
+    BetFactory.create_batch(3, match=match)
+
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+    job = SettlementJob.objects.get(match=match)
+    assert job.status == SettlementJob.STATUS_PENDING
+    assert Bet.objects.filter(result__isnull=True).count() == 3
+
+
+def test_saving_result_settles_inline_when_async_is_disabled(settings):
+    settings.SETTLEMENT_ASYNC = False
+    match = MatchFactory()
+    BetFactory.create_batch(3, match=match)
+
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+    assert not SettlementJob.objects.exists()
+    assert not Bet.objects.filter(result__isnull=True).exists()
+
+
+def test_job_settles_in_checkpointed_chunks():
+    match = MatchFactory()
+    bets = BetFactory.create_batch(5, match=match)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+    job = run_job(claim_job(), chunk_size=2)
+
+    assert job.status == SettlementJob.STATUS_DONE
+    assert job.attempts == 1
+    assert job.settled_count == 5
+    assert job.last_bet_id == bets[-1].pk
+    assert claim_job() is None
+
+
+def test_failed_chunk_rolls_back_and_job_resumes_from_checkpoint():
+    match = MatchFactory()
+    bets = BetFactory.create_batch(3, match=match, amount=10000)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+    settle_match = settlement.settle_match
+    calls = []
+
+    def fail_on_second_chunk(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("database went away")
+        return settle_match(*args, **kwargs)
+
+    with mock.patch.object(settlement, "settle_match", side_effect=fail_on_second_chunk):
+        job = run_job(claim_job(), chunk_size=1)
+    assert job.status == SettlementJob.STATUS_PENDING
+    assert job.last_bet_id == bets[0].pk
+    assert job.error == "database went away"
+
+    assert run_pending_jobs(chunk_size=1) == 1
+    job.refresh_from_db()
+    assert job.status == SettlementJob.STATUS_DONE
+    assert job.attempts == 2
+    for bet in bets:
+        bet.refresh_from_db()
+        bet.user.refresh_from_db()
+        assert bet.result == Decimal(10000)
+        assert bet.user.get_balance() == Decimal(10000)
+
+
+def test_job_fails_after_max_attempts(settings):
+    settings.SETTLEMENT_MAX_ATTEMPTS = 1
+    match = MatchFactory()
+    BetFactory(match=match)
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+
+    with mock.patch.object(settlement, "settle_match", side_effect=RuntimeError("boom")):
+        job = run_job(claim_job())
+
+    assert job.status == SettlementJob.STATUS_FAILED
+    assert claim_job() is None
+
+
+def test_result_correction_supersedes_the_running_job():
+    match = MatchFactory()
+    bets = BetFactory.create_batch(3, match=match, choice=match.home, amount=10000)
+    result = MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+    old_job = claim_job()
+    settle_match = settlement.settle_match
+
+    def correct_after_first_chunk(*args, **kwargs):
+        settled = settle_match(*args, **kwargs)
+        if not MatchResult.objects.filter(pk=result.pk, home_goals=0).exists():
+            # the corrected result is settled completely while the old job is still running
+            result.home_goals, result.guest_goals = 0, 1
+            result.save()
+            assert run_pending_jobs(chunk_size=1) == 1
+        return settled
+
+    with mock.patch.object(settlement, "settle_match", side_effect=correct_after_first_chunk):
+        old_job = run_job(old_job, chunk_size=1)
+
+    assert old_job.status == SettlementJob.STATUS_SUPERSEDED
+    assert old_job.settled_count == 1
+    for bet in bets:
+        bet.refresh_from_db()
+        assert bet.result == Decimal(-10000)
+        assert bet.user.get_balance() == Decimal(-10000)
+    assert list(SettlementJob.objects.order_by("pk").values_list("status", flat=True)) == [
+        SettlementJob.STATUS_SUPERSEDED, SettlementJob.STATUS_DONE]
+
+
+def test_partition_matches_balances_bets_across_disjoint_groups():
+    partitions = partition_matches({1: 100, 2: 60, 3: 50, 4: 10, 5: 0}, 2)
+
+    assert partitions == [[1, 4, 5], [2, 3]]
+    assert partition_matches({1: 5}, 4) == [[1]]
+
+
+def test_settle_matches_command_settles_every_queued_match():
+    matches = MatchFactory.create_batch(3)
+    for match in matches:
+        BetFactory.create_batch(2, match=match)
+        MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+    out = StringIO()
+
+    call_command("settle_matches", processes=1, stdout=out)
+
+    assert "Processed 3 settlement jobs of 3 matches with 1 workers" in out.getvalue()
+    assert not Bet.objects.filter(result__isnull=True).exists()
+    assert not SettlementJob.objects.exclude(status=SettlementJob.STATUS_DONE).exists()
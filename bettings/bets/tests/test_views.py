@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from bettings.bets.models import Bet
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.models import MatchResult
+
+pytestmark = pytest.mark.django_db
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def create_settled_bets(user, count):
+    for bet in BetFactory.create_batch(count, user=user):
+        MatchResult.objects.create(match=bet.match, home_goals=1, guest_goals=0)
+        bet.result = bet.amount
+        bet.save()
+
+
+@pytest.mark.parametrize("url_name", ["bets:my_bets", "bets:result"])
+def test_bet_tables_query_count_does_not_grow_with_rows(client, user, url_name):
+    client.force_login(user)
+    create_settled_bets(user, 2)
+    few_rows = count_queries(client, reverse(url_name))
+
+    create_settled_bets(user, 10)
+    many_rows = count_queries(client, reverse(url_name))
+
+    assert many_rows == few_rows
+
+
+def test_create_redirects_to_existing_bet(client, user):
+    client.force_login(user)
+    bet = BetFactory(user=user)
+
+    response = client.get(reverse("bets:create", args=[bet.match.pk]))
+
+    assert response.status_code == 302
+    assert response["Location"] == reverse("bets:update", args=[bet.pk])
+
+
+def test_duplicate_bet_is_rejected_by_constraint(client, user):
+    client.force_login(user)
+    bet = BetFactory(user=user)
+
+    response = client.post(reverse("bets:create", args=[bet.match.pk]),
+                           {"choice": bet.match.guest.pk, "amount": 20000})
+
+    assert response.status_code == 302
+    assert response["Location"] == reverse("bets:update", args=[bet.pk])
+    assert Bet.objects.filter(user=user, match=bet.match).count() == 1
+
+
+@pytest.mark.parametrize("url_name", ["bets:update", "bets:delete"])
+def test_bets_of_other_users_are_not_found(client, user, url_name):
+    client.force_login(user)
+    bet = BetFactory()
+    url = reverse(url_name, args=[bet.pk])
+
+    assert client.get(url).status_code == 404
+    assert client.post(url, {"choice": bet.match.guest.pk, "amount": 20000}).status_code == 404
+    assert Bet.objects.get(pk=bet.pk).choice_id == bet.choice_id
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from bettings.bets.tests.factories import BetFactory
+from bettings.bets.window import bet_windows, get_bet_window, get_bet_windows
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_window_is_cached(django_assert_num_queries):
+    match = MatchFactory()
+    with django_assert_num_queries(1):
+        window = get_bet_window(match.pk)
+    with django_assert_num_queries(0):
+        assert get_bet_window(match.pk) == window
+    assert window.is_open()
+    assert window.closes_at == match.start_time - datetime.timedelta(minutes=30)
+    assert window.has_team(match.home_id) and window.has_team(match.guest_id)
+
+
+def test_missing_windows_are_loaded_in_one_query(django_assert_num_queries):
+    cached, first, second = MatchFactory.create_batch(3)
+    get_bet_window(cached.pk)
+    with django_assert_num_queries(1):
+        windows = get_bet_windows([cached.pk, first.pk, second.pk, 0])
+    assert set(windows) == {cached.pk, first.pk, second.pk}
+
+
+def test_window_is_invalidated_on_result_and_match_save():
+    match = MatchFactory()
+    assert get_bet_window(match.pk).is_open()
+
+    match.start_time = timezone.now() + datetime.timedelta(minutes=10)
+    match.save()
+    assert not get_bet_window(match.pk).is_open()
+
+    match.start_time = timezone.now() + datetime.timedelta(days=1)
+    match.save()
+    MatchResult.objects.create(match=match, home_goals=1, guest_goals=0)
+    assert get_bet_window(match.pk).settled
+
+
+def test_window_expires_after_ttl(settings, django_assert_num_queries):
+    settings.BET_WINDOW_CACHE_TTL = 0
+    match = MatchFactory()
+    get_bet_window(match.pk)
+    with django_assert_num_queries(1):
+        get_bet_window(match.pk)
+
+
+def test_cached_window_spares_the_match_query_on_bet_create(client, user, query_budget):
+    client.force_login(user)
+    match = MatchFactory()
+    get_bet_window(match.pk)
+    hits = bet_windows.hits
+
+    response = client.post(reverse("bets:create", kwargs={"match_pk": match.pk}),
+                           {"choice": match.home_id, "amount": 10000})
+
+    assert response.status_code == 302
+    assert bet_windows.hits == hits + 1
+
+
+def test_update_and_delete_stay_within_budget(client, user, query_budget):
+    client.force_login(user)
+    bet = BetFactory(user=user)
+    update_url = reverse("bets:update", kwargs={"bet_pk": bet.pk})
+    delete_url = reverse("bets:delete", kwargs={"bet_pk": bet.pk})
+
+    assert client.get(update_url).status_code == 200
+    assert client.post(update_url, {"choice": bet.match.guest_id, "amount": 10000}).status_code == 302
+    assert client.get(delete_url).status_code == 200
+    assert client.post(delete_url).status_code == 302
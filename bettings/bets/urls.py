@@ -1,6 +1,7 @@
 from django.urls import path
 
-from .views import BetListView, BetCreateView, BetUpdateView, BetDeleteView, BetResultView
+from .views import (BetListView, BetCreateView, BetUpdateView, BetDeleteView, BetResultView, BetExportView,
+                    MatchEventStreamView)
 
 app_name = "bets"
 
@@ -10,4 +11,6 @@ urlpatterns = [
     path("<int:bet_pk>/update/", BetUpdateView.as_view(), name="update"),
     path("<int:bet_pk>/delete/", BetDeleteView.as_view(), name="delete"),
     path("bet-results/", BetResultView.as_view(), name="result"),
+    path("export/", BetExportView.as_view(), name="export"),
+    path("live/", MatchEventStreamView.as_view(), name="live"),
 ]
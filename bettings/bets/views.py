@@ -1,53 +1,96 @@
-import datetime
 import logging
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Case, When, Value, BooleanField
-from django.http import HttpResponseRedirect
+from django.db import IntegrityError, transaction
+from django.db.models import Case, When, Value, BooleanField, OuterRef, Subquery
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import View, ListView, CreateView, UpdateView, DeleteView
 
 from bettings.tournaments.models import Match
+from bettings.utils.fragments import RowFragmentCache
+from bettings.utils.pagination import KeysetPaginationMixin
+from bettings.utils.transactions import TransactionPolicyMixin, READ_ONLY, SHORT_WRITE
 from .constants import ErrorResponse
 from .exceptions import InvalidRequestException
+from .export import FORMATS, FORMAT_CSV, CONTENT_TYPES, get_export_rows, iter_export
 from .forms import BetCreateForm, BetUpdateForm
+from .live import match_events, iter_match_events
 from .models import Bet
+from .window import BET_CUTOFF, BetWindow, get_bet_window
 
 # Create your views here.
 logger = logging.getLogger(__name__)
 
 
-class BetListView(LoginRequiredMixin, ListView):
+def get_bet_window_or_404(match_pk) -> BetWindow:
+    window = get_bet_window(match_pk)
+    if window is None:
+        raise Http404("No match found matching the query")
+    return window
+
+
+# relations rendered on every row of the bet tables
+BET_ROW_RELATIONS = ("match__tournament", "match__home", "match__guest", "match__result", "choice")
+
+
+def get_bet_row_key(bet) -> tuple:
+    match = bet.match
+    result = match.result if match.has_result() else None
+    return (bet.pk, bet.modified_at, bet.result, bet.can_modify, match.modified_at, result and result.modified_at,
+            match.tournament.modified_at, match.home.modified_at, match.guest.modified_at, bet.choice.modified_at)
+
+
+bet_rows = RowFragmentCache("bet_row", "bets/bet_row.html", "bet", get_bet_row_key)
+
+
+class BetListView(TransactionPolicyMixin, LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Bet
     context_object_name = 'bets'
     paginate_by = 20
+    key_fields = ("match__start_time", "pk")
     template_name = "bets/bet_list.html"
+    query_budget = 3
+    transaction_policy = READ_ONLY
+    read_replica = True
 
     def get_queryset(self):
         logger.info("Getting all bet of user [{}]".format(self.request.user.pk))
-        modify_time = timezone.now() + datetime.timedelta(minutes=30)
-        queryset = Bet.objects.filter(user=self.request.user).annotate(
+        modify_time = timezone.now() + BET_CUTOFF
+        queryset = Bet.objects.filter(user=self.request.user).select_related(*BET_ROW_RELATIONS).annotate(
             can_modify=Case(When(match__start_time__gte=modify_time, match__result=None, then=Value(True)),
                             default=Value(False),
                             output_field=BooleanField()))
         return queryset.order_by("match__start_time")
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["bet_rows"] = bet_rows.render(context["bets"])
+        context["live_events"] = settings.LIVE_EVENTS_ENABLED
+        return context
 
-class BetCreateView(LoginRequiredMixin, CreateView):
+
+class BetCreateView(TransactionPolicyMixin, LoginRequiredMixin, CreateView):
     model = Bet
     form_class = BetCreateForm
     template_name = "bets/bet_create.html"
+    query_budget = 7
+    transaction_policy = SHORT_WRITE
 
     def get(self, request, *args, **kwargs):
-        self.match = get_object_or_404(Match, pk=self.kwargs.get("match_pk"))
-        last_bet_time = self.match.start_time - datetime.timedelta(minutes=30)
-        if timezone.now() >= last_bet_time or self.match.has_result():
-            logger.error("User [{}] can not bet on match [{}] due to expired time".format(self.request.user.pk, self.match.pk))
+        # the (user, match) constraint allows at most one existing bet, fetched along with the match
+        existing_bet = Bet.objects.filter(match=OuterRef("pk"), user=self.request.user).values("pk")[:1]
+        matches = Match.objects.select_related("tournament").annotate(existing_bet_pk=Subquery(existing_bet))
+        window = get_bet_window_or_404(self.kwargs.get("match_pk"))
+        if not window.is_open():
+            logger.error("User [{}] can not bet on match [{}] due to expired time"
+                         .format(self.request.user.pk, window.match_pk))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
-        bet = Bet.objects.filter(match=self.match, user=self.request.user)
-        if bet:
-            return HttpResponseRedirect(reverse_lazy("bets:update", kwargs={"bet_pk": bet[0].pk}))
+        self.match = get_object_or_404(matches, pk=window.match_pk)
+        if self.match.existing_bet_pk:
+            return HttpResponseRedirect(reverse_lazy("bets:update", kwargs={"bet_pk": self.match.existing_bet_pk}))
         return super().get(request, *args, **kwargs)
 
     def get_form_kwargs(self):
@@ -65,34 +108,50 @@ class BetCreateView(LoginRequiredMixin, CreateView):
         return reverse_lazy("bets:my_bets")
 
     def form_valid(self, form):
-        match = get_object_or_404(Match, pk=self.kwargs.get("match_pk"))
-        last_bet_time = match.start_time - datetime.timedelta(minutes=30)
+        window = get_bet_window_or_404(self.kwargs.get("match_pk"))
         user = self.request.user
-        if timezone.now() >= last_bet_time or match.has_result():
-            logger.error("User [{}] can not bet on match [{}] due to expired time".format(user.pk, match.pk))
+        if not window.is_open():
+            logger.error("User [{}] can not bet on match [{}] due to expired time".format(user.pk, window.match_pk))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
         bet = form.save(commit=False)
-        bet.match = match
+        bet.match_id = window.match_pk
         bet.user = user
-        bet.save()
+        try:
+            with transaction.atomic():
+                bet.save()
+        except IntegrityError:
+            # the user already bet on this match, e.g. from another tab
+            logger.error("User [{}] already has a bet on match [{}]".format(user.pk, window.match_pk))
+            existing_bet = Bet.objects.get(match_id=window.match_pk, user=user)
+            return HttpResponseRedirect(reverse_lazy("bets:update", kwargs={"bet_pk": existing_bet.pk}))
         logger.info("User [{}] created bet [{}] at match [{}] with choice [{}] and amount [{}] successfully"
-                    .format(self.request.user.pk, bet.pk, match.pk, bet.choice, bet.amount))
+                    .format(self.request.user.pk, bet.pk, window.match_pk, bet.choice_id, bet.amount))
         return HttpResponseRedirect(self.get_success_url())
 
 
-class BetUpdateView(LoginRequiredMixin, UpdateView):
+class BetUpdateView(TransactionPolicyMixin, LoginRequiredMixin, UpdateView):
     model = Bet
     form_class = BetUpdateForm
     pk_url_kwarg = "bet_pk"
     context_object_name = "bet"
     template_name = "bets/bet_update.html"
+    query_budget = 7
+    transaction_policy = SHORT_WRITE
+
+    def get_queryset(self):
+        return Bet.objects.filter(user=self.request.user).select_related("match__tournament")
+
+    def get_object(self, queryset=None):
+        # get() and post() both go through get_object(), load the bet once per request
+        if not hasattr(self, "bet"):
+            self.bet = super().get_object(queryset)
+        return self.bet
 
     def get(self, request, *args, **kwargs):
-        self.bet = get_object_or_404(Bet, pk=self.kwargs.get("bet_pk"))
-        match = self.bet.match
-        last_bet_time = match.start_time - datetime.timedelta(minutes=30)
-        if timezone.now() >= last_bet_time or match.has_result():
-            logger.error("User [{}] can not bet on match [{}] due to expired time".format(self.request.user.pk, match.pk))
+        bet = self.get_object()
+        if not get_bet_window_or_404(bet.match_id).is_open():
+            logger.error("User [{}] can not bet on match [{}] due to expired time"
+                         .format(self.request.user.pk, bet.match_id))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
         return super().get(request, *args, **kwargs)
 
@@ -111,30 +170,37 @@ class BetUpdateView(LoginRequiredMixin, UpdateView):
         return reverse_lazy("bets:my_bets")
 
     def form_valid(self, form):
-        bet = get_object_or_404(Bet, pk=self.kwargs.get("bet_pk"))
-        last_bet_time = bet.match.start_time - datetime.timedelta(minutes=30)
+        bet = self.get_object()
         user = self.request.user
-        if timezone.make_aware(datetime.datetime.now()) >= last_bet_time or bet.match.has_result():
+        if not get_bet_window_or_404(bet.match_id).is_open():
             logger.error("User [{}] can not update bet [{}] due to expired time".format(user.pk, bet.pk))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
         bet = form.save(commit=True)
         logger.info("User [{}] updated bet [{}] on match [{}] with choice [{}] and amount [{}] successfully"
-                    .format(user.pk, bet.pk, bet.match.pk, bet.choice, bet.amount))
+                    .format(user.pk, bet.pk, bet.match_id, bet.choice_id, bet.amount))
         return HttpResponseRedirect(self.get_success_url())
 
 
-class BetDeleteView(LoginRequiredMixin, DeleteView):
+class BetDeleteView(TransactionPolicyMixin, LoginRequiredMixin, DeleteView):
     model = Bet
     pk_url_kwarg = "bet_pk"
     context_object_name = "bet"
     template_name = "bets/bet_confirm_delete.html"
+    query_budget = 6
+    transaction_policy = SHORT_WRITE
+
+    def get_queryset(self):
+        return Bet.objects.filter(user=self.request.user).select_related("match__tournament")
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, "bet"):
+            self.bet = super().get_object(queryset)
+        return self.bet
 
     def get(self, request, *args, **kwargs):
-        self.bet = get_object_or_404(Bet, pk=self.kwargs.get("bet_pk"))
-        match = self.bet.match
-        last_bet_time = match.start_time - datetime.timedelta(minutes=30)
-        if timezone.now() >= last_bet_time or match.has_result():
-            logger.error("User [{}] can not delete bet [{}] due to expired time".format(self.request.user.pk, self.bet.pk))
+        bet = self.get_object()
+        if not get_bet_window_or_404(bet.match_id).is_open():
+            logger.error("User [{}] can not delete bet [{}] due to expired time".format(self.request.user.pk, bet.pk))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
         return super().get(request, *args, **kwargs)
 
@@ -148,23 +214,76 @@ class BetDeleteView(LoginRequiredMixin, DeleteView):
         return reverse_lazy("bets:my_bets")
 
     def post(self, request, *args, **kwargs):
-        bet = get_object_or_404(Bet, pk=self.kwargs.get("bet_pk"))
-        match = bet.match
-        last_bet_time = match.start_time - datetime.timedelta(minutes=30)
-        if timezone.now() >= last_bet_time or match.has_result():
+        bet = self.get_object()
+        if not get_bet_window_or_404(bet.match_id).is_open():
             logger.error("User [{}] can not delete bet [{}] due to expired time".format(self.request.user.pk, bet.pk))
             raise InvalidRequestException(ErrorResponse.BET_EXPIRED_TIME)
         logger.info("User [{}] deleted bet [{}] successfully".format(self.request.user.pk, bet.pk))
         return self.delete(request, *args, **kwargs)
 
 
-class BetResultView(LoginRequiredMixin, ListView):
+class BetResultView(TransactionPolicyMixin, LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Bet
     context_object_name = "bets"
     paginate_by = 20
+    key_fields = ("match__start_time", "pk")
     template_name = "bets/bet_result.html"
+    query_budget = 3
+    transaction_policy = READ_ONLY
+    read_replica = True
 
     def get_queryset(self):
         logger.info("Getting all bet result of user [{}]".format(self.request.user.pk))
-        queryset = Bet.objects.filter(user=self.request.user, result__isnull=False)
+        queryset = Bet.objects.filter(user=self.request.user, result__isnull=False).select_related(*BET_ROW_RELATIONS)
         return queryset.order_by("match__start_time")
+
+
+class BetExportView(TransactionPolicyMixin, LoginRequiredMixin, View):
+    """Stream the bet history of the user as CSV or NDJSON, optionally limited to one tournament."""
+    # the rows are read while the response streams, after the view returned
+    query_budget = 2
+    transaction_policy = READ_ONLY
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", FORMAT_CSV)
+        if export_format not in FORMATS:
+            return HttpResponseBadRequest("Unknown export format [{}]".format(export_format))
+        tournament_pk = request.GET.get("tournament")
+        if tournament_pk is not None and not tournament_pk.isdigit():
+            return HttpResponseBadRequest("Invalid tournament [{}]".format(tournament_pk))
+        logger.info("Exporting bets of user [{}] in tournament [{}] as [{}]"
+                    .format(request.user.pk, tournament_pk, export_format))
+        rows = get_export_rows(user=request.user, tournament_pk=tournament_pk)
+        response = StreamingHttpResponse(iter_export(rows, export_format), content_type=CONTENT_TYPES[export_format])
+        response["Content-Disposition"] = 'attachment; filename="bets.{}"'.format(export_format)
+        return response
+
+
+class MatchEventStreamView(TransactionPolicyMixin, View):
+    """Push odds changes, posted results and closed betting as server-sent events instead of page reloads.
+
+    ``?tournament=<pk>`` limits the stream to one tournament. The browser resumes a dropped stream with
+    the Last-Event-ID header, an id sent by another process or before a restart starts from the current
+    event instead. Disabled unless ``LIVE_EVENTS_ENABLED`` is set.
+    """
+    # loading the betting closing times, once per process
+    query_budget = 1
+    transaction_policy = READ_ONLY
+
+    def get(self, request, *args, **kwargs):
+        if not settings.LIVE_EVENTS_ENABLED:
+            raise Http404("Live match events are disabled")
+        tournament_pk = request.GET.get("tournament")
+        if tournament_pk is not None and not tournament_pk.isdigit():
+            return HttpResponseBadRequest("Invalid tournament [{}]".format(tournament_pk))
+        last_id = match_events.parse_event_id(request.META.get("HTTP_LAST_EVENT_ID", ""))
+        if last_id is None:
+            last_id = match_events.last_id
+        match_events.load_schedule()
+        logger.info("Streaming match events after [{}] of tournament [{}]".format(last_id, tournament_pk))
+        events = iter_match_events(last_id, int(tournament_pk) if tournament_pk else None)
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # nginx would otherwise buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
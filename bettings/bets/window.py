@@ -0,0 +1,100 @@
+import collections
+import datetime
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bettings.tournaments.models import Match
+
+logger = logging.getLogger(__name__)
+
+BET_CUTOFF = datetime.timedelta(minutes=30)
+
+
+class BetWindow(collections.namedtuple("BetWindow", ["match_pk", "home_id", "guest_id", "closes_at", "settled"])):
+    """What the bet views need to admit a bet on a match, without the match row itself."""
+
+    def is_open(self) -> bool:
+        return timezone.now() < self.closes_at and not self.settled
+
+    def has_team(self, team_pk) -> bool:
+        return team_pk in (self.home_id, self.guest_id)
+
+
+class BetWindowCache:
+    """Process-local cache of bet windows.
+
+    Entries expire after ``BET_WINDOW_CACHE_TTL`` seconds and are dropped on every save of the match or its
+    result in this process, the TTL bounds how long another process may keep admitting bets on a stale window.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, match_pks) -> dict:
+        now = time.monotonic()
+        windows = {}
+        with self._lock:
+            for match_pk in match_pks:
+                entry = self._windows.get(match_pk)
+                if entry is not None and entry[0] > now:
+                    windows[match_pk] = entry[1]
+            self.hits += len(windows)
+            self.misses += len(set(match_pks)) - len(windows)
+        return windows
+
+    def set_many(self, windows):
+        expires_at = time.monotonic() + settings.BET_WINDOW_CACHE_TTL
+        with self._lock:
+            if len(self._windows) >= self.max_size:
+                self._windows.clear()
+            for window in windows:
+                self._windows[window.match_pk] = (expires_at, window)
+
+    def invalidate(self, match_pk):
+        with self._lock:
+            self._windows.pop(match_pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+bet_windows = BetWindowCache()
+
+
+def load_bet_windows(match_pks) -> list:
+    rows = Match.objects.filter(pk__in=match_pks).values_list("pk", "home_id", "guest_id", "start_time", "result__id")
+    return [BetWindow(pk, home_id, guest_id, start_time - BET_CUTOFF, result_id is not None)
+            for pk, home_id, guest_id, start_time, result_id in rows]
+
+
+def get_bet_windows(match_pks) -> dict:
+    """Return the windows of the given matches keyed by match pk, loading the uncached ones in one query."""
+    match_pks = set(match_pks)
+    windows = bet_windows.get_many(match_pks)
+    missing = match_pks.difference(windows)
+    if missing:
+        loaded = load_bet_windows(missing)
+        bet_windows.set_many(loaded)
+        windows.update((window.match_pk, window) for window in loaded)
+    return windows
+
+
+def get_bet_window(match_pk):
+    """Return the window of a match, or None when the match does not exist."""
+    return get_bet_windows([match_pk]).get(match_pk)
+
+
+def invalidate_bet_window(match_pk):
+    """Drop the cached window now and again on commit, see ``bump_tournament_version``."""
+    logger.debug("Invalidating bet window of match [{}]".format(match_pk))
+    bet_windows.invalidate(match_pk)
+    transaction.on_commit(lambda: bet_windows.invalidate(match_pk))
@@ -1,7 +1,10 @@
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.test import RequestFactory
 
+from bettings.bets.live import match_events
+from bettings.bets.window import bet_windows
 from bettings.users.tests.factories import UserFactory
 
 
@@ -10,6 +13,14 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+    bet_windows.clear()
+    match_events.clear()
+
+
 @pytest.fixture
 def user() -> settings.AUTH_USER_MODEL:
     return UserFactory()
@@ -18,3 +29,10 @@ def user() -> settings.AUTH_USER_MODEL:
 @pytest.fixture
 def request_factory() -> RequestFactory:
     return RequestFactory()
+
+
+@pytest.fixture
+def query_budget(settings):
+    """Fail the test when a request runs more queries than the query_budget of its view."""
+    settings.MIDDLEWARE = ["bettings.utils.query_budget.QueryBudgetMiddleware"] + settings.MIDDLEWARE
+    settings.QUERY_BUDGET_RAISE = True
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Standing
+
+
+@admin.register(Standing)
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ["user", "tournament", "profit", "bet_count", "win_count", "modified_at"]
+    list_select_related = ["user", "tournament"]
+    raw_id_fields = ["user"]
+    search_fields = ["user__username"]
@@ -0,0 +1,118 @@
+import logging
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Standing
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseLeaderboard:
+    """Rank users straight from the standings table, ordered by profit then user id."""
+
+    def get_standings(self, tournament_pk):
+        return Standing.objects.filter(tournament_id=tournament_pk).order_by("-profit", "user_id")
+
+    def top(self, tournament_pk, count: int) -> list:
+        """Return the (rank, user_id) of the first ``count`` users."""
+        user_ids = self.get_standings(tournament_pk).values_list("user_id", flat=True)[:count]
+        return list(enumerate(user_ids, 1))
+
+    def rank(self, tournament_pk, user_id):
+        profit = Standing.objects.filter(tournament_id=tournament_pk, user_id=user_id).values_list(
+            "profit", flat=True).first()
+        if profit is None:
+            return None
+        ahead = self.get_standings(tournament_pk).filter(Q(profit__gt=profit) | Q(profit=profit, user_id__lt=user_id))
+        return ahead.count() + 1
+
+    def around(self, tournament_pk, user_id, radius: int) -> list:
+        """Return the (rank, user_id) of the user and of up to ``radius`` users above and below."""
+        rank = self.rank(tournament_pk, user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        user_ids = self.get_standings(tournament_pk).values_list("user_id", flat=True)[start:rank + radius]
+        return list(enumerate(user_ids, start + 1))
+
+    def increment(self, tournament_pk, deltas: dict):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class RedisLeaderboard(DatabaseLeaderboard):
+    """Serve rankings from Redis sorted sets mirroring the profit column of the standings.
+
+    Commands are sent with ``execute_command`` so the mirror works with redis-py 2 and 3, whose ZADD and
+    ZINCRBY signatures differ. The database stays the source of truth, reads fall back to it when Redis fails
+    and ``rebuild_leaderboard`` restores a mirror that missed updates.
+    """
+    # users with the same profit are ordered by member in Redis and by user id in the database
+
+    def get_key(self, tournament_pk) -> str:
+        return "leaderboard:{}".format(tournament_pk or "global")
+
+    def get_connection(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    def top(self, tournament_pk, count: int) -> list:
+        try:
+            members = self.get_connection().execute_command("ZREVRANGE", self.get_key(tournament_pk), 0, count - 1)
+        except Exception:
+            logger.exception("Reading the leaderboard of tournament [{}] from Redis failed".format(tournament_pk))
+            return super().top(tournament_pk, count)
+        return [(rank, int(member)) for rank, member in enumerate(members, 1)]
+
+    def rank(self, tournament_pk, user_id):
+        try:
+            rank = self.get_connection().execute_command("ZREVRANK", self.get_key(tournament_pk), user_id)
+        except Exception:
+            logger.exception("Reading the leaderboard of tournament [{}] from Redis failed".format(tournament_pk))
+            return super().rank(tournament_pk, user_id)
+        return None if rank is None else rank + 1
+
+    def around(self, tournament_pk, user_id, radius: int) -> list:
+        rank = self.rank(tournament_pk, user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        try:
+            members = self.get_connection().execute_command("ZREVRANGE", self.get_key(tournament_pk), start,
+                                                            rank - 1 + radius)
+        except Exception:
+            logger.exception("Reading the leaderboard of tournament [{}] from Redis failed".format(tournament_pk))
+            return super().around(tournament_pk, user_id, radius)
+        return [(rank, int(member)) for rank, member in enumerate(members, start + 1)]
+
+    def increment(self, tournament_pk, deltas: dict):
+        try:
+            pipeline = self.get_connection().pipeline(transaction=False)
+            for user_id, (profit, _, _) in deltas.items():
+                for key in (self.get_key(tournament_pk), self.get_key(None)):
+                    pipeline.execute_command("ZINCRBY", key, str(profit), user_id)
+            pipeline.execute()
+        except Exception:
+            logger.exception("Mirroring standings of tournament [{}] to Redis failed, rebuild the leaderboard"
+                             .format(tournament_pk))
+
+    def rebuild(self, batch_size: int = 1000):
+        connection = self.get_connection()
+        for key in connection.scan_iter(match=self.get_key("*")):
+            connection.execute_command("DEL", key)
+        standings = Standing.objects.order_by().values_list("tournament_id", "user_id", "profit")
+        pipeline = connection.pipeline(transaction=False)
+        for i, (tournament_pk, user_id, profit) in enumerate(standings.iterator(chunk_size=batch_size), 1):
+            pipeline.execute_command("ZADD", self.get_key(tournament_pk), str(profit), user_id)
+            if i % batch_size == 0:
+                pipeline.execute()
+        pipeline.execute()
+        logger.info("Rebuilt the Redis leaderboard mirror")
+
+
+def get_leaderboard() -> DatabaseLeaderboard:
+    if settings.LEADERBOARD_REDIS_MIRROR:
+        return RedisLeaderboard()
+    return DatabaseLeaderboard()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bettings.leaderboard.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = "Recompute every standing from the settled bets and refill the Redis mirror when it is enabled."
+
+    def handle(self, *args, **options):
+        written = rebuild_standings()
+        self.stdout.write("Rebuilt [{}] standings".format(written))
@@ -0,0 +1,69 @@
+# Generated by Django 2.0.7 on 2026-10-17 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+
+from bettings.utils.db import get_batch_size
+
+
+def create_standings(apps, schema_editor):
+    Bet = apps.get_model("bets", "Bet")
+    Standing = apps.get_model("leaderboard", "Standing")
+    totals = {
+        "profit": Sum("result"),
+        "bet_count": Count("pk"),
+        "win_count": Sum(Case(When(result__gt=0, then=Value(1)), default=Value(0), output_field=IntegerField())),
+    }
+    settled = Bet.objects.filter(result__isnull=False).order_by()
+    rows = list(settled.values("match__tournament_id", "user_id").annotate(**totals))
+    rows += list(settled.values("user_id").annotate(**totals))
+    standings = [
+        Standing(tournament_id=row.get("match__tournament_id"), user_id=row["user_id"], profit=row["profit"],
+                 bet_count=row["bet_count"], win_count=row["win_count"])
+        for row in rows
+    ]
+    batch_size = get_batch_size(Standing, standings, 1000, using=schema_editor.connection.alias)
+    Standing.objects.bulk_create(standings, batch_size=batch_size)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tournaments', '0003_access_path_indexes'),
+        ('bets', '0005_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bet_count', models.PositiveIntegerField(default=0)),
+                ('win_count', models.PositiveIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('tournament', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.Tournament')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='standing',
+            index=models.Index(fields=['tournament', '-profit', 'user'], name='standing_ranking_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='standing',
+            unique_together={('tournament', 'user')},
+        ),
+        # one global standing per user; a list of statements needs no sqlparse
+        migrations.RunSQL(
+            ["CREATE UNIQUE INDEX standing_global_user_uniq ON leaderboard_standing (user_id) "
+             "WHERE tournament_id IS NULL"],
+            ["DROP INDEX standing_global_user_uniq"],
+        ),
+        migrations.RunPython(create_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+# Create your models here.
+class Standing(models.Model):
+    """Settled totals of a user in a tournament, or over every tournament when ``tournament`` is null."""
+    tournament = models.ForeignKey("tournaments.Tournament", on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name="standings")
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="standings")
+    profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    bet_count = models.PositiveIntegerField(default=0)
+    win_count = models.PositiveIntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # the global standing of a user is unique through a partial index, NULLs are distinct here
+        unique_together = ("tournament", "user")
+        indexes = [
+            models.Index(fields=["tournament", "-profit", "user"], name="standing_ranking_idx"),
+        ]
+
+    def get_win_rate(self) -> float:
+        if not self.bet_count:
+            return 0
+        return self.win_count / self.bet_count
+
+    def __str__(self):
+        return "{} in {}".format(self.user_id, self.tournament_id or "all tournaments")
@@ -0,0 +1,108 @@
+import itertools
+import logging
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, When, Value, IntegerField
+
+from .boards import get_leaderboard
+from .models import Standing
+
+logger = logging.getLogger(__name__)
+
+# users per statement, keeps "user_id IN (...)" under the SQLite variable limit
+BATCH_SIZE = 500
+
+
+def _batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def get_scopes(tournament_pk) -> Q:
+    return Q(tournament_id=tournament_pk) | Q(tournament__isnull=True)
+
+
+def get_deltas(results) -> dict:
+    """Turn (user_id, previous result, new result) of settled bets into (profit, bets, wins) deltas per user."""
+    deltas = {}
+    for user_id, previous, result in results:
+        profit = result - (previous or 0)
+        bets = 1 if previous is None else 0
+        wins = int(result > 0) - int(previous is not None and previous > 0)
+        if profit or bets or wins:
+            deltas[user_id] = (profit, bets, wins)
+    return deltas
+
+
+def ensure_standings(tournament_pk, user_ids):
+    """Create the missing tournament and global standings of the users."""
+    for batch in _batches(user_ids):
+        existing = set(Standing.objects.filter(get_scopes(tournament_pk), user_id__in=batch)
+                       .values_list("tournament_id", "user_id"))
+        missing = [Standing(tournament_id=scope, user_id=user_id)
+                   for scope in (tournament_pk, None) for user_id in batch if (scope, user_id) not in existing]
+        if not missing:
+            continue
+        try:
+            with transaction.atomic():
+                Standing.objects.bulk_create(missing)
+        except IntegrityError:
+            # a concurrent settlement of another match created some of them in between
+            for standing in missing:
+                Standing.objects.get_or_create(tournament_id=standing.tournament_id, user_id=standing.user_id)
+
+
+def apply_results(tournament_pk, results) -> int:
+    """Add the deltas of newly settled or re-settled bets of a tournament to the standings.
+
+    Users sharing the same delta, i.e. the same amount and side of a match, are updated by one statement,
+    so the number of queries depends on the distinct deltas of a match rather than its number of bets.
+    Returns the number of users whose standings changed.
+    """
+    deltas = get_deltas(results)
+    if not deltas:
+        return 0
+    ensure_standings(tournament_pk, list(deltas))
+    groups = defaultdict(list)
+    for user_id, delta in deltas.items():
+        groups[delta].append(user_id)
+    for (profit, bets, wins), user_ids in groups.items():
+        for batch in _batches(user_ids):
+            Standing.objects.filter(get_scopes(tournament_pk), user_id__in=batch).update(
+                profit=F("profit") + profit, bet_count=F("bet_count") + bets, win_count=F("win_count") + wins)
+    leaderboard = get_leaderboard()
+    transaction.on_commit(lambda: leaderboard.increment(tournament_pk, deltas))
+    logger.info("Updated standings of [{}] users in tournament [{}]".format(len(deltas), tournament_pk))
+    return len(deltas)
+
+
+def rebuild_standings() -> int:
+    """Recompute every standing from the settled bets and return the number of standings written."""
+    # bets.models records standings, import it lazily
+    from bettings.bets.models import Bet
+
+    totals = {
+        "profit": Sum("result"),
+        "bet_count": Count("pk"),
+        "win_count": Sum(Case(When(result__gt=0, then=Value(1)), default=Value(0), output_field=IntegerField())),
+    }
+    settled = Bet.objects.filter(result__isnull=False).order_by()
+    per_tournament = settled.values("match__tournament_id", "user_id").annotate(**totals)
+    overall = settled.values("user_id").annotate(**totals)
+    rows = itertools.chain(per_tournament.iterator(), overall.iterator())
+    written = 0
+    with transaction.atomic():
+        Standing.objects.all().delete()
+        for batch in _batches(rows, 1000):
+            Standing.objects.bulk_create([
+                Standing(tournament_id=row.get("match__tournament_id"), user_id=row["user_id"], profit=row["profit"],
+                         bet_count=row["bet_count"], win_count=row["win_count"])
+                for row in batch
+            ])
+            written += len(batch)
+        transaction.on_commit(get_leaderboard().rebuild)
+    logger.info("Rebuilt [{}] standings from the settled bets".format(written))
+    return written
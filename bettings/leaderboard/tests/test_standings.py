@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from bettings.bets.settlement import run_pending_jobs
+from bettings.bets.tests.factories import BetFactory
+from bettings.leaderboard.boards import DatabaseLeaderboard
+from bettings.leaderboard.models import Standing
+from bettings.leaderboard.views import LeaderboardView
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def get_standings():
+    return {(standing.tournament_id, standing.user_id): (standing.profit, standing.bet_count, standing.win_count)
+            for standing in Standing.objects.all()}
+
+
+def settle(match, home_goals, guest_goals):
+    MatchResult.objects.create(match=match, home_goals=home_goals, guest_goals=guest_goals)
+    run_pending_jobs()
+
+
+def test_settlement_updates_tournament_and_global_standings():
+    user = UserFactory()
+    first, second = MatchFactory.create_batch(2)
+    BetFactory(user=user, match=first, choice=first.home, amount=20000)
+    BetFactory(user=user, match=second, choice=second.home, amount=10000)
+
+    settle(first, 1, 0)
+    settle(second, 0, 1)
+
+    standings = get_standings()
+    assert standings[(first.tournament_id, user.pk)] == (Decimal(20000), 1, 1)
+    assert standings[(second.tournament_id, user.pk)] == (Decimal(-10000), 1, 0)
+    assert standings[(None, user.pk)] == (Decimal(10000), 2, 1)
+
+
+def test_resettlement_applies_only_the_difference():
+    bet = BetFactory(amount=20000)
+    match = bet.match
+    settle(match, 1, 0)
+
+    match.odds = Decimal("1.5")
+    match.save()
+    run_pending_jobs()
+
+    assert get_standings()[(None, bet.user_id)] == (Decimal(-20000), 1, 0)
+
+
+def test_rebuild_matches_incremental_standings():
+    matches = MatchFactory.create_batch(3)
+    for match in matches:
+        BetFactory.create_batch(2, match=match)
+        BetFactory(match=match, choice=match.guest)
+    for match in matches:
+        settle(match, 2, 1)
+    incremental = get_standings()
+
+    call_command("rebuild_leaderboard", stdout=None)
+
+    assert get_standings() == incremental
+
+
+def test_database_leaderboard_top_and_around():
+    match = MatchFactory()
+    bets = [BetFactory(match=match, amount=amount) for amount in (10000, 50000, 30000, 20000, 40000)]
+    settle(match, 1, 0)
+    leaderboard = DatabaseLeaderboard()
+    by_profit = [bet.user_id for bet in sorted(bets, key=lambda bet: -bet.amount)]
+
+    assert leaderboard.top(None, 2) == [(1, by_profit[0]), (2, by_profit[1])]
+    assert leaderboard.rank(match.tournament_id, by_profit[3]) == 4
+    assert leaderboard.around(None, by_profit[3], 1) == [(3, by_profit[2]), (4, by_profit[3]), (5, by_profit[4])]
+    assert leaderboard.around(None, UserFactory().pk, 1) == []
+
+
+def test_leaderboard_view_shows_user_below_the_top(client, user, query_budget, monkeypatch):
+    monkeypatch.setattr(LeaderboardView, "top_count", 2)
+    match = MatchFactory()
+    BetFactory.create_batch(3, match=match, amount=50000)
+    BetFactory(match=match, user=user, amount=10000)
+    settle(match, 1, 0)
+    client.force_login(user)
+
+    response = client.get(reverse("leaderboard:index"), {"tournament": match.tournament_id})
+
+    assert response.status_code == 200
+    assert [rank for rank, _ in response.context["top_rows"]] == [1, 2]
+    assert [rank for rank, _ in response.context["around_rows"]] == [3, 4]
+    assert response.context["around_rows"][-1][1].user == user
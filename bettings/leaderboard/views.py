@@ -0,0 +1,51 @@
+import logging
+from django.shortcuts import get_object_or_404
+from django.views.generic import TemplateView
+
+from bettings.tournaments.models import Tournament
+from bettings.utils.transactions import TransactionPolicyMixin, READ_ONLY
+from .boards import get_leaderboard
+from .models import Standing
+
+# Create your views here.
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardView(TransactionPolicyMixin, TemplateView):
+    template_name = "leaderboard/leaderboard.html"
+    top_count = 50
+    around_radius = 5
+    query_budget = 8
+    transaction_policy = READ_ONLY
+    read_replica = True
+
+    def get_tournament(self):
+        tournament_pk = self.request.GET.get("tournament")
+        if not tournament_pk or not tournament_pk.isdigit():
+            return None
+        return get_object_or_404(Tournament, pk=tournament_pk)
+
+    def get_rows(self, tournament, ranked: list) -> list:
+        """Attach the standing and user of each (rank, user_id) in one query."""
+        standings = Standing.objects.filter(tournament=tournament, user_id__in=[user_id for _, user_id in ranked])
+        standings = {standing.user_id: standing for standing in standings.select_related("user")}
+        return [(rank, standings[user_id]) for rank, user_id in ranked if user_id in standings]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        tournament = self.get_tournament()
+        tournament_pk = tournament.pk if tournament else None
+        logger.info("Getting leaderboard of tournament [{}]".format(tournament_pk))
+        leaderboard = get_leaderboard()
+        ranked = leaderboard.top(tournament_pk, self.top_count)
+        around = []
+        user = self.request.user
+        if user.is_authenticated and user.pk not in {user_id for _, user_id in ranked}:
+            around = leaderboard.around(tournament_pk, user.pk, self.around_radius)
+            # the top rows already show the users ranked above
+            around = [(rank, user_id) for rank, user_id in around if rank > len(ranked)]
+        rows = self.get_rows(tournament, ranked + around)
+        context["tournament"] = tournament
+        context["top_rows"] = rows[:len(ranked)]
+        context["around_rows"] = rows[len(ranked):]
+        return context
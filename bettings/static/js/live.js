@@ -0,0 +1,38 @@
+/* Keep the match rows of a page up to date from the live match event stream. */
+(function () {
+  var table = document.querySelector("[data-live-url]");
+  if (!table || !window.EventSource) {
+    return;
+  }
+  var source = new EventSource(table.getAttribute("data-live-url"));
+
+  function onMatch(kind, update) {
+    source.addEventListener(kind, function (event) {
+      var data = JSON.parse(event.data);
+      var row = table.querySelector('tr[data-match="' + data.match + '"]');
+      if (row) {
+        update(row, data);
+      }
+    });
+  }
+
+  function closeBetting(row) {
+    var action = row.querySelector(".live-action");
+    if (action) {
+      action.innerHTML = '<a class="btn btn-outline-secondary disabled">Time out</a>';
+    }
+  }
+
+  onMatch("odds_changed", function (row, data) {
+    row.querySelector(".live-odds").innerHTML = data.odds_html;
+  });
+  onMatch("result_posted", function (row, data) {
+    row.querySelector(".live-result").textContent = data.home_goals + " - " + data.guest_goals;
+    closeBetting(row);
+  });
+  onMatch("betting_closed", closeBetting);
+  // events were missed, the page is stale
+  source.addEventListener("reset", function () {
+    window.location.reload();
+  });
+})();
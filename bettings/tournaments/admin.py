@@ -1,11 +1,12 @@
 from django.contrib import admin
 
+from bettings.bets.models import SettlementJob
+from bettings.utils.fragments import get_fragment_stats
 from .forms import TournamentCreateForm, MatchCreateForm
 from .models import Tournament, Team, Match, MatchResult
 
 # Register your models here.
 admin.site.register(Team)
-admin.site.register(MatchResult)
 
 
 @admin.register(Tournament)
@@ -18,3 +19,34 @@ class TournamentAdmin(admin.ModelAdmin):
 class MatchAdmin(admin.ModelAdmin):
     exclude = []
     form = MatchCreateForm
+
+    def changelist_view(self, request, extra_context=None):
+        # hit ratio of the cached match and bet table rows, shown above the match list
+        extra_context = dict(extra_context or {}, fragment_stats=get_fragment_stats())
+        return super().changelist_view(request, extra_context)
+
+
+@admin.register(MatchResult)
+class MatchResultAdmin(admin.ModelAdmin):
+    exclude = []
+    readonly_fields = ["ratio", "outcome", "settlement_status"]
+    list_display = ["__str__", "outcome"]
+    list_filter = ["outcome"]
+    list_select_related = ["match__home", "match__guest"]
+
+    def get_latest_settlement_job(self, obj):
+        if not obj.pk:
+            return None
+        return obj.match.settlement_jobs.order_by("-pk").first()
+
+    def settlement_status(self, obj):
+        job = self.get_latest_settlement_job(obj)
+        if job is None:
+            return "-"
+        return "{} ({} bets settled)".format(job.get_status_display(), job.settled_count)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        job = self.get_latest_settlement_job(obj)
+        if job is not None and job.status == SettlementJob.STATUS_PENDING:
+            self.message_user(request, "Settlement of {} is queued as job {}".format(obj.match, job.pk))
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TournamentsConfig(AppConfig):
     name = 'bettings.tournaments'
+
+    def ready(self):
+        from . import signals  # noqa F401
@@ -0,0 +1,49 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def get_version_key(tournament_pk) -> str:
+    return "tournaments:{}:version".format(tournament_pk)
+
+
+def get_tournament_version(tournament_pk) -> int:
+    key = get_version_key(tournament_pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump(tournament_pk):
+    key = get_version_key(tournament_pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no page of this tournament is cached under any version yet
+        cache.add(key, 1, None)
+
+
+def bump_tournament_version(tournament_pk):
+    """Invalidate every cached page of a tournament.
+
+    The version is bumped right away so this process stops serving the old pages, and again on commit
+    so a page cached by a concurrent request from the pre-commit snapshot is dropped as well.
+    """
+    logger.debug("Invalidating cached pages of tournament [{}]".format(tournament_pk))
+    _bump(tournament_pk)
+    transaction.on_commit(lambda: _bump(tournament_pk))
+
+
+def make_page_key(prefix: str, tournament_pk, version: int, *parts) -> str:
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return "tournaments:{}:v{}:{}:{}".format(tournament_pk, version, prefix, digest)
+
+
+def get_cache_timeout() -> int:
+    return settings.MATCH_LIST_CACHE_TIMEOUT
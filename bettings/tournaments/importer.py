@@ -0,0 +1,272 @@
+import collections
+import csv
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from bettings.bets.models import SettlementJob
+from bettings.bets.settlement import settle_match
+from bettings.bets.live import EVENT_RESULT_POSTED, publish_match_event, schedule_match_closing
+from bettings.bets.window import invalidate_bet_window
+from bettings.utils.db import get_batch_size
+from .cache import bump_tournament_version
+from .constants import ErrorResponse
+from .models import Tournament, Team, Match, MatchResult, get_odds_choices
+
+logger = logging.getLogger(__name__)
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"
+FORMATS = (FORMAT_CSV, FORMAT_JSON)
+COLUMNS = ("tournament", "tournament_start_date", "tournament_end_date", "home", "guest", "start_time", "odds",
+           "home_goals", "guest_goals")
+# values per "IN (...)" lookup, keeps the preloading queries under the SQLite variable limit
+LOOKUP_BATCH_SIZE = 500
+ODDS = {Decimal(str(odds)) for odds, _ in get_odds_choices()}
+
+FixtureRow = collections.namedtuple("FixtureRow", ["line", "tournament_key", "tournament_end_date", "home", "guest",
+                                                   "start_time", "odds", "goals"])
+
+
+class FixtureError(Exception):
+    def __init__(self, errors: list):
+        super().__init__("{} invalid rows".format(len(errors)))
+        self.errors = errors
+
+
+def read_rows(stream, fixture_format: str) -> list:
+    """Read raw fixture rows, one dict per match with the keys of COLUMNS.
+
+    Raise ValueError when the file cannot be parsed, rows that are not dicts are reported by parse_row.
+    """
+    if fixture_format == FORMAT_JSON:
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError("a JSON fixture must be a list of rows")
+        return rows
+    return list(csv.DictReader(stream))
+
+
+def _batches(values, size=LOOKUP_BATCH_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _error(line: int, error: ErrorResponse = None, message: str = None) -> str:
+    return "Row {}: {}".format(line, message or error.message)
+
+
+def parse_row(line: int, raw: dict, errors: list):
+    """Parse and check one raw row on its own, return None and append to ``errors`` when it is invalid."""
+    if not isinstance(raw, dict):
+        errors.append(_error(line, message="a row must be an object with the keys {}".format(", ".join(COLUMNS))))
+        return None
+    raw = {column: (str(raw.get(column) if raw.get(column) is not None else "")).strip() for column in COLUMNS}
+    count = len(errors)
+    for column in ("tournament", "tournament_start_date", "tournament_end_date", "home", "guest", "start_time"):
+        if not raw[column]:
+            errors.append(_error(line, message="{} is required".format(column)))
+    if len(errors) > count:
+        return None
+    start_date = parse_date(raw["tournament_start_date"])
+    end_date = parse_date(raw["tournament_end_date"])
+    start_time = parse_datetime(raw["start_time"])
+    if start_date is None or end_date is None or start_time is None:
+        errors.append(_error(line, message="dates must be YYYY-MM-DD and start_time an ISO 8601 datetime"))
+        return None
+    if timezone.is_naive(start_time):
+        start_time = timezone.make_aware(start_time)
+    try:
+        odds = Decimal(raw["odds"] or 0)
+    except InvalidOperation:
+        odds = None
+    if odds not in ODDS:
+        errors.append(_error(line, message="odds must be a multiple of 0.25 between -5 and 4.75"))
+    goals = None
+    if raw["home_goals"] or raw["guest_goals"]:
+        if not (raw["home_goals"].isdigit() and raw["guest_goals"].isdigit()):
+            errors.append(_error(line, message="a result needs home_goals and guest_goals as non-negative numbers"))
+        else:
+            goals = (int(raw["home_goals"]), int(raw["guest_goals"]))
+    if start_date > end_date:
+        errors.append(_error(line, ErrorResponse.TOURNAMENT_START_DATE_AFTER_END_DATE))
+    if raw["home"] == raw["guest"]:
+        errors.append(_error(line, ErrorResponse.MATCH_HAVE_ONLY_ONE_TEAM))
+    if len(errors) > count:
+        return None
+    return FixtureRow(line, (raw["tournament"], start_date), end_date, raw["home"], raw["guest"], start_time, odds,
+                      goals)
+
+
+class FixtureImporter:
+    """Import tournaments, teams, matches and results with a handful of queries per batch of rows.
+
+    Every row is validated against lookups preloaded in memory before anything is written, the import is
+    all or nothing. Rows of matches that already exist only add their result when the match has none yet,
+    so a results file can be imported over the fixtures imported earlier.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.stats = collections.Counter()
+
+    def get_batch_size(self, model, objs) -> int:
+        return get_batch_size(model, objs, self.batch_size)
+
+    def parse(self, raw_rows) -> list:
+        errors = []
+        rows = [parse_row(line, raw, errors) for line, raw in enumerate(raw_rows, 1)]
+        if errors:
+            raise FixtureError(errors)
+        return rows
+
+    def load_tournaments(self, rows) -> dict:
+        names = {row.tournament_key[0] for row in rows}
+        tournaments = {}
+        for batch in _batches(names):
+            for tournament in Tournament.objects.filter(name__in=batch):
+                tournaments[(tournament.name, tournament.start_date)] = tournament
+        return tournaments
+
+    def load_teams(self, names) -> dict:
+        teams = {}
+        for batch in _batches(names):
+            teams.update(Team.objects.filter(name__in=batch).values_list("name", "pk"))
+        return teams
+
+    def load_matches(self, tournament_pks) -> dict:
+        """Map (tournament_pk, home_pk, guest_pk, start_time) of existing matches to (match_pk, odds, has_result)."""
+        matches = {}
+        for batch in _batches(tournament_pks):
+            rows = Match.objects.filter(tournament_id__in=batch).values_list(
+                "tournament_id", "home_id", "guest_id", "start_time", "pk", "odds", "result__id")
+            for tournament_pk, home_pk, guest_pk, start_time, match_pk, odds, result_pk in rows:
+                matches[(tournament_pk, home_pk, guest_pk, start_time)] = (match_pk, odds, result_pk is not None)
+        return matches
+
+    def validate(self, rows, tournaments: dict) -> list:
+        errors = []
+        end_dates = {}
+        seen = {}
+        for row in rows:
+            tournament = tournaments.get(row.tournament_key)
+            start_date = row.tournament_key[1]
+            if tournament is not None:
+                end_date = tournament.end_date
+            else:
+                end_date = end_dates.setdefault(row.tournament_key, row.tournament_end_date)
+            if row.tournament_end_date != end_date:
+                errors.append(_error(row.line, message="tournament end date differs from the known end date"))
+            start_time = timezone.localtime(row.start_time).date()
+            if start_time < start_date:
+                errors.append(_error(row.line, ErrorResponse.MATCH_START_TIME_BEFORE_START_DATE))
+            elif start_time > end_date:
+                errors.append(_error(row.line, ErrorResponse.MATCH_START_TIME_AFTER_END_DATE))
+            key = (row.tournament_key, row.home, row.guest, row.start_time)
+            if key in seen:
+                errors.append(_error(row.line, message="same match as row {}".format(seen[key])))
+            seen.setdefault(key, row.line)
+        return errors
+
+    def create_tournaments(self, rows, tournaments: dict):
+        missing = {}
+        for row in rows:
+            if row.tournament_key not in tournaments:
+                missing.setdefault(row.tournament_key, Tournament(name=row.tournament_key[0],
+                                                                  start_date=row.tournament_key[1],
+                                                                  end_date=row.tournament_end_date))
+        if missing:
+            new_tournaments = list(missing.values())
+            Tournament.objects.bulk_create(new_tournaments, batch_size=self.get_batch_size(Tournament, new_tournaments))
+            # bulk_create only sets primary keys on PostgreSQL
+            tournaments.update(self.load_tournaments(rows))
+        self.stats["tournaments"] += len(missing)
+
+    def create_teams(self, rows) -> dict:
+        names = {row.home for row in rows} | {row.guest for row in rows}
+        teams = self.load_teams(names)
+        missing = names.difference(teams)
+        if missing:
+            new_teams = [Team(name=name) for name in sorted(missing)]
+            Team.objects.bulk_create(new_teams, batch_size=self.get_batch_size(Team, new_teams))
+            teams.update(self.load_teams(missing))
+        self.stats["teams"] += len(missing)
+        return teams
+
+    def add_teams_to_tournaments(self, rows, tournaments: dict, teams: dict):
+        Membership = Team.tournaments.through
+        pairs = {(tournaments[row.tournament_key].pk, teams[name]) for row in rows for name in (row.home, row.guest)}
+        tournament_pks = {tournament_pk for tournament_pk, _ in pairs}
+        existing = set()
+        for batch in _batches(tournament_pks):
+            existing.update(Membership.objects.filter(tournament_id__in=batch).values_list("tournament_id", "team_id"))
+        memberships = [Membership(tournament_id=tournament_pk, team_id=team_pk)
+                       for tournament_pk, team_pk in sorted(pairs - existing)]
+        Membership.objects.bulk_create(memberships, batch_size=self.get_batch_size(Membership, memberships))
+
+    def create_matches(self, rows, tournaments: dict, teams: dict) -> list:
+        """Create the new matches and their results, return the pks of the matches that got a result."""
+        tournament_pks = {tournament.pk for tournament in tournaments.values()}
+        matches = self.load_matches(tournament_pks)
+
+        def get_key(row):
+            return tournaments[row.tournament_key].pk, teams[row.home], teams[row.guest], row.start_time
+
+        new_matches = [Match(tournament_id=key[0], home_id=key[1], guest_id=key[2], start_time=key[3], odds=row.odds)
+                       for row, key in ((row, get_key(row)) for row in rows) if key not in matches]
+        if new_matches:
+            Match.objects.bulk_create(new_matches, batch_size=self.get_batch_size(Match, new_matches))
+            matches = self.load_matches(tournament_pks)
+            for match in new_matches:
+                match.pk = matches[(match.tournament_id, match.home_id, match.guest_id, match.start_time)][0]
+                schedule_match_closing(match)
+        self.stats["matches"] += len(new_matches)
+
+        results = []
+        for row in rows:
+            match_pk, odds, has_result = matches[get_key(row)]
+            if row.goals is not None and not has_result:
+                result = MatchResult(match_id=match_pk, home_goals=row.goals[0], guest_goals=row.goals[1])
+                results.append(result.classify(odds))
+        MatchResult.objects.bulk_create(results, batch_size=self.get_batch_size(MatchResult, results))
+        self.stats["results"] += len(results)
+        return [result.match_id for result in results]
+
+    def request_settlements(self, match_pks: list):
+        """Settle the imported results like MatchResult.save() would, queuing every job with one insert."""
+        if not match_pks:
+            return
+        for match_pk in match_pks:
+            invalidate_bet_window(match_pk)
+            publish_match_event(match_pk, EVENT_RESULT_POSTED)
+        if settings.SETTLEMENT_ASYNC:
+            jobs = [SettlementJob(match_id=match_pk) for match_pk in match_pks]
+            SettlementJob.objects.bulk_create(jobs, batch_size=self.get_batch_size(SettlementJob, jobs))
+            self.stats["settlement_jobs"] += len(match_pks)
+            return
+        for batch in _batches(match_pks):
+            for match in Match.objects.filter(pk__in=batch).select_related("result"):
+                settle_match(match)
+
+    def run(self, raw_rows) -> collections.Counter:
+        rows = self.parse(raw_rows)
+        tournaments = self.load_tournaments(rows)
+        errors = self.validate(rows, tournaments)
+        if errors:
+            raise FixtureError(errors)
+        with transaction.atomic():
+            self.create_tournaments(rows, tournaments)
+            teams = self.create_teams(rows)
+            self.add_teams_to_tournaments(rows, tournaments, teams)
+            settled_match_pks = self.create_matches(rows, tournaments, teams)
+            self.request_settlements(settled_match_pks)
+            # bulk inserts send no signals, drop the cached match list pages by hand
+            for tournament_pk in {tournaments[row.tournament_key].pk for row in rows}:
+                bump_tournament_version(tournament_pk)
+        logger.info("Imported fixtures [{}]".format(dict(self.stats)))
+        return self.stats
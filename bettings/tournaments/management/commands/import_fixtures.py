@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bettings.tournaments.importer import FORMATS, FORMAT_CSV, FORMAT_JSON, FixtureError, FixtureImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Import tournaments, teams, matches and results from a CSV file or a JSON list of rows with the columns "
+            "tournament, tournament_start_date, tournament_end_date, home, guest, start_time, odds, home_goals "
+            "and guest_goals.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per INSERT statement.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fixture_format = options["format"]
+        if fixture_format is None:
+            fixture_format = FORMAT_JSON if os.path.splitext(path)[1].lower() == ".json" else FORMAT_CSV
+        try:
+            with open(path, newline="") as stream:
+                raw_rows = read_rows(stream, fixture_format)
+        except (OSError, ValueError) as e:
+            raise CommandError("Cannot read [{}]: {}".format(path, e))
+        try:
+            stats = FixtureImporter(batch_size=options["batch_size"]).run(raw_rows)
+        except FixtureError as e:
+            for error in e.errors[:50]:
+                self.stderr.write(error)
+            raise CommandError("Nothing imported, [{}] rows are invalid".format(len(e.errors)))
+        self.stdout.write("Imported {} tournaments, {} teams, {} matches and {} results, queued {} settlement jobs"
+                          .format(stats["tournaments"], stats["teams"], stats["matches"], stats["results"],
+                                  stats["settlement_jobs"]))
@@ -0,0 +1,34 @@
+# Generated by Django 2.0.7 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+def create_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # creating the extension needs a role allowed to run CREATE EXTENSION
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # icontains and istartswith compare UPPER(name), so the index is built on the same expression
+    schema_editor.execute("CREATE INDEX IF NOT EXISTS tournament_name_trgm_idx "
+                          "ON tournaments_tournament USING gin (UPPER(name) gin_trgm_ops)")
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS tournament_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['start_date', 'end_date'], name='tournament_date_range_idx'),
+        ),
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
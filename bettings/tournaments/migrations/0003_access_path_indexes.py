@@ -0,0 +1,25 @@
+# Generated by Django 2.0.7 on 2026-10-17 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0002_tournament_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'start_time'], name='match_tournament_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['home', 'start_time'], name='match_home_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['guest', 'start_time'], name='match_guest_start_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.0.7 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+from bettings.tournaments.outcomes import classify, get_profitability_ratio
+
+
+def classify_results(apps, schema_editor):
+    MatchResult = apps.get_model("tournaments", "MatchResult")
+    for result in MatchResult.objects.select_related("match").iterator():
+        result.ratio = get_profitability_ratio(result.home_goals, result.guest_goals, result.match.odds)
+        result.outcome = classify(result.ratio)
+        result.save(update_fields=["ratio", "outcome"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchresult',
+            name='ratio',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='matchresult',
+            name='outcome',
+            field=models.CharField(choices=[('home_win', 'Home win'), ('home_half_win', 'Home half win'), ('push', 'Push'), ('home_half_loss', 'Home half loss'), ('away_win', 'Away win')], editable=False, max_length=16, null=True),
+        ),
+        migrations.RunPython(classify_results, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='matchresult',
+            name='ratio',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name='matchresult',
+            name='outcome',
+            field=models.CharField(choices=[('home_win', 'Home win'), ('home_half_win', 'Home half win'), ('push', 'Push'), ('home_half_loss', 'Home half loss'), ('away_win', 'Away win')], editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='matchresult',
+            index=models.Index(fields=['outcome'], name='matchresult_outcome_idx'),
+        ),
+    ]
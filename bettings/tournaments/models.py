@@ -1,11 +1,13 @@
 import datetime
 import logging
+from decimal import Decimal
 from django.db import models
 from django.utils import timezone
 
-from bettings.bets.models import Bet
+from bettings.bets.settlement import request_settlement
 from .constants import ErrorResponse
 from .exceptions import InvalidRequestException
+from .outcomes import OUTCOME_CHOICES, classify, get_profitability_ratio
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,11 @@ class Tournament(TimestampedModel):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["start_date", "end_date"], name="tournament_date_range_idx"),
+        ]
+
     def get_year(self):
         return self.start_date.year
 
@@ -56,27 +63,54 @@ class Match(TimestampedModel):
     guest = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="guest_matches")
     odds = models.DecimalField(max_digits=3, decimal_places=2, choices=get_odds_choices(), default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["tournament", "start_time"], name="match_tournament_start_idx"),
+            models.Index(fields=["home", "start_time"], name="match_home_start_idx"),
+            models.Index(fields=["guest", "start_time"], name="match_guest_start_idx"),
+        ]
+
     def has_result(self):
         return hasattr(self, "result") and self.result is not None
 
-    def get_profitability_ratio(self) -> float:
+    def get_profitability_ratio(self) -> Decimal:
+        if not self.has_result():
+            raise InvalidRequestException(ErrorResponse.MATCH_HAS_NO_RESULT)
+        return self.result.ratio
+
+    def get_outcome(self) -> str:
         if not self.has_result():
             raise InvalidRequestException(ErrorResponse.MATCH_HAS_NO_RESULT)
-        ratio = self.result.home_goals - (self.result.guest_goals + self.odds)
-        logger.info("Profitability ratio of match [{}] is [{}]".format(self.pk, ratio))
-        return ratio
+        return self.result.outcome
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored odds so save() can detect a change without fetching the row again
+        instance._loaded_odds = instance.__dict__.get("odds")
+        return instance
+
+    def get_loaded_odds(self):
+        loaded_odds = getattr(self, "_loaded_odds", None)
+        if loaded_odds is None:
+            loaded_odds = Match.objects.filter(pk=self.pk).values_list("odds", flat=True).first()
+        return loaded_odds
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         if not self.pk:
             # create new match
-            return super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
-        old_match = Match.objects.get(pk=self.pk)
-        if not old_match.has_result() or old_match.odds == self.odds:
-            # old match does not have result yet or odds not change
-            return super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+            super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+            self._loaded_odds = self.odds
+            return
+        odds_changed = self.get_loaded_odds() != self.odds
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
-        # update bet result
-        self.result.save()
+        self._loaded_odds = self.odds
+        if odds_changed and self.has_result():
+            # re-classify the result, then re-settle bets, only the ones whose result changes are written
+            logger.info("Odds of match [{}] changed after its result, re-settling its bets".format(self.pk))
+            self.result.classify(self.odds)
+            MatchResult.objects.filter(pk=self.result.pk).update(ratio=self.result.ratio, outcome=self.result.outcome)
+            request_settlement(self)
         return
 
     def __str__(self):
@@ -87,15 +121,36 @@ class MatchResult(TimestampedModel):
     match = models.OneToOneField(Match, on_delete=models.CASCADE, related_name="result")
     home_goals = models.PositiveIntegerField()
     guest_goals = models.PositiveIntegerField()
+    # derived from the goals and the odds of the match, stored so settlement and reports need no arithmetic
+    ratio = models.DecimalField(max_digits=6, decimal_places=2, editable=False)
+    outcome = models.CharField(max_length=16, choices=OUTCOME_CHOICES, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["outcome"], name="matchresult_outcome_idx"),
+        ]
+
+    def classify(self, odds=None):
+        """Compute the profitability ratio and handicap outcome, ``odds`` defaults to the odds of the match.
+
+        Call it before ``bulk_create``, which skips ``save()``.
+        """
+        if odds is None:
+            odds = self.match.odds
+        self.ratio = get_profitability_ratio(self.home_goals, self.guest_goals, odds)
+        self.outcome = classify(self.ratio)
+        logger.info("Result of match [{}] has ratio [{}] and outcome [{}]"
+                    .format(self.match_id, self.ratio, self.outcome))
+        return self
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        self.classify()
+        if update_fields is not None:
+            update_fields = set(update_fields) | {"ratio", "outcome"}
         super().save(force_insert, force_update, using, update_fields)
         # update bet result
         logger.info("Updating all bet results of match [{}]".format(self.match.pk))
-        bets = Bet.objects.filter(match=self.match)
-        for bet in bets:
-            bet.update_result()
-        logger.info("Updated all bet results of match [{}] successfully".format(self.match.pk))
+        request_settlement(self.match)
         return
 
     def __str__(self):
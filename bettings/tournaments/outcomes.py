@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+HOME_WIN = "home_win"
+HOME_HALF_WIN = "home_half_win"
+PUSH = "push"
+HOME_HALF_LOSS = "home_half_loss"
+AWAY_WIN = "away_win"
+OUTCOME_CHOICES = (
+    (HOME_WIN, "Home win"),
+    (HOME_HALF_WIN, "Home half win"),
+    (PUSH, "Push"),
+    (HOME_HALF_LOSS, "Home half loss"),
+    (AWAY_WIN, "Away win"),
+)
+
+HALF = Decimal("0.5")
+QUARTER = Decimal("0.25")
+
+# (home, guest) multipliers applied to the bet amount for each handicap outcome
+PAYOUT_FACTORS = {
+    HOME_WIN: (Decimal(1), Decimal(-1)),
+    HOME_HALF_WIN: (HALF, -HALF),
+    PUSH: (Decimal(0), Decimal(0)),
+    HOME_HALF_LOSS: (-HALF, HALF),
+    AWAY_WIN: (Decimal(-1), Decimal(1)),
+}
+
+
+def get_profitability_ratio(home_goals: int, guest_goals: int, odds) -> Decimal:
+    return Decimal(home_goals) - (Decimal(guest_goals) + Decimal(str(odds)))
+
+
+def classify(ratio: Decimal) -> str:
+    """Return the handicap outcome of a profitability ratio, odds move in quarter goals."""
+    if ratio >= HALF:
+        return HOME_WIN
+    elif ratio == QUARTER:
+        return HOME_HALF_WIN
+    elif ratio == 0:
+        return PUSH
+    elif ratio == -QUARTER:
+        return HOME_HALF_LOSS
+    return AWAY_WIN
+
+
+def get_payout_factors(outcome: str) -> tuple:
+    return PAYOUT_FACTORS[outcome]
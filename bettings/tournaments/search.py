@@ -0,0 +1,20 @@
+from django.db import connections
+from django.db.models import Case, When, Value, IntegerField
+
+
+def search_tournaments(queryset, name: str):
+    """Filter tournaments whose name contains ``name`` in any case, best matches first.
+
+    Names starting with the search term rank first. On PostgreSQL the trigram similarity breaks ties
+    and the lookups are served by the trigram index on UPPER(name), other databases fall back to
+    newest first.
+    """
+    queryset = queryset.filter(name__icontains=name).annotate(
+        prefix_match=Case(When(name__istartswith=name, then=Value(1)), default=Value(0), output_field=IntegerField()))
+    ordering = ["-prefix_match"]
+    if connections[queryset.db].vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.annotate(similarity=TrigramSimilarity("name", name))
+        ordering.append("-similarity")
+    return queryset.order_by(*ordering, "-start_date")
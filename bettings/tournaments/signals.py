@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .cache import bump_tournament_version
+from .models import Tournament, Team, Match, MatchResult
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def invalidate_tournament(sender, instance, **kwargs):
+    bump_tournament_version(instance.pk)
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def invalidate_match(sender, instance, **kwargs):
+    bump_tournament_version(instance.tournament_id)
+
+
+@receiver(post_save, sender=MatchResult)
+@receiver(post_delete, sender=MatchResult)
+def invalidate_match_result(sender, instance, **kwargs):
+    bump_tournament_version(instance.match.tournament_id)
+
+
+@receiver(post_save, sender=Team)
+def invalidate_team(sender, instance, created, **kwargs):
+    if created:
+        return
+    for tournament_pk in instance.tournaments.values_list("pk", flat=True):
+        bump_tournament_version(tournament_pk)
+
+
+@receiver(m2m_changed, sender=Team.tournaments.through)
+def invalidate_team_tournaments(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # teams of a tournament changed
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_tournament_version(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        for tournament_pk in pk_set:
+            bump_tournament_version(tournament_pk)
+    elif action == "pre_clear":
+        for tournament_pk in instance.tournaments.values_list("pk", flat=True):
+            bump_tournament_version(tournament_pk)
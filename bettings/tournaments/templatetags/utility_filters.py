@@ -51,6 +51,15 @@ def get_url_with_query_paging(url):
     return url
 
 
+@register.filter(name="remove_cursor")
+def get_url_without_cursor(url):
+    url = str(url)
+    url = re.sub(r"[?&](cursor|page)=[^&]*", "", url)
+    if "?" not in url:
+        url = url.replace("&", "?", 1) if "&" in url else url + "?"
+    return url
+
+
 @register.filter(name="display_profit")
 def display_profit_html(value):
     if value == 0:
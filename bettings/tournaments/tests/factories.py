@@ -0,0 +1,47 @@
+import datetime
+
+from django.utils import timezone
+from factory import DjangoModelFactory, Faker, LazyFunction, SubFactory, post_generation
+
+from bettings.tournaments.models import Tournament, Team, Match, MatchResult
+
+
+class TournamentFactory(DjangoModelFactory):
+    name = Faker("word")
+    start_date = LazyFunction(lambda: datetime.date.today() - datetime.timedelta(days=30))
+    end_date = LazyFunction(lambda: datetime.date.today() + datetime.timedelta(days=30))
+
+    class Meta:
+        model = Tournament
+
+
+class TeamFactory(DjangoModelFactory):
+    name = Faker("city")
+
+    @post_generation
+    def tournaments(self, create: bool, extracted, **kwargs):
+        if create and extracted:
+            self.tournaments.add(*extracted)
+
+    class Meta:
+        model = Team
+
+
+class MatchFactory(DjangoModelFactory):
+    tournament = SubFactory(TournamentFactory)
+    home = SubFactory(TeamFactory)
+    guest = SubFactory(TeamFactory)
+    start_time = LazyFunction(lambda: timezone.now() + datetime.timedelta(days=1))
+    odds = 0
+
+    class Meta:
+        model = Match
+
+
+class MatchResultFactory(DjangoModelFactory):
+    match = SubFactory(MatchFactory)
+    home_goals = 0
+    guest_goals = 0
+
+    class Meta:
+        model = MatchResult
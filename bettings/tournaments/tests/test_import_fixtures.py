@@ -0,0 +1,125 @@
+import csv
+import datetime
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from bettings.bets.models import Bet, SettlementJob
+from bettings.bets.settlement import run_pending_jobs
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.importer import COLUMNS
+from bettings.tournaments.models import Tournament, Team, Match, MatchResult
+
+pytestmark = pytest.mark.django_db
+
+
+def make_rows(count, tournament="Cup", results=False):
+    rows = []
+    for i in range(count):
+        rows.append({
+            "tournament": tournament,
+            "tournament_start_date": "2030-06-01",
+            "tournament_end_date": "2030-07-31",
+            "home": "Team {}".format(i * 2),
+            "guest": "Team {}".format(i * 2 + 1),
+            "start_time": (datetime.datetime(2030, 6, 1, 18) + datetime.timedelta(hours=i)).isoformat() + "+00:00",
+            "odds": "0.25",
+            "home_goals": "1" if results else "",
+            "guest_goals": "0" if results else "",
+        })
+    return rows
+
+
+def write_csv(tmpdir, rows, name="fixtures.csv"):
+    path = tmpdir.join(name)
+    with open(path.strpath, "w", newline="") as stream:
+        writer = csv.DictWriter(stream, COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path.strpath
+
+
+def write_json(tmpdir, payload):
+    path = tmpdir.join("fixtures.json")
+    path.write(json.dumps(payload))
+    return path.strpath
+
+
+def import_queries(path) -> int:
+    with CaptureQueriesContext(connection) as context:
+        call_command("import_fixtures", path, stdout=None)
+    return len(context.captured_queries)
+
+
+def test_import_creates_tournaments_teams_and_matches(tmpdir):
+    call_command("import_fixtures", write_csv(tmpdir, make_rows(3)), stdout=None)
+
+    tournament = Tournament.objects.get(name="Cup")
+    assert tournament.matches.count() == 3
+    assert tournament.teams.count() == 6
+    assert Team.objects.count() == 6
+    assert not MatchResult.objects.exists()
+
+
+def test_import_query_count_does_not_grow_with_rows(tmpdir):
+    few = import_queries(write_csv(tmpdir, make_rows(2, "Small Cup"), "small.csv"))
+    many = import_queries(write_csv(tmpdir, make_rows(40, "Big Cup"), "big.csv"))
+
+    assert many == few
+    assert Match.objects.count() == 42
+
+
+def test_import_beyond_the_backend_batch_limit(tmpdir):
+    call_command("import_fixtures", write_csv(tmpdir, make_rows(300, results=True)), stdout=None)
+
+    assert Match.objects.count() == 300
+    assert MatchResult.objects.count() == 300
+
+
+def test_invalid_rows_abort_the_whole_import(tmpdir):
+    rows = make_rows(3)
+    rows[1]["guest"] = rows[1]["home"]
+    rows[2]["start_time"] = "2030-08-02T18:00:00+00:00"
+
+    with pytest.raises(CommandError):
+        call_command("import_fixtures", write_csv(tmpdir, rows), stdout=None, stderr=None)
+
+    assert not Tournament.objects.exists()
+    assert not Team.objects.exists()
+
+
+def test_json_fixture_must_be_a_list(tmpdir):
+    with pytest.raises(CommandError, match="must be a list of rows"):
+        call_command("import_fixtures", write_json(tmpdir, make_rows(1)[0]), stdout=None, stderr=None)
+
+    assert not Tournament.objects.exists()
+
+
+def test_json_rows_must_be_objects(tmpdir):
+    with pytest.raises(CommandError, match=r"\[2\] rows are invalid"):
+        call_command("import_fixtures", write_json(tmpdir, make_rows(1) + [["Cup"], "Cup"]), stdout=None,
+                     stderr=None)
+
+    assert not Tournament.objects.exists()
+
+
+def test_results_imported_later_are_settled(tmpdir, settings):
+    settings.SETTLEMENT_ASYNC = True
+    call_command("import_fixtures", write_csv(tmpdir, make_rows(2)), stdout=None)
+    match = Match.objects.order_by("start_time").first()
+    bet = BetFactory(match=match, choice=match.home, amount=20000)
+
+    path = tmpdir.join("results.json").strpath
+    with open(path, "w") as stream:
+        json.dump(make_rows(2, results=True), stream)
+    call_command("import_fixtures", path, stdout=None)
+    run_pending_jobs()
+
+    assert Match.objects.count() == 2
+    assert MatchResult.objects.count() == 2
+    assert SettlementJob.objects.filter(status=SettlementJob.STATUS_DONE).count() == 2
+    assert Bet.objects.get(pk=bet.pk).result == 20000
@@ -0,0 +1,86 @@
+import datetime
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory, TournamentFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def get_match_list(client, tournament, **params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(reverse("tournaments:match_list", args=[tournament.pk]), params)
+    assert response.status_code == 200
+    # savepoints come from ATOMIC_REQUESTS, not from loading the page
+    return response, len([query for query in context.captured_queries if "SAVEPOINT" not in query["sql"]])
+
+
+def test_second_hit_is_served_from_cache(client):
+    tournament = TournamentFactory()
+    MatchFactory.create_batch(3, tournament=tournament)
+
+    first, first_queries = get_match_list(client, tournament)
+    second, second_queries = get_match_list(client, tournament)
+
+    assert first_queries > 0
+    assert second_queries == 0
+    assert [m.pk for m in second.context["matches"]] == [m.pk for m in first.context["matches"]]
+    assert not second.context["is_paginated"]
+
+
+def test_filters_are_cached_separately(client):
+    tournament = TournamentFactory()
+    match = MatchFactory(tournament=tournament)
+    MatchFactory(tournament=tournament)
+
+    get_match_list(client, tournament)
+    response, _ = get_match_list(client, tournament, team_id=match.home.pk)
+
+    assert [m.pk for m in response.context["matches"]] == [match.pk]
+
+
+def test_result_invalidates_cached_pages(client):
+    tournament = TournamentFactory()
+    match = MatchFactory(tournament=tournament)
+    get_match_list(client, tournament)
+
+    MatchResult.objects.create(match=match, home_goals=2, guest_goals=1)
+    response, queries = get_match_list(client, tournament)
+
+    assert queries > 0
+    assert response.context["matches"][0].result.home_goals == 2
+    assert response.context["matches"][0].can_bet is False
+
+
+def test_match_change_only_invalidates_its_tournament(client):
+    tournament, other_tournament = TournamentFactory.create_batch(2)
+    match = MatchFactory(tournament=tournament)
+    MatchFactory(tournament=other_tournament)
+    get_match_list(client, tournament)
+    get_match_list(client, other_tournament)
+
+    match.odds = 1
+    match.save()
+
+    assert get_match_list(client, tournament)[1] > 0
+    assert get_match_list(client, other_tournament)[1] == 0
+
+
+def test_can_bet_flips_at_cutoff_for_cached_page(client):
+    tournament = TournamentFactory()
+    match = MatchFactory(tournament=tournament, start_time=timezone.now() + datetime.timedelta(hours=1))
+    response, _ = get_match_list(client, tournament)
+    assert response.context["matches"][0].can_bet is True
+
+    after_cutoff = match.start_time - datetime.timedelta(minutes=29)
+    with mock.patch("django.utils.timezone.now", return_value=after_cutoff):
+        response, queries = get_match_list(client, tournament)
+
+    assert queries == 0
+    assert response.context["matches"][0].can_bet is False
@@ -0,0 +1,35 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+
+from bettings.tournaments.models import Tournament
+from bettings.tournaments.search import search_tournaments
+from bettings.tournaments.tests.factories import TournamentFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_search_is_case_insensitive_substring_match():
+    cup = TournamentFactory(name="World Cup")
+    TournamentFactory(name="Premier League")
+
+    assert list(search_tournaments(Tournament.objects.all(), "cup")) == [cup]
+
+
+def test_search_ranks_prefix_matches_first():
+    older = datetime.date(2010, 6, 1)
+    contains = TournamentFactory(name="FIFA World Cup", start_date=older.replace(year=2018), end_date=older)
+    prefix_old = TournamentFactory(name="World League", start_date=older, end_date=older)
+    prefix_new = TournamentFactory(name="world series", start_date=older.replace(year=2014), end_date=older)
+
+    assert list(search_tournaments(Tournament.objects.all(), "WORLD")) == [prefix_new, prefix_old, contains]
+
+
+def test_tournament_list_uses_search(client):
+    cup = TournamentFactory(name="Asian Cup")
+    TournamentFactory(name="Euro")
+
+    response = client.get(reverse("tournaments:list"), {"name": "asian"})
+
+    assert list(response.context["tournaments"]) == [cup]
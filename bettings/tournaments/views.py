@@ -1,23 +1,33 @@
 import datetime
 import logging
-from django.db.models import Case, When, Value, BooleanField
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
 from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, reverse
 from django.utils import timezone
 from django.views.generic import ListView
 
+from bettings.utils.fragments import RowFragmentCache
+from bettings.utils.pagination import KeysetPaginationMixin, get_keyset_page
+from bettings.utils.transactions import TransactionPolicyMixin, READ_ONLY
+from .cache import get_cache_timeout, get_tournament_version, make_page_key
 from .models import Tournament, Match
+from .search import search_tournaments
 
 logger = logging.getLogger(__name__)
 
 
 # Create your views here.
-class TournamentListView(ListView):
+class TournamentListView(TransactionPolicyMixin, ListView):
     model = Tournament
     template_name = "tournaments/tournament_list.html"
     context_object_name = "tournaments"
     paginate_by = 10
+    query_budget = 4
+    transaction_policy = READ_ONLY
+    read_replica = True
 
     def get_queryset(self):
         return Tournament.objects.all().order_by("-start_date")
@@ -37,7 +47,7 @@ class TournamentListView(ListView):
         log_search = "Get all tournaments"
         if self.name:
             log_search += ", by name contains [{}]".format(self.name)
-            queryset = queryset.filter(name__contains=self.name)
+            queryset = search_tournaments(queryset, self.name)
         if self.start_date:
             try:
                 date = datetime.datetime.strptime(self.start_date, "%Y-%m-%d")
@@ -70,27 +80,71 @@ class TournamentListView(ListView):
         return self.render_to_response(context)
 
 
-class MatchListView(ListView):
+def get_match_row_key(match) -> tuple:
+    result = match.result if match.has_result() else None
+    return (match.pk, match.modified_at, result and result.modified_at, match.home.modified_at,
+            match.guest.modified_at, match.can_bet)
+
+
+match_rows = RowFragmentCache("match_row", "tournaments/match_row.html", "match", get_match_row_key)
+
+
+class MatchListView(TransactionPolicyMixin, KeysetPaginationMixin, ListView):
     model = Match
     template_name = "tournaments/match_list.html"
     context_object_name = "matches"
     paginate_by = 20
+    key_fields = ("start_time", "pk")
+    query_budget = 5
+    transaction_policy = READ_ONLY
+    read_replica = True
+
+    def get_tournament(self):
+        """Load the tournament and its teams from the versioned page cache.
+
+        Cache misses read from the primary: a lagging replica would store rows from before the write that
+        bumped the version under the new version, where no later write invalidates them.
+        """
+        tournament_pk = self.kwargs.get("tournament_pk")
+        self.cache_version = get_tournament_version(tournament_pk)
+        key = make_page_key("tournament", tournament_pk, self.cache_version)
+        cached = cache.get(key)
+        if cached is None:
+            tournament = get_object_or_404(Tournament.objects.using(DEFAULT_DB_ALIAS), pk=tournament_pk)
+            cached = (tournament, list(tournament.teams.using(DEFAULT_DB_ALIAS)))
+            cache.set(key, cached, get_cache_timeout())
+        self.tournament, self.teams = cached
+        return self.tournament
 
     def get_queryset(self):
-        self.tournament = get_object_or_404(Tournament, pk=self.kwargs.get("tournament_pk"))
-        last_bet_time = timezone.now() + datetime.timedelta(minutes=30)
-        matches = self.tournament.matches.filter(tournament=self.tournament).annotate(
-            can_bet=Case(When(start_time__gte=last_bet_time, result=None, then=Value(True)),
-                         default=Value(False),
-                         output_field=BooleanField()))
+        self.get_tournament()
+        matches = self.tournament.matches.filter(tournament=self.tournament).select_related("home", "guest", "result")
         return matches.order_by("start_time")
 
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.get_cursor()
+        key = make_page_key("matches", self.tournament.pk, self.cache_version, self.filter_start_date,
+                            self.filter_end_date, self.filter_team_id, page_size, cursor)
+        page = cache.get(key)
+        if page is None:
+            page = get_keyset_page(queryset.using(DEFAULT_DB_ALIAS), self.key_fields, page_size, cursor)
+            cache.set(key, page, get_cache_timeout())
+        else:
+            logger.debug("Serving matches of tournament [{}] page [{}] from cache".format(self.tournament.pk, cursor))
+        # betting closes on time, so it is decided per request even for cached pages
+        last_bet_time = timezone.now() + datetime.timedelta(minutes=30)
+        for match in page.object_list:
+            match.can_bet = match.start_time >= last_bet_time and not match.has_result()
+        return None, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
         context["tournament"] = self.tournament
         context["start_date"] = self.filter_start_date
         context["end_date"] = self.filter_end_date
-        context["teams"] = list(self.tournament.teams.all())
+        context["teams"] = self.teams
+        context["match_rows"] = match_rows.render(context["matches"])
+        context["live_events"] = settings.LIVE_EVENTS_ENABLED
         if self.filter_team_id:
             context["team_id"] = int(self.filter_team_id)
         return context
@@ -3,6 +3,7 @@ from django.contrib.auth import admin as auth_admin
 from django.contrib.auth import get_user_model
 
 from bettings.users.forms import UserChangeForm, UserCreationForm
+from bettings.users.models import BalanceEntry
 
 User = get_user_model()
 
@@ -14,3 +15,12 @@ class UserAdmin(auth_admin.UserAdmin):
     fieldsets = (("User", {"fields": ("username",)}),) + auth_admin.UserAdmin.fieldsets
     list_display = ["username", "is_superuser"]
     search_fields = ["name"]
+
+
+@admin.register(BalanceEntry)
+class BalanceEntryAdmin(admin.ModelAdmin):
+    list_display = ["user", "amount", "kind", "bet", "compacted", "created_at"]
+    list_filter = ["kind", "compacted"]
+    list_select_related = ["user"]
+    raw_id_fields = ["user", "bet"]
+    search_fields = ["user__username"]
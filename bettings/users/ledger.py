@@ -0,0 +1,56 @@
+import logging
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from bettings.utils.db import get_batch_size
+from .models import User, BalanceEntry
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+DECIMAL_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def record_entries(entries: list) -> int:
+    """Append balance entries in bulk, the user rows are left untouched."""
+    BalanceEntry.objects.bulk_create(entries, batch_size=get_batch_size(BalanceEntry, entries, BATCH_SIZE))
+    return len(entries)
+
+
+def _sum_per_user(entries):
+    return Subquery(entries.filter(user=OuterRef("pk")).values("user").annotate(total=Sum("amount")).values("total"),
+                    output_field=DECIMAL_FIELD)
+
+
+def compact_balances() -> int:
+    """Fold the pending ledger entries into User.balance and return the number of entries compacted.
+
+    The pending entry ids are locked and read once, the balances and the compacted flags are both written
+    from that list, so an entry committed meanwhile is left pending for the next run instead of being lost.
+    """
+    with transaction.atomic():
+        entry_ids = list(BalanceEntry.objects.select_for_update().filter(compacted=False).order_by("pk")
+                         .values_list("pk", flat=True))
+        if not entry_ids:
+            return 0
+        # the ids of a batch appear twice in the balance update
+        batch_size = min(BATCH_SIZE, connection.ops.bulk_batch_size(["pk", "pk"], entry_ids))
+        for start in range(0, len(entry_ids), batch_size):
+            pending = BalanceEntry.objects.filter(pk__in=entry_ids[start:start + batch_size])
+            users = User.objects.filter(pk__in=pending.values("user"))
+            users.update(balance=F("balance") + _sum_per_user(pending))
+            pending.update(compacted=True)
+    logger.info("Compacted [{}] balance entries up to entry [{}]".format(len(entry_ids), entry_ids[-1]))
+    return len(entry_ids)
+
+
+def rebuild_balances() -> int:
+    """Recompute every User.balance from the full ledger and return the number of users rebuilt."""
+    with transaction.atomic():
+        last_entry_id = BalanceEntry.objects.aggregate(last=Max("pk"))["last"] or 0
+        entries = BalanceEntry.objects.filter(pk__lte=last_entry_id)
+        rebuilt = User.objects.update(balance=Coalesce(_sum_per_user(entries), Value(0), output_field=DECIMAL_FIELD))
+        entries.filter(compacted=False).update(compacted=True)
+    logger.info("Rebuilt the balance of [{}] users from the ledger".format(rebuilt))
+    return rebuilt
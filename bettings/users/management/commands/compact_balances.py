@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bettings.users.ledger import compact_balances
+
+
+class Command(BaseCommand):
+    help = "Fold pending balance ledger entries into User.balance, meant to be run periodically."
+
+    def handle(self, *args, **options):
+        compacted = compact_balances()
+        self.stdout.write("Compacted {} balance entries".format(compacted))
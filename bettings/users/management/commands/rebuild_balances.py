@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bettings.users.ledger import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute every User.balance from the full balance ledger."
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_balances()
+        self.stdout.write("Rebuilt the balance of {} users".format(rebuilt))
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from bettings.utils.db import get_batch_size
+
+
+def create_opening_entries(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    BalanceEntry = apps.get_model("users", "BalanceEntry")
+    entries = [BalanceEntry(user_id=user_id, amount=balance, kind="opening", compacted=True)
+               for user_id, balance in User.objects.exclude(balance=0).values_list("pk", "balance").iterator()]
+    batch_size = get_batch_size(BalanceEntry, entries, 1000, using=schema_editor.connection.alias)
+    BalanceEntry.objects.bulk_create(entries, batch_size=batch_size)
+
+
+def delete_opening_entries(apps, schema_editor):
+    BalanceEntry = apps.get_model("users", "BalanceEntry")
+    BalanceEntry.objects.filter(kind="opening").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0004_balanceentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_entries, delete_opening_entries),
+    ]
@@ -1,10 +1,40 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Sum
 from django.urls import reverse
 
 
 class User(AbstractUser):
+    # total of the compacted balance ledger entries, see get_balance() for the current balance
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     def get_absolute_url(self):
         return reverse("users:detail", kwargs={"username": self.username})
+
+    def get_balance(self):
+        pending = self.balance_entries.filter(compacted=False).aggregate(total=Sum("amount"))["total"]
+        return self.balance + (pending or 0)
+
+
+class BalanceEntry(models.Model):
+    KIND_OPENING = "opening"
+    KIND_SETTLEMENT = "settlement"
+    KIND_CHOICES = (
+        (KIND_OPENING, "Opening balance"),
+        (KIND_SETTLEMENT, "Bet settlement"),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="balance_entries")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=KIND_SETTLEMENT)
+    bet = models.ForeignKey("bets.Bet", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    compacted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "compacted"]),
+        ]
+
+    def __str__(self):
+        return "{} {} for {}".format(self.get_kind_display(), self.amount, self.user_id)
@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+import pytest
+
+from bettings.users import ledger
+from bettings.users.ledger import compact_balances, rebuild_balances, record_entries
+from bettings.users.models import BalanceEntry
+from bettings.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_get_balance_includes_pending_entries(user):
+    BalanceEntry.objects.create(user=user, amount=Decimal(10000))
+    BalanceEntry.objects.create(user=user, amount=Decimal(-2500))
+
+    assert user.get_balance() == Decimal(7500)
+    user.refresh_from_db()
+    assert user.balance == Decimal(0)
+
+
+def test_compact_balances_folds_pending_entries_once(user):
+    BalanceEntry.objects.create(user=user, amount=Decimal(10000))
+    BalanceEntry.objects.create(user=user, amount=Decimal(-2500))
+
+    assert compact_balances() == 2
+    assert compact_balances() == 0
+    user.refresh_from_db()
+    assert user.balance == Decimal(7500)
+    assert user.get_balance() == Decimal(7500)
+
+
+def test_compact_balances_in_batches(monkeypatch, user):
+    other = UserFactory()
+    for amount in (1000, 2000, 3000):
+        BalanceEntry.objects.create(user=user, amount=Decimal(amount))
+        BalanceEntry.objects.create(user=other, amount=Decimal(-amount))
+    monkeypatch.setattr(ledger, "BATCH_SIZE", 4)
+
+    assert compact_balances() == 6
+    user.refresh_from_db()
+    other.refresh_from_db()
+    assert (user.balance, other.balance) == (Decimal(6000), Decimal(-6000))
+    assert not BalanceEntry.objects.filter(compacted=False).exists()
+
+
+def test_record_entries_beyond_the_backend_batch_limit(user):
+    entries = [BalanceEntry(user=user, amount=Decimal(1)) for _ in range(ledger.BATCH_SIZE)]
+
+    assert record_entries(entries) == ledger.BATCH_SIZE
+    assert user.get_balance() == Decimal(ledger.BATCH_SIZE)
+
+
+def test_rebuild_balances_recomputes_from_the_whole_ledger(user):
+    BalanceEntry.objects.create(user=user, amount=Decimal(5000), kind=BalanceEntry.KIND_OPENING, compacted=True)
+    BalanceEntry.objects.create(user=user, amount=Decimal(1000))
+    user.balance = Decimal(999999)
+    user.save()
+
+    rebuild_balances()
+
+    user.refresh_from_db()
+    assert user.balance == Decimal(6000)
+    assert user.get_balance() == Decimal(6000)
@@ -3,30 +3,38 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse
 from django.views.generic import DetailView, ListView, RedirectView, UpdateView
 
+from bettings.utils.transactions import TransactionPolicyMixin, READ_ONLY, SHORT_WRITE
+
 User = get_user_model()
 
 
-class UserDetailView(LoginRequiredMixin, DetailView):
+class UserDetailView(TransactionPolicyMixin, LoginRequiredMixin, DetailView):
     model = User
     slug_field = "username"
     slug_url_kwarg = "username"
+    query_budget = 4
+    transaction_policy = READ_ONLY
 
 
 user_detail_view = UserDetailView.as_view()
 
 
-class UserListView(LoginRequiredMixin, ListView):
+class UserListView(TransactionPolicyMixin, LoginRequiredMixin, ListView):
     model = User
     slug_field = "username"
     slug_url_kwarg = "username"
+    query_budget = 3
+    transaction_policy = READ_ONLY
 
 
 user_list_view = UserListView.as_view()
 
 
-class UserUpdateView(LoginRequiredMixin, UpdateView):
+class UserUpdateView(TransactionPolicyMixin, LoginRequiredMixin, UpdateView):
     model = User
     fields = ["first_name", "last_name"]
+    query_budget = 3
+    transaction_policy = SHORT_WRITE
 
     def get_success_url(self):
         return reverse("users:detail", kwargs={"username": self.request.user.username})
@@ -38,8 +46,10 @@ class UserUpdateView(LoginRequiredMixin, UpdateView):
 user_update_view = UserUpdateView.as_view()
 
 
-class UserRedirectView(LoginRequiredMixin, RedirectView):
+class UserRedirectView(TransactionPolicyMixin, LoginRequiredMixin, RedirectView):
     permanent = False
+    query_budget = 2
+    transaction_policy = READ_ONLY
 
     def get_redirect_url(self):
         return reverse("users:detail", kwargs={"username": self.request.user.username})
@@ -0,0 +1,9 @@
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+
+
+def exception_handler(exc, context):
+    """Render the apps' known exceptions with their error code and message, defer the rest to DRF."""
+    if getattr(exc, "is_know_exception", False):
+        return Response(exc.to_dict(), status=exc.status_code)
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,11 @@
+from django.db import connections
+
+
+def get_batch_size(model, objs: list, batch_size: int, using: str = "default") -> int:
+    """Cap a bulk_create batch size at the number of rows the database accepts in one statement.
+
+    Django 2.0 uses an explicit ``batch_size`` as is, SQLite rejects inserts of more than 500 rows.
+    """
+    limit = connections[using].ops.bulk_batch_size([field for field in model._meta.concrete_fields
+                                                    if not field.primary_key], objs)
+    return max(min(batch_size, limit), 1)
@@ -0,0 +1,82 @@
+import logging
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from .pool import ConnectionPool, PoolTimeout, get_pool
+
+logger = logging.getLogger(__name__)
+
+Database = base.Database
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 5,
+    "PRE_PING": True,
+    "MAX_LIFETIME": 1800,
+    "SLOW_CHECKOUT_SECONDS": 0.1,
+    "STATS_LOG_SECONDS": 60,
+}
+
+
+def ping(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def close(connection):
+    if not connection.closed:
+        connection.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend checking connections out of a process wide pool instead of opening one per thread.
+
+    Configure the pool with a ``POOL`` dict next to the database settings, see POOL_DEFAULTS. Closing the
+    connection at the end of a request gives it back to the pool, so ``CONN_MAX_AGE`` should be 0.
+    """
+
+    def get_pool(self, conn_params) -> ConnectionPool:
+        def create():
+            options = dict(POOL_DEFAULTS, **self.settings_dict.get("POOL", {}))
+            return ConnectionPool(
+                connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                close=close,
+                ping=ping,
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                pre_ping=options["PRE_PING"],
+                max_lifetime=options["MAX_LIFETIME"],
+                slow_checkout_seconds=options["SLOW_CHECKOUT_SECONDS"],
+                name=self.alias,
+                stats_log_seconds=options["STATS_LOG_SECONDS"],
+            )
+        return get_pool(self.alias, create)
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.get_pool(conn_params).acquire()
+        except PoolTimeout as e:
+            # surfaces as django.db.OperationalError
+            raise Database.OperationalError(str(e))
+        # the pool opened the connection for another wrapper, which recorded the isolation level
+        self.isolation_level = self.settings_dict["OPTIONS"].get("isolation_level", connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias)
+        connection = self.connection
+        # closed inside an atomic block, this wrapper keeps referencing the connection until the block exits
+        if connection.closed or self.in_atomic_block:
+            pool.release(connection, discard=True)
+            return
+        try:
+            # never hand an open transaction to the next checkout
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Database.Error:
+            logger.warning("Discarding a database connection that could not be rolled back", exc_info=True)
+            pool.release(connection, discard=True)
+            return
+        pool.release(connection)
@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# one pool per database alias, shared by the threads of the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PoolStats:
+    """Counters of a pool, ``wait_*`` measure how long checkouts waited for a free slot."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.ping_failures = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def as_dict(self) -> dict:
+        stats = dict(vars(self))
+        stats["wait_seconds_mean"] = self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+        return stats
+
+
+class ConnectionPool:
+    """Thread safe pool holding at most ``max_size`` open connections, idle or checked out.
+
+    A checkout waits up to ``timeout`` seconds for a free slot, then raises PoolTimeout. The most recently
+    returned connection is reused first, after a ``ping`` when ``pre_ping`` is set. Connections older than
+    ``max_lifetime`` seconds are closed instead of reused, so server side limits and failovers are picked up.
+    A forked child starts over with an empty pool, it never uses the connections of its parent. The
+    counters are logged every ``stats_log_seconds`` on checkout when set.
+    """
+
+    def __init__(self, connect, close, ping=None, max_size: int = 10, timeout: float = 5.0, pre_ping: bool = True,
+                 max_lifetime: float = None, slow_checkout_seconds: float = 0.1, name: str = "default",
+                 stats_log_seconds: float = None):
+        self.name = name
+        self.connect = connect
+        self.close = close
+        self.ping = ping
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pre_ping = pre_ping and ping is not None
+        self.max_lifetime = max_lifetime
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self.stats_log_seconds = stats_log_seconds
+        # connections of the parent process, kept referenced: closing them would end the parent's sessions
+        self._inherited = []
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.stats = PoolStats()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._created_at = {}
+        self._stats_logged_at = time.monotonic()
+
+    def _check_pid(self):
+        if self.pid == os.getpid():
+            return
+        logger.info("Dropping the [{}] database connections inherited from process [{}]"
+                    .format(len(self._created_at), self.pid))
+        self._inherited.extend(self._idle)
+        self._reset()
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    @property
+    def open_count(self) -> int:
+        return len(self._created_at)
+
+    def get_stats(self) -> dict:
+        return dict(self.stats.as_dict(), open=self.open_count, idle=self.idle_count, max_size=self.max_size)
+
+    def log_stats(self):
+        stats = self.get_stats()
+        logger.info("Database pool [{}]: [{}] checkouts, [{}] created, [{}] reused, [{}] timeouts, waited "
+                    "[{:.2f}ms] on average and [{:.2f}ms] at most, [{}] of [{}] connections open, [{}] idle".format(
+                        self.name, stats["checkouts"], stats["created"], stats["reused"], stats["timeouts"],
+                        stats["wait_seconds_mean"] * 1000, stats["wait_seconds_max"] * 1000, stats["open"],
+                        stats["max_size"], stats["idle"]))
+
+    def is_expired(self, connection) -> bool:
+        if self.max_lifetime is None:
+            return False
+        return time.monotonic() - self._created_at.get(id(connection), 0) > self.max_lifetime
+
+    def acquire(self):
+        self._check_pid()
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.stats.timeouts += 1
+            raise PoolTimeout("No database connection free after [{}] seconds, [{}] are open"
+                              .format(self.timeout, self.open_count))
+        wait = time.monotonic() - start
+        with self._lock:
+            self.stats.checkouts += 1
+            self.stats.wait_seconds_total += wait
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, wait)
+            log_stats = (self.stats_log_seconds is not None and
+                         time.monotonic() - self._stats_logged_at >= self.stats_log_seconds)
+            if log_stats:
+                self._stats_logged_at = time.monotonic()
+        if log_stats:
+            self.log_stats()
+        if wait > self.slow_checkout_seconds:
+            logger.warning("Waited [{:.2f}ms] for a database connection".format(wait * 1000))
+        try:
+            return self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self.connect()
+                with self._lock:
+                    self._created_at[id(connection)] = time.monotonic()
+                    self.stats.created += 1
+                return connection
+            if self.is_expired(connection):
+                self._discard(connection)
+                continue
+            if self.pre_ping and not self._is_alive(connection):
+                with self._lock:
+                    self.stats.ping_failures += 1
+                self._discard(connection)
+                continue
+            with self._lock:
+                self.stats.reused += 1
+            return connection
+
+    def _is_alive(self, connection) -> bool:
+        try:
+            self.ping(connection)
+        except Exception:
+            logger.warning("Dropping a pooled database connection that failed its ping", exc_info=True)
+            return False
+        return True
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+            self.stats.discarded += 1
+        try:
+            self.close(connection)
+        except Exception:
+            logger.warning("Closing a pooled database connection failed", exc_info=True)
+
+    def release(self, connection, discard: bool = False):
+        """Give a checked out connection back, ``discard`` closes it, e.g. after an error left it unusable."""
+        self._check_pid()
+        if id(connection) not in self._created_at:
+            # checked out before a fork, the parent still uses it
+            self._inherited.append(connection)
+            return
+        try:
+            if discard or self.is_expired(connection):
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """Close the idle connections, e.g. before forking workers that must not inherit them."""
+        self._check_pid()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+
+def get_pool(alias: str, create=None) -> ConnectionPool:
+    """Return the pool of a database alias, created with ``create()`` on first use when given."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None and create is not None:
+            pool = _pools[alias] = create()
+            logger.info("Created a pool of [{}] connections for database [{}]".format(pool.max_size, alias))
+        return pool
+
+
+def get_pool_stats() -> dict:
+    """Return the counters and sizes of every pool of this process keyed by database alias."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.get_stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """Close the idle connections of every pool, call it with ``connections.close_all()`` before forking."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
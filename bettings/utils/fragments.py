@@ -0,0 +1,78 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+# every registered row cache by name, for the hit ratio shown in the admin
+fragment_caches = {}
+
+
+def _incr(key: str, delta: int):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # first count since the counters were reset or evicted
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+class RowFragmentCache:
+    """Cache the rendered rows of a table one by one, fetching the rows of a page with one get_many.
+
+    ``get_key_parts`` returns everything the row template shows that can change, e.g. the modification
+    times of the row's objects. Bump ``version`` when the row template changes.
+    """
+
+    def __init__(self, name: str, template_name: str, context_name: str, get_key_parts, version: int = 1):
+        self.name = name
+        self.template_name = template_name
+        self.context_name = context_name
+        self.get_key_parts = get_key_parts
+        self.version = version
+        fragment_caches[name] = self
+
+    def get_key(self, obj) -> str:
+        digest = hashlib.md5(repr(self.get_key_parts(obj)).encode("utf-8")).hexdigest()
+        return "fragments:{}:v{}:{}".format(self.name, self.version, digest)
+
+    def get_stats_keys(self) -> tuple:
+        return "fragments:{}:hits".format(self.name), "fragments:{}:misses".format(self.name)
+
+    def render(self, objects) -> list:
+        """Return (object, html) of every object, rendering and caching only the rows missing from the cache."""
+        keys = [self.get_key(obj) for obj in objects]
+        cached = cache.get_many(keys) if keys else {}
+        rendered = {}
+        rows = []
+        for obj, key in zip(objects, keys):
+            html = cached.get(key) or rendered.get(key)
+            if html is None:
+                html = rendered[key] = render_to_string(self.template_name, {self.context_name: obj})
+            rows.append((obj, mark_safe(html)))
+        if rendered:
+            cache.set_many(rendered, settings.ROW_FRAGMENT_CACHE_TIMEOUT)
+        hits_key, misses_key = self.get_stats_keys()
+        _incr(hits_key, len(keys) - len(rendered))
+        _incr(misses_key, len(rendered))
+        logger.debug("Rendered [{}] of [{}] [{}] rows".format(len(rendered), len(keys), self.name))
+        return rows
+
+    def get_stats(self) -> dict:
+        hits_key, misses_key = self.get_stats_keys()
+        counters = cache.get_many([hits_key, misses_key])
+        hits, misses = counters.get(hits_key, 0), counters.get(misses_key, 0)
+        total = hits + misses
+        return {"name": self.name, "hits": hits, "misses": misses, "hit_ratio": hits / total if total else None}
+
+    def reset_stats(self):
+        cache.delete_many(self.get_stats_keys())
+
+
+def get_fragment_stats() -> list:
+    return [fragment_caches[name].get_stats() for name in sorted(fragment_caches)]
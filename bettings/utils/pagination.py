@@ -0,0 +1,135 @@
+import base64
+import json
+import logging
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+DIRECTION_NEXT = "n"
+DIRECTION_PREVIOUS = "p"
+
+
+def encode_cursor(direction: str, values) -> str:
+    # str() keeps the microseconds of datetimes, DjangoJSONEncoder would round them and break the key equality
+    payload = json.dumps([direction] + list(values), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return the (direction, key values) of a cursor, or None when it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8"))
+    except (ValueError, TypeError):
+        logger.error("Cannot decode pagination cursor [{}]".format(cursor))
+        return None
+    if (not isinstance(payload, list) or len(payload) < 2 or payload[0] not in (DIRECTION_NEXT, DIRECTION_PREVIOUS)
+            or any(isinstance(value, (dict, list)) for value in payload[1:])):
+        logger.error("Invalid pagination cursor [{}]".format(cursor))
+        return None
+    return payload[0], payload[1:]
+
+
+def get_key_value(obj, field: str):
+    for attribute in field.split("__"):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def after_key(fields, values, reverse=False) -> Q:
+    """Match the rows sorting after ``values`` on ``fields``, or before them when ``reverse`` is set."""
+    lookup = "lt" if reverse else "gt"
+    condition = Q()
+    equal = {}
+    for field, value in zip(fields, values):
+        condition |= Q(**equal, **{"{}__{}".format(field, lookup): value})
+        equal[field] = value
+    return condition
+
+
+class KeysetPage:
+    """One page of a keyset pagination, it knows its neighbours but neither its number nor the page count."""
+    is_keyset = True
+
+    def __init__(self, object_list: list, has_next: bool, has_previous: bool, key_fields):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.key_fields = key_fields
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def get_cursor(self, direction: str, obj) -> str:
+        return encode_cursor(direction, [get_key_value(obj, field) for field in self.key_fields])
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.get_cursor(DIRECTION_NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.get_cursor(DIRECTION_PREVIOUS, self.object_list[0])
+
+
+def get_first_page(queryset, key_fields, page_size: int) -> KeysetPage:
+    rows = list(queryset.order_by(*key_fields)[:page_size + 1])
+    return KeysetPage(rows[:page_size], len(rows) > page_size, False, key_fields)
+
+
+def get_keyset_page(queryset, key_fields, page_size: int, cursor: str = None) -> KeysetPage:
+    """Fetch the page after or before ``cursor`` with a single range query, no COUNT and no OFFSET.
+
+    ``key_fields`` must be a unique ordering of the queryset, e.g. ``("match__start_time", "pk")``.
+    """
+    decoded = decode_cursor(cursor)
+    if decoded is None or len(decoded[1]) != len(key_fields):
+        return get_first_page(queryset, key_fields, page_size)
+    direction, values = decoded
+    try:
+        # the field lookups convert the values, a well-formed cursor can still carry values of the wrong type
+        after = queryset.filter(after_key(key_fields, values, reverse=direction == DIRECTION_PREVIOUS))
+    except (ValidationError, ValueError, TypeError):
+        logger.error("Invalid pagination cursor values [{}]".format(cursor))
+        return get_first_page(queryset, key_fields, page_size)
+    if direction == DIRECTION_NEXT:
+        rows = list(after.order_by(*key_fields)[:page_size + 1])
+        return KeysetPage(rows[:page_size], len(rows) > page_size, True, key_fields)
+    descending = ["-{}".format(field) for field in key_fields]
+    rows = list(after.order_by(*descending)[:page_size + 1])
+    return KeysetPage(rows[:page_size][::-1], True, len(rows) > page_size, key_fields)
+
+
+class KeysetPaginationMixin:
+    """Paginate a ListView on ``key_fields`` through a ``cursor`` query parameter.
+
+    Every page costs one indexed range query however deep it is, the template gets a KeysetPage as ``page_obj``
+    and no paginator.
+    """
+    key_fields = ("pk",)
+    cursor_kwarg = "cursor"
+
+    def get_cursor(self):
+        return self.request.GET.get(self.cursor_kwarg)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = get_keyset_page(queryset, self.key_fields, page_size, self.get_cursor())
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,73 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+IGNORED_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Database execute wrapper counting the statements of a request and the time spent on them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # transaction bookkeeping depends on ATOMIC_REQUESTS and test isolation, not on the view
+            if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS):
+                self.count += 1
+                self.duration += time.monotonic() - start
+
+
+class QueryBudgetMiddleware:
+    """Count the SQL statements of each request and compare them with the ``query_budget`` of its view.
+
+    Views opt in by declaring ``query_budget`` on the view class. A view going over its budget is
+    logged as an error, or raises QueryBudgetExceeded when ``QUERY_BUDGET_RAISE`` is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response["X-Query-Count"] = str(counter.count)
+        response["X-Query-Time"] = "{:.2f}ms".format(counter.duration * 1000)
+        self.check_budget(request, counter)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        request.query_budget_view = view_class.__name__ if view_class else view_func.__name__
+        request.query_budget = getattr(view_class, "query_budget", getattr(view_func, "query_budget", None))
+
+    def check_budget(self, request, counter):
+        budget = getattr(request, "query_budget", None)
+        if budget is None:
+            return
+        view_name = request.query_budget_view
+        if counter.count <= budget:
+            logger.debug("View [{}] ran [{}] queries in [{:.2f}ms], budget is [{}]"
+                         .format(view_name, counter.count, counter.duration * 1000, budget))
+            return
+        message = "View [{}] ran [{}] queries in [{:.2f}ms] for [{} {}], over its budget of [{}]".format(
+            view_name, counter.count, counter.duration * 1000, request.method, request.path, budget)
+        if getattr(settings, "QUERY_BUDGET_RAISE", False):
+            raise QueryBudgetExceeded(message)
+        logger.error(message)
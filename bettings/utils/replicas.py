@@ -0,0 +1,148 @@
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = threading.local()
+
+
+def get_replica_lag(alias: str):
+    """Return how many seconds a replica is behind the primary, or None when it can not be reached.
+
+    Only PostgreSQL standbys report their lag, other backends are assumed to be in sync.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())")
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.exception("Lag of replica [{}] could not be measured".format(alias))
+        return None
+    # NULL on a server that is not replaying, i.e. not a standby
+    return float(lag or 0)
+
+
+class ReplicaHealth:
+    """Process-local record of which replicas are within ``DATABASE_REPLICA_MAX_LAG_SECONDS``.
+
+    The lag of a replica is measured at most once every ``DATABASE_REPLICA_LAG_CHECK_SECONDS``.
+    """
+
+    def __init__(self):
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._checked.get(alias)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        lag = get_replica_lag(alias)
+        healthy = lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning("Replica [{}] is [{}] seconds behind, reading from the primary".format(alias, lag))
+        self.mark(alias, healthy)
+        return healthy
+
+    def mark(self, alias: str, healthy: bool):
+        with self._lock:
+            self._checked[alias] = (time.monotonic() + settings.DATABASE_REPLICA_LAG_CHECK_SECONDS, healthy)
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica() -> str:
+    """Return a random replica within the lag limit, or the primary when there is none."""
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_health.is_healthy(alias)]
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+def reads_from_replica() -> bool:
+    return getattr(_state, "enabled", False)
+
+
+def has_written() -> bool:
+    return getattr(_state, "written", False)
+
+
+def enable_replica_reads():
+    _state.enabled = True
+
+
+def reset_state():
+    _state.enabled = False
+    _state.written = False
+
+
+class ReplicaRouter:
+    """Send the reads of replica enabled requests to a replica, everything else to the primary.
+
+    Routing is explicit on both paths, Django would otherwise write an instance back to the database
+    it was read from. The first write of a request sends its remaining reads to the primary too.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return choose_replica()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.enabled = False
+        _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Let safe requests of views declaring ``read_replica = True`` read from the replicas.
+
+    A request writing to the database pins the client to the primary for ``DATABASE_REPLICA_PIN_SECONDS``
+    with a cookie, so the page it redirects to shows the write even when the replicas lag behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_state()
+        try:
+            response = self.get_response(request)
+            written = has_written() or request.method not in SAFE_METHODS
+        finally:
+            reset_state()
+        if written:
+            response.set_cookie(PIN_COOKIE, "1", max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        if not getattr(view_class, "read_replica", getattr(view_func, "read_replica", False)):
+            return
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES or not settings.DATABASE_REPLICAS:
+            return
+        enable_replica_reads()
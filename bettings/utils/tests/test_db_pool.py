@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+
+import pytest
+
+from bettings.utils.db_pool.pool import ConnectionPool, PoolTimeout
+
+
+class Connection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+
+def close(connection):
+    connection.closed = True
+
+
+def ping(connection):
+    if not connection.alive:
+        raise ConnectionError("server closed the connection")
+
+
+def make_pool(**kwargs):
+    return ConnectionPool(connect=Connection, close=close, ping=ping, **kwargs)
+
+
+def test_released_connections_are_reused():
+    pool = make_pool(max_size=2)
+    connection = pool.acquire()
+    pool.release(connection)
+
+    assert pool.acquire() is connection
+    assert pool.stats.created == 1 and pool.stats.reused == 1 and pool.stats.checkouts == 2
+
+
+def test_checkout_waits_for_a_free_connection():
+    pool = make_pool(max_size=1, timeout=5)
+    connection = pool.acquire()
+    timer = threading.Timer(0.05, pool.release, [connection])
+    timer.start()
+
+    assert pool.acquire() is connection
+    timer.join()
+    assert pool.open_count == 1
+    assert pool.stats.wait_seconds_max >= 0.04
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted():
+    pool = make_pool(max_size=1, timeout=0.01)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats.timeouts == 1
+
+
+def test_dead_connections_are_replaced_on_checkout():
+    pool = make_pool(max_size=1)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.alive = False
+
+    replacement = pool.acquire()
+
+    assert replacement is not connection
+    assert connection.closed
+    assert pool.stats.ping_failures == 1 and pool.stats.discarded == 1
+    assert pool.open_count == 1
+
+
+def test_discarded_and_expired_connections_free_their_slot():
+    pool = make_pool(max_size=1, timeout=0.01, max_lifetime=0)
+    connection = pool.acquire()
+    pool.release(connection, discard=True)
+    expired = pool.acquire()
+    pool.release(expired)
+
+    assert connection.closed and expired.closed
+    assert pool.acquire() not in (connection, expired)
+    assert pool.stats.created == 3
+
+
+def test_forked_child_does_not_use_the_parents_connections():
+    pool = make_pool(max_size=1, timeout=0.01)
+    connection = pool.acquire()
+    pool.release(connection)
+    read_end, write_end = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            child_connection = pool.acquire()
+            pool.release(connection)
+            ok = child_connection is not connection and not connection.closed and pool.open_count == 1
+            os.write(write_end, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert os.read(read_end, 1) == b"1"
+    assert pool.acquire() is connection
+    assert not connection.closed
+
+
+def test_close_all_closes_the_idle_connections():
+    pool = make_pool(max_size=2)
+    connections = [pool.acquire(), pool.acquire()]
+    for connection in connections:
+        pool.release(connection)
+
+    pool.close_all()
+
+    assert all(connection.closed for connection in connections)
+    assert pool.open_count == 0 and pool.idle_count == 0
+
+
+def test_stats_are_logged_periodically(caplog):
+    pool = make_pool(name="replica1", stats_log_seconds=0)
+    caplog.set_level(logging.INFO, logger="bettings.utils.db_pool.pool")
+
+    pool.release(pool.acquire())
+
+    assert pool.get_stats()["checkouts"] == 1
+    assert "Database pool [replica1]: [1] checkouts" in caplog.text
@@ -0,0 +1,59 @@
+import pytest
+from django.urls import reverse
+
+from bettings.bets.tests.factories import BetFactory
+from bettings.bets.views import bet_rows
+from bettings.tournaments.models import MatchResult
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.tournaments.views import match_rows
+
+pytestmark = pytest.mark.django_db
+
+
+def get_match_list(client, tournament_pk):
+    response = client.get(reverse("tournaments:match_list", kwargs={"tournament_pk": tournament_pk}))
+    assert response.status_code == 200
+    return response
+
+
+def test_unchanged_match_rows_come_from_the_cache(client):
+    match = MatchFactory()
+    MatchFactory.create_batch(2, tournament=match.tournament)
+
+    first = get_match_list(client, match.tournament_id)
+    second = get_match_list(client, match.tournament_id)
+
+    assert match_rows.get_stats() == {"name": "match_row", "hits": 3, "misses": 3, "hit_ratio": 0.5}
+    assert [row for _, row in first.context["match_rows"]] == [row for _, row in second.context["match_rows"]]
+
+
+def test_changed_match_rows_are_rendered_again(client):
+    match = MatchFactory()
+    get_match_list(client, match.tournament_id)
+
+    MatchResult.objects.create(match=match, home_goals=3, guest_goals=1)
+    response = get_match_list(client, match.tournament_id)
+
+    assert match_rows.get_stats()["misses"] == 2
+    assert "3 - 1" in response.context["match_rows"][0][1]
+
+
+def test_bet_rows_follow_settlement(client, user):
+    client.force_login(user)
+    bet = BetFactory(user=user, amount=10000)
+    client.get(reverse("bets:my_bets"))
+
+    bet.result = 10000
+    bet.save(update_fields=["result"])
+    response = client.get(reverse("bets:my_bets"))
+
+    assert bet_rows.get_stats()["misses"] == 2
+    assert "+10000" in response.context["bet_rows"][0][1]
+
+
+def test_admin_shows_the_hit_ratio(admin_client):
+    response = admin_client.get(reverse("admin:tournaments_match_changelist"))
+
+    assert response.status_code == 200
+    assert [stats["name"] for stats in response.context["fragment_stats"]] == ["bet_row", "match_row"]
+    assert b"Row fragment cache" in response.content
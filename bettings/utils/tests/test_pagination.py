@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bettings.bets.models import Bet
+from bettings.bets.tests.factories import BetFactory
+from bettings.bets.views import BetListView
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.utils.pagination import DIRECTION_NEXT, DIRECTION_PREVIOUS, encode_cursor, get_keyset_page
+
+pytestmark = pytest.mark.django_db
+
+KEY_FIELDS = ("match__start_time", "pk")
+
+
+@pytest.fixture
+def bets(user) -> list:
+    start_time = timezone.now() + datetime.timedelta(days=1, microseconds=123456)
+    # pairs of bets share a start time, so the pk has to break the ties
+    return [BetFactory(user=user, match=MatchFactory(start_time=start_time + datetime.timedelta(hours=i // 2)))
+            for i in range(7)]
+
+
+def test_pages_forward_and_backward(bets):
+    queryset = Bet.objects.select_related("match")
+    first = get_keyset_page(queryset, KEY_FIELDS, 3)
+    second = get_keyset_page(queryset, KEY_FIELDS, 3, first.next_cursor)
+    last = get_keyset_page(queryset, KEY_FIELDS, 3, second.next_cursor)
+    back = get_keyset_page(queryset, KEY_FIELDS, 3, last.previous_cursor)
+
+    assert [bet.pk for page in (first, second, last) for bet in page] == [bet.pk for bet in bets]
+    assert (first.has_previous(), first.has_next()) == (False, True)
+    assert (last.has_previous(), last.has_next()) == (True, False)
+    assert last.next_cursor is None
+    assert [bet.pk for bet in back] == [bet.pk for bet in second]
+    assert back.has_previous() and back.has_next()
+
+
+def test_malformed_cursor_serves_first_page(bets):
+    page = get_keyset_page(Bet.objects.all(), KEY_FIELDS, 3, "not-a-cursor")
+
+    assert [bet.pk for bet in page] == [bet.pk for bet in bets[:3]]
+
+
+@pytest.mark.parametrize("direction", [DIRECTION_NEXT, DIRECTION_PREVIOUS])
+@pytest.mark.parametrize("values", [["yesterday", 1], ["2030-06-01T18:00:00+00:00", "one"],
+                                    ["2030-06-01T18:00:00+00:00", None], [{"day": 1}, [1]]])
+def test_cursor_with_values_of_the_wrong_type_serves_first_page(bets, direction, values):
+    page = get_keyset_page(Bet.objects.all(), KEY_FIELDS, 3, encode_cursor(direction, values))
+
+    assert [bet.pk for bet in page] == [bet.pk for bet in bets[:3]]
+    assert not page.has_previous()
+
+
+def test_bet_list_with_a_cursor_of_the_wrong_type(client, user, bets):
+    client.force_login(user)
+
+    response = client.get(reverse("bets:my_bets"), {"cursor": encode_cursor(DIRECTION_NEXT, ["yesterday", "one"])})
+
+    assert response.status_code == 200
+    assert [bet.pk for bet in response.context["bets"]] == [bet.pk for bet in bets][:len(response.context["bets"])]
+
+
+def test_deep_page_costs_the_same_as_the_first(client, user, bets, monkeypatch):
+    monkeypatch.setattr(BetListView, "paginate_by", 2)
+    client.force_login(user)
+    url = reverse("bets:my_bets")
+
+    with CaptureQueriesContext(connection) as first_queries:
+        response = client.get(url)
+    cursor = response.context["page_obj"].next_cursor
+    for _ in range(2):
+        response = client.get(url, {"cursor": cursor})
+        cursor = response.context["page_obj"].next_cursor
+    with CaptureQueriesContext(connection) as deep_queries:
+        response = client.get(url, {"cursor": cursor})
+
+    assert [bet.pk for bet in response.context["bets"]] == [bets[6].pk]
+    assert len(deep_queries.captured_queries) == len(first_queries.captured_queries)
+    assert not any("COUNT" in query["sql"] for query in deep_queries.captured_queries)
@@ -0,0 +1,82 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.utils.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware
+
+pytestmark = pytest.mark.django_db
+
+BUDGETED_NAMESPACES = ("users", "tournaments", "bets", "bets_api", "leaderboard")
+
+
+def iter_namespaced_patterns(resolver, namespace=None):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_namespaced_patterns(pattern, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and namespace in BUDGETED_NAMESPACES:
+            yield namespace, pattern
+
+
+def test_every_view_declares_a_query_budget():
+    missing = ["{}:{}".format(namespace, pattern.name)
+               for namespace, pattern in iter_namespaced_patterns(get_resolver())
+               if getattr(getattr(pattern.callback, "view_class", None), "query_budget", None) is None]
+
+    assert missing == []
+
+
+def query_view(request):
+    list(get_user_model().objects.all())
+    list(get_user_model().objects.all())
+    return HttpResponse()
+
+
+def run_middleware(request_factory, budget):
+    query_view.query_budget = budget
+
+    def get_response(request):
+        middleware.process_view(request, query_view, (), {})
+        return query_view(request)
+
+    middleware = QueryBudgetMiddleware(get_response)
+    return middleware(request_factory.get("/"))
+
+
+def test_middleware_reports_query_count(request_factory):
+    response = run_middleware(request_factory, 2)
+
+    assert response["X-Query-Count"] == "2"
+
+
+def test_middleware_logs_view_over_budget(request_factory, caplog):
+    run_middleware(request_factory, 1)
+
+    assert "over its budget of [1]" in caplog.text
+
+
+def test_middleware_raises_when_configured(request_factory, settings):
+    settings.QUERY_BUDGET_RAISE = True
+
+    with pytest.raises(QueryBudgetExceeded):
+        run_middleware(request_factory, 1)
+
+
+def test_views_stay_within_budget(client, user, query_budget):
+    client.force_login(user)
+    bets = BetFactory.create_batch(5, user=user)
+    match = bets[0].match
+    MatchFactory.create_batch(5, tournament=match.tournament)
+    match.home.tournaments.add(match.tournament)
+    match.guest.tournaments.add(match.tournament)
+    upcoming = MatchFactory(tournament=match.tournament, home=match.home, guest=match.guest)
+
+    for url in [reverse("tournaments:list"), reverse("tournaments:match_list", args=[match.tournament.pk]),
+                reverse("bets:my_bets"), reverse("bets:result"), reverse("bets:create", args=[upcoming.pk]),
+                reverse("bets:update", args=[bets[0].pk]), reverse("bets:delete", args=[bets[0].pk]),
+                reverse("users:detail", args=[user.username]), reverse("users:list"), reverse("users:redirect")]:
+        assert client.get(url).status_code in (200, 302)
+    assert client.post(reverse("bets:create", args=[upcoming.pk]),
+                       {"choice": upcoming.home.pk, "amount": 10000}).status_code == 302
@@ -0,0 +1,127 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.urls import reverse
+
+from bettings.bets.models import Bet
+from bettings.bets.tests.factories import BetFactory
+from bettings.tournaments.tests.factories import MatchFactory
+from bettings.utils.replicas import (PIN_COOKIE, ReplicaMiddleware, ReplicaRouter, get_replica_lag, replica_health,
+                                     reads_from_replica)
+
+REPLICA = "replica1"
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+    replica_health.mark(REPLICA, True)
+    yield
+    replica_health.clear()
+
+
+def replica_view(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Bet))
+
+
+replica_view.read_replica = True
+
+
+def primary_view(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Bet))
+
+
+def run_middleware(request, view):
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+    middleware = ReplicaMiddleware(get_response)
+    return middleware(request)
+
+
+def test_reads_of_replica_views_go_to_a_replica(request_factory, replicas):
+    response = run_middleware(request_factory.get("/"), replica_view)
+
+    assert response.content.decode() == REPLICA
+    assert PIN_COOKIE not in response.cookies
+    assert not reads_from_replica()
+
+
+def test_other_views_read_from_the_primary(request_factory, replicas):
+    response = run_middleware(request_factory.get("/"), primary_view)
+
+    assert response.content.decode() == DEFAULT_DB_ALIAS
+
+
+def test_writes_pin_the_client_to_the_primary(request_factory, replicas):
+    response = run_middleware(request_factory.post("/"), replica_view)
+
+    assert response.content.decode() == DEFAULT_DB_ALIAS
+    assert response.cookies[PIN_COOKIE]["max-age"] == 10
+
+    request = request_factory.get("/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    assert run_middleware(request, replica_view).content.decode() == DEFAULT_DB_ALIAS
+
+
+def test_a_write_sends_the_remaining_reads_to_the_primary(request_factory, replicas):
+    def writing_view(request):
+        before = ReplicaRouter().db_for_read(Bet)
+        assert ReplicaRouter().db_for_write(Bet) == DEFAULT_DB_ALIAS
+        return HttpResponse("{} {}".format(before, ReplicaRouter().db_for_read(Bet)))
+
+    writing_view.read_replica = True
+    response = run_middleware(request_factory.get("/"), writing_view)
+
+    assert response.content.decode() == "{} {}".format(REPLICA, DEFAULT_DB_ALIAS)
+    assert PIN_COOKIE in response.cookies
+
+
+def test_lagging_replicas_fall_back_to_the_primary(request_factory, replicas):
+    replica_health.mark(REPLICA, False)
+
+    assert run_middleware(request_factory.get("/"), replica_view).content.decode() == DEFAULT_DB_ALIAS
+
+
+def test_lag_is_only_measured_on_postgresql():
+    assert get_replica_lag(REPLICA) == 0
+
+
+def test_replicas_are_not_migrated(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+    assert ReplicaRouter().allow_migrate(DEFAULT_DB_ALIAS, "bets")
+    assert not ReplicaRouter().allow_migrate(REPLICA, "bets")
+
+
+# the replica alias mirrors the default test database, so the test can commit and read it back there
+@pytest.mark.django_db(transaction=True)
+def test_bet_list_reads_the_replica_and_the_new_bet_after_a_write(client, user, replicas):
+    client.force_login(user)
+    BetFactory(user=user)
+    match = MatchFactory()
+
+    response = client.get(reverse("bets:my_bets"))
+    assert len(response.context["bets"]) == 1
+    assert response.context["bets"][0]._state.db == REPLICA
+
+    response = client.post(reverse("bets:create", kwargs={"match_pk": match.pk}),
+                           {"choice": match.home_id, "amount": 10000})
+    assert response.status_code == 302
+    response = client.get(response.url)
+    assert len(response.context["bets"]) == 2
+    assert response.context["bets"][0]._state.db == DEFAULT_DB_ALIAS
+
+
+@pytest.mark.django_db(transaction=True)
+def test_match_list_fills_its_page_cache_from_the_primary(client, replicas):
+    match = MatchFactory()
+    match.tournament.teams.add(match.home, match.guest)
+
+    response = client.get(reverse("tournaments:match_list", kwargs={"tournament_pk": match.tournament_id}))
+
+    assert response.status_code == 200
+    assert response.context["tournament"]._state.db == DEFAULT_DB_ALIAS
+    assert [team._state.db for team in response.context["teams"]] == [DEFAULT_DB_ALIAS] * 2
+    assert [match._state.db for match in response.context["matches"]] == [DEFAULT_DB_ALIAS]
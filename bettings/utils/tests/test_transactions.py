@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.http import HttpResponse
+from django.views.generic import View
+
+from bettings.utils.transactions import (TransactionPolicyMixin, ReadOnlyViolation, ATOMIC, READ_ONLY, SHORT_WRITE,
+                                         NON_ATOMIC)
+
+
+class PolicyView(TransactionPolicyMixin, View):
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(str(connection.in_atomic_block))
+
+    def post(self, request, *args, **kwargs):
+        get_user_model().objects.update(first_name="")
+        return HttpResponse(str(connection.in_atomic_block))
+
+
+def get_view(policy):
+    view = type("{}View".format(policy.title()), (PolicyView,), {"transaction_policy": policy})
+    return BaseHandler().make_view_atomic(view.as_view())
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("policy, atomic", [
+    (ATOMIC, True),
+    (NON_ATOMIC, False),
+    (READ_ONLY, False),
+    (SHORT_WRITE, False),
+])
+def test_only_atomic_views_run_in_a_request_transaction(request_factory, policy, atomic):
+    response = get_view(policy)(request_factory.get("/"))
+
+    assert response.content.decode() == str(atomic)
+
+
+@pytest.mark.django_db
+def test_read_only_views_can_not_write(request_factory):
+    with pytest.raises(ReadOnlyViolation):
+        get_view(READ_ONLY)(request_factory.post("/"))
+
+
+@pytest.mark.django_db
+def test_short_write_views_can_write(request_factory):
+    assert get_view(SHORT_WRITE)(request_factory.post("/")).status_code == 200
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        get_view("sometimes")
@@ -0,0 +1,59 @@
+from contextlib import ExitStack
+from django.db import connections, transaction
+
+# the whole view runs in one transaction, as ATOMIC_REQUESTS does for every view without a policy
+ATOMIC = "atomic"
+# every statement commits on its own
+NON_ATOMIC = "non_atomic"
+# like NON_ATOMIC, and any write while the view runs is an error
+READ_ONLY = "read_only"
+# like NON_ATOMIC, the view wraps its writes in transaction.atomic() itself and holds locks only that long
+SHORT_WRITE = "short_write"
+POLICIES = (ATOMIC, NON_ATOMIC, READ_ONLY, SHORT_WRITE)
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+class ReadOnlyViolation(Exception):
+    pass
+
+
+class WriteGuard:
+    """Database execute wrapper rejecting the writes of a read-only view."""
+
+    def __init__(self, view_name: str):
+        self.view_name = view_name
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            raise ReadOnlyViolation("Read-only view [{}] tried to write [{}]".format(self.view_name, sql[:100]))
+        return execute(sql, params, many, context)
+
+
+class TransactionPolicyMixin:
+    """Choose how a class based view uses transactions instead of the global ``ATOMIC_REQUESTS``.
+
+    Read-only pages no longer hold a transaction open while they run, views that write keep their
+    transactions around the database work only. Put the mixin first so its guard covers the whole dispatch.
+    """
+    transaction_policy = ATOMIC
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if cls.transaction_policy not in POLICIES:
+            raise ValueError("Unknown transaction policy [{}] of view [{}]"
+                             .format(cls.transaction_policy, cls.__name__))
+        view = super().as_view(**initkwargs)
+        if cls.transaction_policy == ATOMIC:
+            return view
+        # ATOMIC_REQUESTS is only configured on the default database
+        return transaction.non_atomic_requests(view)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.transaction_policy != READ_ONLY:
+            return super().dispatch(request, *args, **kwargs)
+        with ExitStack() as stack:
+            guard = WriteGuard(type(self).__name__)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(guard))
+            return super().dispatch(request, *args, **kwargs)
@@ -42,6 +42,16 @@ DATABASES = {
     'default': env.db('DATABASE_URL', default='postgres:///bettings'),
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
+# Read replicas of the default database, as comma separated database URLs. They are aliased replica1, replica2...
+# and tests read them through the default database.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DJANGO_DATABASE_REPLICA_URLS', default=[]), start=1):
+    alias = 'replica{}'.format(index)
+    DATABASES[alias] = env.db_url_config(url)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+# https://docs.djangoproject.com/en/dev/topics/db/multi-db/#automatic-database-routing
+DATABASE_ROUTERS = ['bettings.utils.replicas.ReplicaRouter']
 
 # URLS
 # ------------------------------------------------------------------------------
@@ -68,11 +78,13 @@ THIRD_PARTY_APPS = [
     'allauth.account',
     'allauth.socialaccount',
     'rest_framework',
+    'rest_framework.authtoken',
 ]
 LOCAL_APPS = [
     'bettings.users.apps.UsersAppConfig',
     'bettings.tournaments.apps.TournamentsConfig',
     'bettings.bets.apps.BetsConfig',
+    'bettings.leaderboard.apps.LeaderboardConfig',
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -134,6 +146,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'bettings.utils.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -235,5 +248,82 @@ ACCOUNT_ADAPTER = 'bettings.users.adapters.AccountAdapter'
 # https://django-allauth.readthedocs.io/en/latest/configuration.html
 SOCIALACCOUNT_ADAPTER = 'bettings.users.adapters.SocialAccountAdapter'
 
+# Django REST Framework
+# ------------------------------------------------------------------------------
+# http://www.django-rest-framework.org/api-guide/settings/
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'EXCEPTION_HANDLER': 'bettings.utils.api.exception_handler',
+}
+
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Settlement
+# ------------------------------------------------------------------------------
+# Queue settlement jobs for the settlement_worker command instead of settling bets inside the request.
+SETTLEMENT_ASYNC = env.bool('DJANGO_SETTLEMENT_ASYNC', default=True)
+# Number of bets settled and checkpointed per transaction.
+SETTLEMENT_CHUNK_SIZE = env.int('DJANGO_SETTLEMENT_CHUNK_SIZE', default=5000)
+# A failed job is retried until it has been attempted this many times.
+SETTLEMENT_MAX_ATTEMPTS = env.int('DJANGO_SETTLEMENT_MAX_ATTEMPTS', default=5)
+# A running job whose worker has not checkpointed for this long may be claimed by another worker.
+SETTLEMENT_LEASE_SECONDS = env.int('DJANGO_SETTLEMENT_LEASE_SECONDS', default=600)
+
+# Query budget
+# ------------------------------------------------------------------------------
+# Opt in by adding 'bettings.utils.query_budget.QueryBudgetMiddleware' to MIDDLEWARE, views declare query_budget.
+# Raise QueryBudgetExceeded instead of logging an error when a view runs over its budget.
+QUERY_BUDGET_RAISE = env.bool('DJANGO_QUERY_BUDGET_RAISE', default=False)
+
+# Match list cache
+# ------------------------------------------------------------------------------
+# Seconds a match list page stays cached, pages are invalidated by a per-tournament version bump.
+MATCH_LIST_CACHE_TIMEOUT = env.int('DJANGO_MATCH_LIST_CACHE_TIMEOUT', default=60 * 60)
+
+# Bet API
+# ------------------------------------------------------------------------------
+# Hours a response is replayed for a request retried with the same Idempotency-Key header.
+IDEMPOTENCY_KEY_TTL_HOURS = env.int('DJANGO_IDEMPOTENCY_KEY_TTL_HOURS', default=24)
+
+# Bet window cache
+# ------------------------------------------------------------------------------
+# Seconds a process keeps the cutoff and settled flag of a match before reading it again.
+BET_WINDOW_CACHE_TTL = env.int('DJANGO_BET_WINDOW_CACHE_TTL', default=60)
+
+# Leaderboard
+# ------------------------------------------------------------------------------
+# Serve rankings from Redis sorted sets mirroring the standings, needs the django_redis cache backend.
+LEADERBOARD_REDIS_MIRROR = env.bool('DJANGO_LEADERBOARD_REDIS_MIRROR', default=False)
+
+# Live match events
+# ------------------------------------------------------------------------------
+# Streams hold a connection each, only enable them with an async or threaded server (e.g. gunicorn --threads).
+LIVE_EVENTS_ENABLED = env.bool('DJANGO_LIVE_EVENTS_ENABLED', default=False)
+# Events kept per process for streams resuming with Last-Event-ID, older gaps make the page reload.
+LIVE_EVENTS_BUFFER_SIZE = env.int('DJANGO_LIVE_EVENTS_BUFFER_SIZE', default=1000)
+# An event stream holds a worker for this long before the browser reconnects.
+LIVE_EVENTS_STREAM_SECONDS = env.int('DJANGO_LIVE_EVENTS_STREAM_SECONDS', default=300)
+# Idle streams send a comment this often so proxies keep the connection open.
+LIVE_EVENTS_KEEPALIVE_SECONDS = env.int('DJANGO_LIVE_EVENTS_KEEPALIVE_SECONDS', default=15)
+# Delay the browser waits before reconnecting a closed stream.
+LIVE_EVENTS_RETRY_MILLISECONDS = env.int('DJANGO_LIVE_EVENTS_RETRY_MILLISECONDS', default=3000)
+
+# Read replicas
+# ------------------------------------------------------------------------------
+# Replicas further behind the primary than this are skipped until their lag is measured again.
+DATABASE_REPLICA_MAX_LAG_SECONDS = env.int('DJANGO_DATABASE_REPLICA_MAX_LAG_SECONDS', default=5)
+# Seconds between two lag measurements of a replica in one process.
+DATABASE_REPLICA_LAG_CHECK_SECONDS = env.int('DJANGO_DATABASE_REPLICA_LAG_CHECK_SECONDS', default=10)
+# Seconds a client reads from the primary after a write, keep it above the lag limit for read-your-writes.
+DATABASE_REPLICA_PIN_SECONDS = env.int('DJANGO_DATABASE_REPLICA_PIN_SECONDS', default=10)
+
+# Row fragment cache
+# ------------------------------------------------------------------------------
+# Seconds a rendered match or bet table row stays cached, rows are keyed by what they show so edits need no purge.
+ROW_FRAGMENT_CACHE_TIMEOUT = env.int('DJANGO_ROW_FRAGMENT_CACHE_TIMEOUT', default=24 * 60 * 60)
@@ -54,6 +54,11 @@ DEBUG_TOOLBAR_CONFIG = {
 # https://django-debug-toolbar.readthedocs.io/en/latest/installation.html#internal-ips
 INTERNAL_IPS = ['127.0.0.1', '10.0.2.2']
 
+# Query budget
+# ------------------------------------------------------------------------------
+if env.bool('DJANGO_QUERY_BUDGET', default=True):
+    MIDDLEWARE = ['bettings.utils.query_budget.QueryBudgetMiddleware'] + MIDDLEWARE  # noqa F405
+
 # django-extensions
 # ------------------------------------------------------------------------------
 # https://django-extensions.readthedocs.io/en/latest/installation_instructions.html#configuration
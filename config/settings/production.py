@@ -13,6 +13,25 @@ ALLOWED_HOSTS = env.list('DJANGO_ALLOWED_HOSTS', default=['http://simpledev.live
 DATABASES['default'] = env.db('DATABASE_URL')  # noqa F405
 DATABASES['default']['ATOMIC_REQUESTS'] = True  # noqa F405
 DATABASES['default']['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=60)  # noqa F405
+# Check connections out of a process wide pool shared by the worker threads (gunicorn --threads) instead of
+# keeping one per thread, the pool bounds the connections of a process at DJANGO_DATABASE_POOL_MAX_SIZE.
+if env.bool('DJANGO_DATABASE_POOL', default=False):
+    DATABASES['default']['ENGINE'] = 'bettings.utils.db_pool'  # noqa F405
+    # connections go back to the pool at the end of each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # noqa F405
+    DATABASES['default']['POOL'] = {  # noqa F405
+        'MAX_SIZE': env.int('DJANGO_DATABASE_POOL_MAX_SIZE', default=10),
+        # seconds a request waits for a free connection before failing
+        'TIMEOUT': env.int('DJANGO_DATABASE_POOL_TIMEOUT', default=5),
+        # run SELECT 1 on checkout to drop connections the server or a failover closed
+        'PRE_PING': env.bool('DJANGO_DATABASE_POOL_PRE_PING', default=True),
+        # seconds after which a connection is closed instead of reused
+        'MAX_LIFETIME': env.int('DJANGO_DATABASE_POOL_MAX_LIFETIME', default=30 * 60),
+        # seconds between two log lines with the checkout counts and wait times of the pool
+        'STATS_LOG_SECONDS': env.int('DJANGO_DATABASE_POOL_STATS_LOG_SECONDS', default=60),
+    }
+for alias in DATABASE_REPLICAS:  # noqa F405
+    DATABASES[alias]['CONN_MAX_AGE'] = DATABASES['default']['CONN_MAX_AGE']  # noqa F405
 
 # CACHES
 # ------------------------------------------------------------------------------
@@ -14,6 +14,12 @@ SECRET_KEY = env("DJANGO_SECRET_KEY", default="ZnuWeXZC9VDoJe18JiBDnPkcrTqxZaq3W
 # https://docs.djangoproject.com/en/dev/ref/settings/#test-runner
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 
+# DATABASES
+# ------------------------------------------------------------------------------
+# A second connection to the test database stands in for a read replica, tests enable replica reads themselves.
+DATABASES.setdefault("replica1", dict(DATABASES["default"], TEST={"MIRROR": "default"}))  # noqa F405
+DATABASES["replica1"]["ATOMIC_REQUESTS"] = False  # noqa F405
+
 # CACHES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#caches
@@ -15,6 +15,8 @@ urlpatterns = [
                   path("accounts/", include("allauth.urls")),
                   path("tournaments/", include("bettings.tournaments.urls", namespace="tournaments")),
                   path("bets/", include("bettings.bets.urls", namespace="bets")),
+                  path("api/bets/", include("bettings.bets.api_urls", namespace="bets_api")),
+                  path("leaderboard/", include("bettings.leaderboard.urls", namespace="leaderboard")),
               ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
                          )
 